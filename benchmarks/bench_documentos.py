@@ -0,0 +1,91 @@
+# benchmarks/bench_documentos.py
+"""
+Mide cuántos documentos por segundo produce cada backend de PDF
+(logica/backends_documentos.py) con facturas y remitos sintéticos.
+No necesita base de datos.
+
+Uso:
+    python -m benchmarks.bench_documentos --documentos 20 --lineas 15
+    python -m benchmarks.bench_documentos --backends reportlab libreoffice
+"""
+import argparse
+import datetime
+import itertools
+import os
+import tempfile
+
+from benchmarks.comun import medir, resumir, imprimir_tabla
+from logica.backends_documentos import BACKENDS, obtener_backend
+from logica.generar_factura import FacturaGenerator
+from logica.generar_remito import RemitoGenerator
+
+
+def contexto_factura(factura_id, lineas):
+    detalles = [
+        {"prodID": i, "nombre": f"Producto de prueba {i}", "cantidad": 1 + i % 3,
+         "precioUnitario": 100.0 + i, "subtotal": (1 + i % 3) * (100.0 + i)}
+        for i in range(lineas)
+    ]
+    bruto = sum(d["subtotal"] for d in detalles)
+    datos = {
+        "facturaID": factura_id, "fechaEmision": datetime.date.today(),
+        "horaEmision": datetime.datetime.now().time().replace(microsecond=0),
+        "total_bruto": bruto, "total_neto": bruto * 0.9, "descuento": 10.0,
+        "tipoFactura": "B",
+    }
+    cliente = {"nombre": "Carlos", "apellido": "López", "cuit": "20-11111111-1",
+               "iva": "Exento", "clienteID": 1}
+    return FacturaGenerator().construir_contexto(datos, cliente), detalles
+
+
+def contexto_remito(remito_id, lineas):
+    carrito = [{"prodID": i, "nombre": f"Producto de prueba {i}", "cantidad": 1 + i % 3}
+               for i in range(lineas)]
+    ctx = {
+        "ivaExento": "●", "ivaMonotributo": "○", "ivaRespInsc": "○",
+        "ivaEventual": "○", "ivaConsFinal": "○",
+        "remitoID": remito_id, "fechaInicioRemito": datetime.date.today().isoformat(),
+        "horaInicioRemito": "12:00:00", "fechaVencRemito": "",
+        "clienteNombre": "Carlos López", "clienteCUIT_CUIL": "20-11111111-1",
+        "clienteDireccion": "Calle Alfa 1", "clienteID": 1,
+        "%%tabla_placeholder_remito%%": "%%tabla_placeholder_remito%%",
+    }
+    return ctx, carrito
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    ap.add_argument("--documentos", type=int, default=20)
+    ap.add_argument("--lineas", type=int, default=15)
+    args = ap.parse_args()
+
+    fg, rg = FacturaGenerator(), RemitoGenerator()
+    destino = tempfile.mkdtemp(prefix="farmanaccio-bench-")
+    contador = itertools.count(1)
+    filas = []
+    for nombre in args.backends:
+        backend = obtener_backend(nombre)
+        for tipo in ("factura", "remito"):
+            def un_documento():
+                n = next(contador)
+                ruta = os.path.join(destino, f"{nombre}-{tipo}-{n}.pdf")
+                if tipo == "factura":
+                    ctx, detalles = contexto_factura(n, args.lineas)
+                    backend.generar_factura(fg, ctx, detalles, ruta)
+                else:
+                    ctx, carrito = contexto_remito(n, args.lineas)
+                    backend.generar_remito(rg, ctx, carrito, ruta)
+            try:
+                stats = resumir(medir(un_documento, repeticiones=args.documentos))
+            except Exception as ex:
+                filas.append({"backend": nombre, "documento": tipo, "error": str(ex)})
+                continue
+            filas.append({"backend": nombre, "documento": tipo, **stats})
+
+    print(f"{args.documentos} documentos por backend, {args.lineas} líneas cada uno (salida en {destino})")
+    imprimir_tabla(filas, ["backend", "documento", "ops_s", "media_ms", "max_ms", "error"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/bench_excel.py
+"""
+Mide la lectura del Excel del vademécum en el arranque: pd.read_excel
+(openpyxl, comportamiento anterior) frente a datos.cache_excel.leer_excel
+sin caché (primera lectura: Excel + escritura del snapshot) y con caché.
+
+Uso:
+    python -m benchmarks.bench_excel --repeticiones 3
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from benchmarks.comun import medir, resumir, imprimir_tabla
+from datos import cache_excel
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--excel", default=None, help="por defecto datos/vademecum-marzo2025.xlsx")
+    args = ap.parse_args()
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ruta = args.excel or os.path.join(raiz, "datos", "vademecum-marzo2025.xlsx")
+
+    def sin_cache():
+        cache_excel.descartar_cache(ruta)
+        cache_excel.leer_excel(ruta)
+
+    # Cada variante devuelve un DataFrame equivalente
+    variantes = {
+        "pd.read_excel (antes)": lambda: pd.read_excel(ruta, sheet_name=0),
+        "leer_excel sin caché": sin_cache,
+        "leer_excel con caché": lambda: cache_excel.leer_excel(ruta),
+    }
+    filas = []
+    for nombre, funcion in variantes.items():
+        tiempos = medir(funcion, repeticiones=args.repeticiones, calentamiento=0 if "sin" in nombre else 1)
+        filas.append({"lectura": nombre, **resumir(tiempos)})
+
+    print(f"{os.path.basename(ruta)}, {args.repeticiones} repeticiones")
+    imprimir_tabla(filas, ["lectura", "media_ms", "min_ms", "max_ms"])
+
+
+if __name__ == "__main__":
+    main()
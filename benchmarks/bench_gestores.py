@@ -0,0 +1,177 @@
+# benchmarks/bench_gestores.py
+"""
+Mide los caminos críticos de los gestores de logica/ sin interfaz gráfica,
+contra la base configurada (idealmente poblada con scripts.generar_datos):
+
+  StockManager.obtener_productos
+  GestorInventario.obtener_inventario_agrupado
+  VademecumManager.buscar_vademecum          (términos al azar del vademécum)
+  ClienteManager.obtener_clientes
+  UsuarioManager.validar_usuario
+  VentaManager.confirmar_venta               (carritos de 1 a 3 productos)
+  búsqueda al escribir en Ventas              (contar_productos + primera página,
+                                               con términos de 1 a 6 letras)
+
+La venta se mide con VentaManager.registrar_venta: es la misma transacción
+que confirmar_venta, sin el diálogo de guardado ni la generación del PDF.
+¡Registra ventas reales y descuenta stock! Omitirla con --omitir confirmar_venta.
+
+Informa p50/p95/p99 y operaciones/s por caso. Con --json guarda los
+resultados (con el commit actual) para compararlos después con --comparar.
+
+Uso:
+    python -m benchmarks.bench_gestores --repeticiones 50 --json resultados.json
+    python -m benchmarks.bench_gestores --comparar resultados.json
+"""
+import argparse
+import datetime
+import json
+import random
+import subprocess
+
+import config
+
+from benchmarks.comun import medir, resumir, imprimir_tabla
+from datos.conexion_bd import ConexionBD
+from logica.gestor_clientes import ClienteManager
+from logica.gestor_inventario import GestorInventario
+from logica.gestor_stock import StockManager
+from logica.gestor_usuarios import UsuarioManager
+from logica.gestor_vademecum import VademecumManager
+from logica.gestor_ventas import VentaManager
+
+COLUMNAS = ["caso", "n", "p50_ms", "p95_ms", "p99_ms", "max_ms", "ops_s"]
+
+
+def _muestra(sql, cantidad, rnd):
+    with ConexionBD.sesion() as cur:
+        cur.execute(sql)
+        valores = [fila[0] for fila in cur.fetchall()]
+    return rnd.sample(valores, min(cantidad, len(valores)))
+
+
+def _ciclo(valores):
+    """
+    Función sin argumentos que devuelve el siguiente elemento de 'valores'.
+    """
+    estado = {"i": 0}
+    def siguiente():
+        valor = valores[estado["i"] % len(valores)]
+        estado["i"] += 1
+        return valor
+    return siguiente
+
+
+def casos(args, rnd) -> dict:
+    """
+    {nombre: función sin argumentos} con una operación de cada caso.
+    """
+    stock, inventario, vademecum = StockManager(), GestorInventario(), VademecumManager()
+    clientes, usuarios, ventas = ClienteManager(), UsuarioManager(), VentaManager()
+
+    terminos = [n[:rnd.randint(3, 8)] for n in _muestra(
+        "SELECT nombreComercial FROM vademecum WHERE vigente = 1", 500, rnd) if n]
+    siguiente_termino = _ciclo(terminos or ["ibu"])
+
+    nombres = _muestra("SELECT nombreNorm FROM productos WHERE activo = 1", 500, rnd)
+    # Lo que hay escrito tras cada tecla: prefijos de 1 a 6 letras
+    siguiente_tecleo = _ciclo([n[:rnd.randint(1, 6)] for n in nombres if n] or ["a"])
+
+    def busqueda_al_escribir():
+        termino = siguiente_tecleo()
+        stock.contar_productos(termino, config.busqueda_limite)
+        stock.obtener_productos_pagina(0, 200, termino)
+
+    prod_ids = _muestra("SELECT prodID FROM productos WHERE activo = 1 AND stock > 10", 1000, rnd)
+    def carrito():
+        elegidos = rnd.sample(prod_ids, min(rnd.randint(1, 3), len(prod_ids)))
+        return [{"prodID": p, "cantidad": 1} for p in elegidos]
+
+    def venta():
+        ok, msg, _ = ventas.registrar_venta(carrito())
+        if not ok:
+            print("  venta rechazada:", msg)
+
+    resultado = {
+        "StockManager.obtener_productos": stock.obtener_productos,
+        "GestorInventario.obtener_inventario_agrupado": inventario.obtener_inventario_agrupado,
+        "VademecumManager.buscar_vademecum": lambda: vademecum.buscar_vademecum(siguiente_termino()),
+        "ClienteManager.obtener_clientes": clientes.obtener_clientes,
+        "UsuarioManager.validar_usuario": lambda: usuarios.validar_usuario(args.usuario, args.password),
+        "Ventas: búsqueda al escribir": busqueda_al_escribir,
+    }
+    if prod_ids:
+        resultado["VentaManager.confirmar_venta"] = venta
+    else:
+        print("Sin productos con stock: se omite VentaManager.confirmar_venta.")
+    return resultado
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(filas, ruta):
+    with open(ruta, encoding="utf-8") as f:
+        base = {r["caso"]: r for r in json.load(f)["resultados"]}
+    print(f"\nComparación con {ruta} (variación de p50 y p95):")
+    comparacion = []
+    for fila in filas:
+        anterior = base.get(fila["caso"])
+        if anterior is None:
+            continue
+        comparacion.append({
+            "caso": fila["caso"],
+            "p50_antes": anterior["p50_ms"], "p50_ahora": fila["p50_ms"],
+            "p50_%": (fila["p50_ms"] / anterior["p50_ms"] - 1) * 100 if anterior["p50_ms"] else 0.0,
+            "p95_antes": anterior["p95_ms"], "p95_ahora": fila["p95_ms"],
+            "p95_%": (fila["p95_ms"] / anterior["p95_ms"] - 1) * 100 if anterior["p95_ms"] else 0.0,
+        })
+    imprimir_tabla(comparacion, ["caso", "p50_antes", "p50_ahora", "p50_%", "p95_antes", "p95_ahora", "p95_%"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeticiones", type=int, default=30)
+    ap.add_argument("--calentamiento", type=int, default=2)
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--usuario", default="admin")
+    ap.add_argument("--password", default="admin")
+    ap.add_argument("--solo", nargs="*", default=None, help="casos a medir (nombre o parte)")
+    ap.add_argument("--omitir", nargs="*", default=[], help="casos a omitir (nombre o parte)")
+    ap.add_argument("--json", default=None, help="guardar los resultados en este archivo")
+    ap.add_argument("--comparar", default=None, help="JSON de una corrida anterior")
+    args = ap.parse_args()
+
+    rnd = random.Random(args.semilla)
+    filas = []
+    for nombre, funcion in casos(args, rnd).items():
+        if args.solo is not None and not any(s in nombre for s in args.solo):
+            continue
+        if any(s in nombre for s in args.omitir):
+            continue
+        tiempos = medir(funcion, repeticiones=args.repeticiones, calentamiento=args.calentamiento)
+        filas.append({"caso": nombre, **resumir(tiempos)})
+
+    imprimir_tabla(filas, COLUMNAS)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _commit_actual(),
+                "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                "repeticiones": args.repeticiones,
+                "semilla": args.semilla,
+                "resultados": filas,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.json}")
+    if args.comparar:
+        comparar(filas, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_sesion.py
+"""
+Mide el costo por operación del acceso a la base desde los gestores:
+
+  - "antes": obtener_conexion + cursor + USE <base> + consulta,
+    el patrón que repetía cada método de logica/;
+  - "sesion": ConexionBD.sesion() + consulta (sin el USE).
+
+Además de la latencia informa las sentencias que recibe el servidor por
+operación (variable global 'Questions'), que es la reducción de viajes de
+ida y vuelta. Conviene correrlo sin otros clientes conectados.
+
+Uso:
+    python -m benchmarks.bench_sesion --repeticiones 200
+"""
+import argparse
+
+from benchmarks.comun import medir, resumir, imprimir_tabla
+from datos.conexion_bd import ConexionBD, config_db
+
+SQL = "SELECT userID, usuario, role FROM usuarios WHERE userID = %s"
+
+
+def _sentencias_servidor():
+    with ConexionBD.sesion() as cur:
+        cur.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(cur.fetchone()[1])
+
+
+def patron_anterior():
+    conexion = ConexionBD.obtener_conexion()
+    cursor = conexion.cursor(dictionary=True)
+    cursor.execute(f"USE {config_db['database']}")
+    cursor.execute(SQL, (1,))
+    cursor.fetchall()
+    cursor.close()
+    conexion.close()
+
+
+def patron_sesion():
+    with ConexionBD.sesion(dictionary=True) as cursor:
+        cursor.execute(SQL, (1,))
+        cursor.fetchall()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeticiones", type=int, default=200)
+    args = ap.parse_args()
+
+    variantes = {
+        "antes (USE + consulta)": patron_anterior,
+        "sesion (consulta)": patron_sesion,
+    }
+    filas = []
+    for nombre, funcion in variantes.items():
+        funcion()  # calentamiento fuera de la cuenta de sentencias
+        antes = _sentencias_servidor()
+        tiempos = medir(funcion, repeticiones=args.repeticiones, calentamiento=0)
+        # La propia lectura de 'Questions' también cuenta como sentencia
+        sentencias = _sentencias_servidor() - antes - 1
+        filas.append({"variante": nombre, **resumir(tiempos),
+                      "sentencias_op": sentencias / args.repeticiones})
+
+    print(f"{args.repeticiones} repeticiones")
+    imprimir_tabla(filas, ["variante", "media_ms", "min_ms", "max_ms", "ops_s", "sentencias_op"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_vademecum.py
+"""
+Compara la latencia de búsqueda en el vademécum: la consulta original
+(LOWER(nombreComercial) LIKE '%termino%', recorrido completo) frente a
+la búsqueda en MySQL por prefijo indexado + FULLTEXT y el índice en
+memoria de logica/indice_vademecum.py.
+
+Si la tabla está vacía se migra primero datos/vademecum-marzo2025.xlsx.
+
+Uso:
+    python -m benchmarks.bench_vademecum --terminos 50 --repeticiones 5
+"""
+import argparse
+import os
+import random
+import time
+
+import config
+from benchmarks.comun import medir, resumir, imprimir_tabla
+from datos.conexion_bd import ConexionBD
+from datos.migrar_vademecum import migrar_vademecum
+from logica.gestor_vademecum import VademecumManager
+from logica.indice_vademecum import obtener_indice, invalidar_indice
+
+
+def busqueda_original(termino):
+    cnx = ConexionBD.obtener_conexion()
+    cur = cnx.cursor(dictionary=True)
+    cur.execute("""
+        SELECT vademecumID, nombreComercial, presentacion,
+               accionFarmacologica, principioActivo, laboratorio
+        FROM vademecum
+        WHERE LOWER(nombreComercial) LIKE %s
+    """, ("%" + termino.lower() + "%",))
+    filas = cur.fetchall()
+    cur.close()
+    cnx.close()
+    return filas
+
+
+def terminos_de_prueba(cantidad, semilla):
+    cnx = ConexionBD.obtener_conexion()
+    cur = cnx.cursor()
+    cur.execute("SELECT nombreComercial FROM vademecum")
+    nombres = [n for (n,) in cur.fetchall() if n and len(n) >= 4]
+    cur.close()
+    cnx.close()
+    rnd = random.Random(semilla)
+    return [rnd.choice(nombres)[:rnd.randint(3, 6)] for _ in range(cantidad)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--terminos", type=int, default=50)
+    ap.add_argument("--repeticiones", type=int, default=5)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args()
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    migrar_vademecum(os.path.join(raiz, "datos", "vademecum-marzo2025.xlsx"))
+
+    terminos = terminos_de_prueba(args.terminos, args.semilla)
+
+    # Construcción desde la tabla y carga desde el snapshot
+    invalidar_indice()
+    t0 = time.perf_counter()
+    obtener_indice()
+    construccion = time.perf_counter() - t0
+    invalidar_indice(borrar_snapshot=False)
+    t0 = time.perf_counter()
+    indice = obtener_indice()
+    carga = time.perf_counter() - t0
+    print(f"Índice en memoria: construcción {construccion * 1000:.0f} ms, "
+          f"carga del snapshot {carga * 1000:.0f} ms")
+
+    # Con el índice desactivado, buscar_vademecum consulta MySQL
+    config.vademecum_indice_memoria = False
+    vm = VademecumManager()
+    variantes = {
+        "LIKE %termino% (original)": busqueda_original,
+        "prefijo + FULLTEXT": vm.buscar_vademecum,
+        "índice en memoria": indice.buscar,
+    }
+    filas = []
+    for nombre, funcion in variantes.items():
+        tiempos = []
+        for termino in terminos:
+            tiempos.extend(medir(lambda: funcion(termino), repeticiones=args.repeticiones))
+        filas.append({"consulta": nombre, **resumir(tiempos)})
+
+    print(f"{len(terminos)} términos x {args.repeticiones} repeticiones")
+    imprimir_tabla(filas, ["consulta", "media_ms", "min_ms", "max_ms", "ops_s"])
+
+
+if __name__ == "__main__":
+    main()
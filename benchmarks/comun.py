@@ -0,0 +1,68 @@
+# benchmarks/comun.py
+"""
+Utilidades compartidas por los benchmarks. Se ejecutan desde la raíz del
+proyecto como módulos, por ejemplo:  python -m benchmarks.bench_documentos
+"""
+import statistics
+import time
+
+
+def medir(funcion, repeticiones=10, calentamiento=1):
+    """
+    Ejecuta 'funcion' (sin argumentos) 'calentamiento' veces sin medir y luego
+    'repeticiones' veces midiendo. Retorna la lista de latencias en segundos.
+    """
+    for _ in range(calentamiento):
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def percentil(valores, p) -> float:
+    """
+    Percentil 'p' (0-100) de 'valores', interpolando entre los dos más cercanos.
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    i = int(posicion)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (posicion - i)
+
+
+def resumir(tiempos) -> dict:
+    """
+    Resume una lista de latencias (segundos) en milisegundos y operaciones/s.
+    """
+    total = sum(tiempos)
+    return {
+        "n": len(tiempos),
+        "media_ms": statistics.fmean(tiempos) * 1000 if tiempos else 0.0,
+        "min_ms": min(tiempos) * 1000 if tiempos else 0.0,
+        "max_ms": max(tiempos) * 1000 if tiempos else 0.0,
+        "p50_ms": percentil(tiempos, 50) * 1000,
+        "p95_ms": percentil(tiempos, 95) * 1000,
+        "p99_ms": percentil(tiempos, 99) * 1000,
+        "ops_s": len(tiempos) / total if total else 0.0,
+    }
+
+
+def imprimir_tabla(filas, columnas):
+    """
+    Imprime una lista de dicts como tabla de texto alineada.
+    """
+    anchos = {c: max(len(c), *(len(_fmt(f.get(c))) for f in filas)) for c in columnas}
+    print("  ".join(c.ljust(anchos[c]) for c in columnas))
+    for f in filas:
+        print("  ".join(_fmt(f.get(c)).ljust(anchos[c]) for c in columnas))
+
+
+def _fmt(valor):
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return "" if valor is None else str(valor)
@@ -3,4 +3,75 @@
 # Variable global para definir qué estrategia usar en ventas:
 # False (por defecto): descuento automático del lote con fecha mínima de vencimiento.
 # True: se permite al usuario elegir manualmente el lote.
-manual_lote_selection = False
\ No newline at end of file
+manual_lote_selection = False
+
+# Asignación de lotes segura ante ventas concurrentes (varias terminales):
+# True (por defecto): los productos y lotes del carrito se bloquean con
+# SELECT ... FOR UPDATE y los descuentos son relativos y condicionados.
+# False: lectura sin bloqueo (solo recomendable con una única terminal).
+venta_bloqueo_filas = True
+
+# Cantidad máxima de reintentos de una venta ante un deadlock (1213) o un
+# timeout de espera de bloqueo (1205) antes de informar el error.
+venta_reintentos_deadlock = 3
+
+# Hilos dedicados a generar facturas en segundo plano (logica/cola_documentos.py).
+# Con docx2pdf conviene 1: Microsoft Word no admite conversiones en paralelo.
+hilos_render_documentos = 1
+
+# Backend con el que se generan los PDF de facturas y remitos
+# (logica/backends_documentos.py):
+#   "docx2pdf"    → plantilla .docx convertida con Microsoft Word (Windows/macOS).
+#   "libreoffice" → plantilla .docx convertida por un LibreOffice headless
+#                   de larga vida (unoserver); funciona en Linux.
+#   "reportlab"   → PDF generado directamente en Python, sin procesos externos.
+backend_documentos = "docx2pdf"
+libreoffice_host = "127.0.0.1"
+libreoffice_puerto = 2003
+
+# Búsqueda del vademécum en un índice en memoria (logica/indice_vademecum.py),
+# construido al iniciar o cargado de datos/cache/. False: se consulta MySQL.
+vademecum_indice_memoria = True
+
+# Errores de tipeo tolerados por palabra en la búsqueda del vademécum
+# (las palabras de hasta 5 letras toleran siempre 1).
+vademecum_distancia_maxima = 2
+
+# Importación del vademécum (datos/migrar_vademecum.py): filas por INSERT
+# de varias filas, o LOAD DATA LOCAL INFILE (requiere local_infile=1 en el servidor).
+vademecum_tamanio_lote = 1000
+vademecum_load_data = False
+
+# Objetivo de tiempo hasta mostrar la ventana de login (ms). principal.py
+# informa la duración de cada fase del arranque y avisa si se supera.
+arranque_objetivo_ms = 1500
+
+# Búsqueda al escribir (gui/busqueda_incremental.py): milisegundos sin teclear
+# antes de consultar, y máximo de resultados que muestra cada búsqueda.
+busqueda_espera_ms = 250
+busqueda_limite = 500
+
+# Conexión a MySQL (datos/conexion_bd.py). Cada valor puede sobrescribirse
+# con variables de entorno: FARMANACCIO_DB_HOST, _USER, _PASSWORD, _PORT, _NAME.
+db_host = "localhost"
+db_usuario = "root"
+db_password = ""
+db_puerto = 3306
+db_nombre = "farmanaccio_db"
+
+# Pool de conexiones: tamaño (máx. 32; FARMANACCIO_DB_POOL) y segundos que un
+# pedido espera una conexión libre antes de fallar (FARMANACCIO_DB_POOL_ESPERA).
+# Contar las terminales de la sucursal más los hilos de fondo
+# (hilos_render_documentos, cargas de ventanas).
+db_pool_tamanio = 5
+db_pool_espera_s = 10
+
+# Instrumentación de consultas (datos/instrumentacion.py). Activada, registra
+# latencia y filas de cada sentencia por método y por pantalla, escribe las
+# que superan el umbral en un log rotativo e imprime un resumen al salir.
+# Desactivada no tiene costo. También: FARMANACCIO_DB_INSTRUMENTAR=1.
+db_instrumentacion = False
+db_consulta_lenta_ms = 200
+db_log_consultas_lentas = "logs/consultas_lentas.log"
+db_log_tamanio_kb = 1024
+db_log_respaldos = 3
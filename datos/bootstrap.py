@@ -0,0 +1,99 @@
+# src/datos/bootstrap.py
+import time
+
+from datos.conexion_bd import ConexionBD
+from datos.migraciones import MIGRACIONES
+from mysql.connector import Error
+
+# Versión vigente de cada paso de inicialización. Al cambiar lo que hace un
+# paso (tablas nuevas, datos iniciales, etc.) se incrementa su número y el
+# siguiente arranque lo vuelve a ejecutar.
+VERSIONES = {
+    "esquema":   1,   # TablaCreator.crear_base_de_datos_y_tablas
+    "migraciones": len(MIGRACIONES),   # datos.migraciones.aplicar_migraciones
+    "passwords": 1,   # scripts.migrate_passwords.migrar_passwords
+    "vademecum": 1,   # datos.migrar_vademecum.migrar_vademecum
+}
+
+SQL_TABLA = """
+    CREATE TABLE IF NOT EXISTS bootstrap_version (
+      componente VARCHAR(50) PRIMARY KEY,
+      version INT NOT NULL,
+      aplicada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def versiones_aplicadas() -> dict:
+    """
+    Retorna {componente: versión} de los pasos ya ejecutados, en una única
+    consulta por clave primaria. Si la base o la tabla no existen retorna {}.
+    """
+    conexion = ConexionBD.obtener_conexion()
+    if conexion is None:
+        return {}
+    try:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT componente, version FROM bootstrap_version")
+        versiones = dict(cursor.fetchall())
+        cursor.close()
+        return versiones
+    except Error:
+        return {}
+    finally:
+        conexion.close()
+
+
+def pendientes(aplicadas: dict) -> list:
+    """
+    Componentes cuya versión aplicada no coincide con la vigente, en orden.
+    """
+    return [c for c, v in VERSIONES.items() if aplicadas.get(c) != v]
+
+
+def registrar(componente):
+    """
+    Marca 'componente' como ejecutado en su versión vigente.
+    """
+    conexion = ConexionBD.obtener_conexion()
+    if conexion is None:
+        return
+    try:
+        cursor = conexion.cursor()
+        cursor.execute(SQL_TABLA)
+        cursor.execute("""
+            INSERT INTO bootstrap_version (componente, version) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE version = VALUES(version), aplicada = CURRENT_TIMESTAMP
+        """, (componente, VERSIONES[componente]))
+        conexion.commit()
+        cursor.close()
+    except Error as e:
+        print(f"No se pudo registrar la versión de '{componente}':", e)
+    finally:
+        conexion.close()
+
+
+class Cronometro:
+    """
+    Registra la duración de cada fase del arranque y las imprime al final.
+    """
+    def __init__(self, inicio=None):
+        self.inicio = inicio if inicio is not None else time.perf_counter()
+        self.fases = []        # (nombre, segundos)
+        self._ultima = self.inicio
+
+    def marcar(self, fase):
+        ahora = time.perf_counter()
+        self.fases.append((fase, ahora - self._ultima))
+        self._ultima = ahora
+
+    def total(self) -> float:
+        return self._ultima - self.inicio
+
+    def informe(self, objetivo_ms=None) -> str:
+        lineas = [f"  {fase:<28} {seg * 1000:8.1f} ms" for fase, seg in self.fases]
+        total_ms = self.total() * 1000
+        lineas.append(f"  {'total':<28} {total_ms:8.1f} ms")
+        if objetivo_ms and total_ms > objetivo_ms:
+            lineas.append(f"  ¡Atención! El arranque superó el objetivo de {objetivo_ms} ms.")
+        return "Tiempos de arranque:\n" + "\n".join(lineas)
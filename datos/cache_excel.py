@@ -0,0 +1,113 @@
+# src/datos/cache_excel.py
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+
+def hash_de_archivo(ruta) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _formato():
+    """
+    Parquet si pyarrow está instalado; si no, el DataFrame serializado con pickle.
+    """
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "pickle"
+
+
+def _rutas(ruta_excel):
+    base = os.path.join(DIRECTORIO_CACHE, os.path.basename(ruta_excel))
+    return base + ".json", base + ".snapshot"
+
+
+def _leer_snapshot(ruta, formato):
+    if formato == "parquet":
+        return pd.read_parquet(ruta)
+    return pd.read_pickle(ruta)
+
+
+def _escribir_snapshot(df, ruta, formato):
+    temporal = ruta + ".tmp"
+    if formato == "parquet":
+        df.to_parquet(temporal, index=False)
+    else:
+        df.to_pickle(temporal)
+    os.replace(temporal, ruta)
+
+
+def _guardar_meta(ruta_meta, meta):
+    with open(ruta_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def leer_excel(ruta_excel):
+    """
+    Equivalente a pd.read_excel(ruta_excel, sheet_name=0), pero la primera
+    lectura deja en datos/cache/ una copia columnar del DataFrame (Parquet o
+    pickle) que las siguientes cargan directamente, sin volver a interpretar
+    el .xlsx con openpyxl.
+
+    La copia se valida con la fecha de modificación y el tamaño del archivo;
+    si cambiaron, se compara el hash del contenido antes de descartarla
+    (un archivo copiado o "tocado" sin cambios sigue usando la caché).
+    """
+    ruta_meta, ruta_snapshot = _rutas(ruta_excel)
+    estado = os.stat(ruta_excel)
+    firma = {"mtime_ns": estado.st_mtime_ns, "tamanio": estado.st_size}
+
+    meta = None
+    try:
+        with open(ruta_meta, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    if meta and os.path.exists(ruta_snapshot):
+        try:
+            if all(meta.get(k) == v for k, v in firma.items()):
+                return _leer_snapshot(ruta_snapshot, meta["formato"])
+            archivo_hash = hash_de_archivo(ruta_excel)
+            if meta.get("hash") == archivo_hash:
+                df = _leer_snapshot(ruta_snapshot, meta["formato"])
+                _guardar_meta(ruta_meta, {**meta, **firma})
+                return df
+        except Exception as e:
+            print("Caché del Excel inválida, se vuelve a leer el archivo:", e)
+
+    df = pd.read_excel(ruta_excel, sheet_name=0)
+    try:
+        os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+        formato = _formato()
+        try:
+            _escribir_snapshot(df, ruta_snapshot, formato)
+        except Exception:
+            # p. ej. columnas con tipos mezclados que Parquet no admite
+            formato = "pickle"
+            _escribir_snapshot(df, ruta_snapshot, formato)
+        _guardar_meta(ruta_meta, {**firma, "hash": hash_de_archivo(ruta_excel), "formato": formato})
+    except Exception as e:
+        print("No se pudo guardar la caché del Excel:", e)
+    return df
+
+
+def descartar_cache(ruta_excel):
+    """
+    Elimina la copia en caché de 'ruta_excel' (la próxima lectura usa el .xlsx).
+    """
+    for ruta in _rutas(ruta_excel):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
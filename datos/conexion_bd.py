@@ -1,22 +1,44 @@
 # src/datos/conexion_bd.py
 
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import pooling, Error
 from tkinter import messagebox
+import config
+from datos import instrumentacion
 
-# Parámetros de conexión (sin suponer que la DB ya exista)
+
+def _parametro(variable, valor_config, tipo=str):
+    """
+    Valor de la variable de entorno 'variable' si está definida; si no, el de config.py.
+    """
+    valor = os.environ.get(variable)
+    return valor_config if valor is None else tipo(valor)
+
+
+# Parámetros de conexión (sin suponer que la DB ya exista).
+# Cada uno puede sobrescribirse con variables de entorno FARMANACCIO_DB_*.
 config_db = {
-    "host":     "localhost",
-    "user":     "root",
-    "password": "",
-    "port":     3306,
-    "database": "farmanaccio_db"
+    "host":     _parametro("FARMANACCIO_DB_HOST", config.db_host),
+    "user":     _parametro("FARMANACCIO_DB_USER", config.db_usuario),
+    "password": _parametro("FARMANACCIO_DB_PASSWORD", config.db_password),
+    "port":     _parametro("FARMANACCIO_DB_PORT", config.db_puerto, int),
+    "database": _parametro("FARMANACCIO_DB_NAME", config.db_nombre)
 }
+tamanio_pool = _parametro("FARMANACCIO_DB_POOL", config.db_pool_tamanio, int)
+espera_pool_s = _parametro("FARMANACCIO_DB_POOL_ESPERA", config.db_pool_espera_s, float)
+
+# Límites superiores (ms) de los intervalos del histograma de espera
+_INTERVALOS_ESPERA_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
 
 def _ensure_database_exists():
     """
-    Si la base 'farmanaccio_db' no existe, la crea conectando
+    Si la base configurada (config_db["database"]) no existe, la crea conectando
     sin especificar database.
     """
     tmp_conf = {k:v for k,v in config_db.items() if k != "database"}
@@ -27,55 +49,278 @@ def _ensure_database_exists():
     cur.close()
     conn.close()
 
-# Intento de crear el pool, auto-creando la base si hace falta
-try:
-    connection_pool = pooling.MySQLConnectionPool(
-        pool_name   = "farmanaccio_pool",
-        pool_size   = 5,
-        **config_db
-    )
-except Error as err:
-    # Si falla por “Unknown database”, primero la creamos
-    if "Unknown database" in str(err):
+
+def _crear_pool():
+    """
+    Crea el pool de conexiones, auto-creando la base si hace falta.
+    """
+    try:
+        return pooling.MySQLConnectionPool(
+            pool_name = "farmanaccio_pool",
+            pool_size = tamanio_pool,
+            **config_db
+        )
+    except Error as err:
+        # Si falla por “Unknown database”, primero la creamos
+        if "Unknown database" not in str(err):
+            raise
+        _ensure_database_exists()
+        return pooling.MySQLConnectionPool(
+            pool_name = "farmanaccio_pool",
+            pool_size = tamanio_pool,
+            **config_db
+        )
+
+
+class _ConexionDelPool:
+    """
+    Conexión prestada por PoolConexiones. Se usa igual que la del conector;
+    close() la devuelve al pool y libera su lugar para el siguiente en espera.
+    """
+    def __init__(self, cnx, pool):
+        self._cnx = cnx
+        self._pool = pool
+
+    def __getattr__(self, nombre):
+        return getattr(self._cnx, nombre)
+
+    def close(self):
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
         try:
-            _ensure_database_exists()
-            # reintentar pool
-            connection_pool = pooling.MySQLConnectionPool(
-                pool_name = "farmanaccio_pool",
-                pool_size = 5,
-                **config_db
-            )
-        except Exception as e2:
-            messagebox.showerror(
-                "Error al crear la base",
-                f"No se pudo crear la base de datos:\n{e2}"
+            self._cnx.close()
+        finally:
+            pool._liberar()
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones con adquisición bloqueante y equitativa.
+
+    El pool del conector falla apenas se agotan las conexiones; aquí, si no
+    hay conexiones libres, quien pide una espera (hasta 'espera_s' segundos)
+    en una cola FIFO: cada conexión devuelta pasa directamente al primero de
+    la fila, así ningún hilo queda postergado indefinidamente.
+
+    metricas() expone las conexiones en uso, el máximo alcanzado, el total de
+    préstamos, los tiempos de espera agotados y un histograma de esperas.
+    """
+    def __init__(self, tamanio, espera_s):
+        self.tamanio = tamanio
+        self.espera_s = espera_s
+        self._pool = None
+        self._candado = threading.Lock()
+        self._libres = tamanio
+        self._fila = deque()      # threading.Event de quienes esperan, en orden
+        self._en_uso = 0
+        self._max_en_uso = 0
+        self._prestamos = 0
+        self._agotados = 0
+        self._histograma = [0] * (len(_INTERVALOS_ESPERA_MS) + 1)
+        self._espera_total = 0.0
+
+    @property
+    def creado(self) -> bool:
+        return self._pool is not None
+
+    def iniciar(self):
+        """
+        Crea el pool del conector si todavía no existe.
+        """
+        if self._pool is None:
+            with self._candado:
+                if self._pool is None:
+                    self._pool = _crear_pool()
+        return self._pool
+
+    def _reservar(self, espera_s) -> bool:
+        with self._candado:
+            if self._libres > 0 and not self._fila:
+                self._libres -= 1
+                return True
+            turno = threading.Event()
+            self._fila.append(turno)
+        if turno.wait(espera_s):
+            return True
+        with self._candado:
+            if turno.is_set():
+                # El lugar llegó justo al vencer la espera
+                return True
+            self._fila.remove(turno)
+            return False
+
+    def _liberar(self, prestada=True):
+        with self._candado:
+            if prestada:
+                self._en_uso -= 1
+            if self._fila:
+                self._fila.popleft().set()
+            else:
+                self._libres += 1
+
+    def obtener(self, espera_s=None):
+        """
+        Retorna una conexión, esperando si hace falta. Lanza PoolError si no
+        se libera ninguna en 'espera_s' segundos (por defecto, la configurada).
+        """
+        pool = self.iniciar()
+        inicio = time.perf_counter()
+        espera_s = self.espera_s if espera_s is None else espera_s
+        if not self._reservar(espera_s):
+            with self._candado:
+                self._agotados += 1
+            raise pooling.PoolError(
+                f"No se liberó ninguna conexión del pool en {espera_s:g} s "
+                f"({self.tamanio} conexiones en uso)."
             )
-            exit(1)
-    else:
-        messagebox.showerror(
-            "Error al crear el pool",
-            f"No se pudo crear el pool de conexiones.\n\n{err}"
-        )
-        exit(1)
+        espera = time.perf_counter() - inicio
+        try:
+            cnx = pool.get_connection()
+        except Exception:
+            self._liberar(prestada=False)
+            raise
+        with self._candado:
+            self._en_uso += 1
+            self._max_en_uso = max(self._max_en_uso, self._en_uso)
+            self._prestamos += 1
+            self._espera_total += espera
+            ms = espera * 1000
+            i = next((i for i, tope in enumerate(_INTERVALOS_ESPERA_MS) if ms <= tope),
+                     len(_INTERVALOS_ESPERA_MS))
+            self._histograma[i] += 1
+        conexion = _ConexionDelPool(cnx, self)
+        if instrumentacion.activa:
+            return instrumentacion.envolver(conexion)
+        return conexion
+
+    def metricas(self) -> dict:
+        with self._candado:
+            etiquetas = [f"<={t}ms" for t in _INTERVALOS_ESPERA_MS] + [f">{_INTERVALOS_ESPERA_MS[-1]}ms"]
+            return {
+                "tamanio": self.tamanio,
+                "en_uso": self._en_uso,
+                "max_en_uso": self._max_en_uso,
+                "esperando": len(self._fila),
+                "prestamos": self._prestamos,
+                "agotados": self._agotados,
+                "espera_media_ms": (self._espera_total / self._prestamos * 1000) if self._prestamos else 0.0,
+                "histograma_espera": dict(zip(etiquetas, self._histograma)),
+            }
+
+
+# El pool se crea en el primer pedido de conexión, no al importar el módulo
+connection_pool = PoolConexiones(tamanio_pool, espera_pool_s)
+
+
+class SesionCancelada(Exception):
+    """
+    Lanzada dentro de ConexionBD.sesion() descarta los cambios (rollback) sin
+    propagarse: la ejecución sigue después del bloque 'with'.
+    """
+
 
 class ConexionBD:
     """
     Obtiene conexiones del pool. Si algo falla, informa y retorna None.
+
+    sesion() es la forma preferida de acceder a la base desde los gestores:
+    las conexiones del pool ya apuntan a la base configurada (no hace falta
+    "USE") y la conexión vuelve al pool aunque haya errores.
     """
     @staticmethod
     def obtener_conexion():
+        if not connection_pool.creado:
+            try:
+                connection_pool.iniciar()
+            except Exception as err:
+                ConexionBD._error_al_crear_pool(err)
+                return None
         try:
-            return connection_pool.get_connection()
+            return connection_pool.obtener()
         except Error as err:
-            messagebox.showerror(
-                "Error de conexión",
-                f"No se pudo obtener una conexión del pool.\n\n{err}"
-            )
+            ConexionBD._informar_error(err)
             return None
 
+    @staticmethod
+    @contextmanager
+    def sesion(dictionary=False, commit=False):
+        """
+        Presta una conexión del pool y entrega un cursor:
+
+            with ConexionBD.sesion(commit=True) as cur:
+                cur.execute("UPDATE ...", params)
+
+        - dictionary: filas como dict.
+        - commit: confirma al salir sin errores.
+        No se ofrecen sentencias preparadas en el servidor: el pool reinicia
+        la sesión al devolver cada conexión, lo que las descarta, y dentro de
+        una sesión los gestores ejecutan cada sentencia una sola vez (el
+        checkout trabaja por conjuntos), así que preparar solo sumaría viajes.
+        Ante cualquier excepción hace rollback y la vuelve a lanzar (salvo
+        SesionCancelada, que solo descarta los cambios); el
+        cursor se cierra y la conexión vuelve al pool siempre. Si no hay
+        conexión disponible lanza mysql.connector.Error (PoolError), que los
+        gestores ya manejan.
+        """
+        if not connection_pool.creado:
+            try:
+                connection_pool.iniciar()
+            except Exception as err:
+                ConexionBD._error_al_crear_pool(err)
+                raise pooling.PoolError(f"No se pudo crear el pool de conexiones: {err}")
+        conexion = connection_pool.obtener()
+        try:
+            cursor = conexion.cursor(dictionary=dictionary)
+            try:
+                yield cursor
+                if commit:
+                    conexion.commit()
+            except SesionCancelada:
+                conexion.rollback()
+            except BaseException:
+                try:
+                    conexion.rollback()
+                except Error:
+                    pass
+                raise
+            finally:
+                cursor.close()
+        finally:
+            conexion.close()
+
+    @staticmethod
+    def metricas() -> dict:
+        return connection_pool.metricas()
+
+    @staticmethod
+    def _error_al_crear_pool(err):
+        # Sin pool la aplicación no puede funcionar: en el hilo principal se
+        # informa y se termina, como cuando el pool se creaba al importar.
+        if threading.current_thread() is not threading.main_thread():
+            print("No se pudo crear el pool de conexiones:", err)
+            return
+        messagebox.showerror(
+            "Error al crear el pool",
+            f"No se pudo crear el pool de conexiones.\n\n{err}"
+        )
+        exit(1)
+
+    @staticmethod
+    def _informar_error(err):
+        # Los hilos de fondo (render de facturas, cargas) no pueden abrir diálogos
+        if threading.current_thread() is not threading.main_thread():
+            print("No se pudo obtener una conexión del pool:", err)
+            return
+        messagebox.showerror(
+            "Error de conexión",
+            f"No se pudo obtener una conexión del pool.\n\n{err}"
+        )
+
 # Prueba rápida
 if __name__ == "__main__":
     cn = ConexionBD.obtener_conexion()
     if cn:
         print("¡Conexión exitosa!")
         cn.close()
+        print(ConexionBD.metricas())
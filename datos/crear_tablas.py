@@ -1,27 +1,31 @@
 # src/datos/crear_tablas.py
 
 import os
-import pandas as pd
+from datos.cache_excel import leer_excel
+from datos.bootstrap import SQL_TABLA as SQL_BOOTSTRAP_VERSION
 from datos.conexion_bd import ConexionBD
 from mysql.connector import Error
 
 class TablaCreator:
     """
-    Crea la base de datos 'farmanaccio_db' y sus tablas:
-      - vademecum, productos, lotes_productos, usuarios, clientes,
-        facturas, factura_detalles, Remito (con clienteDireccion) y RemitoDetalle.
+    Crea las tablas de la base configurada (config.db_nombre; el pool la crea
+    si no existe):
+      - vademecum, vademecum_versiones, productos, lotes_productos, usuarios, clientes,
+        facturas, factura_detalles, Remito (con direccionCliente), RemitoDetalle
+        y bootstrap_version.
     Además inserta datos iniciales.
+
+    Las definiciones de aquí son el esquema de una instalación nueva; los
+    cambios sobre bases ya desplegadas se agregan en datos/migraciones.py.
     """
 
     def crear_base_de_datos_y_tablas(self):
         try:
-            # 1) Conexión y creación de la base
+            # 1) Conexión (ya apunta a la base configurada)
             cnx = ConexionBD.obtener_conexion()
             if cnx is None:
                 raise Exception("No se pudo conectar a MySQL.")
             cursor = cnx.cursor()
-            cursor.execute("CREATE DATABASE IF NOT EXISTS farmanaccio_db")
-            cursor.execute("USE farmanaccio_db")
 
             # 2) Definición de tablas
             cursor.execute("""
@@ -45,7 +49,13 @@ class TablaCreator:
                   direccion VARCHAR(150),
                   iva VARCHAR(50) NOT NULL DEFAULT '',
                   activo TINYINT(1) NOT NULL DEFAULT 1,
-                  razonArchivado VARCHAR(300) NOT NULL DEFAULT ''
+                  razonArchivado VARCHAR(300) NOT NULL DEFAULT '',
+                  nombreNorm VARCHAR(100)
+                    GENERATED ALWAYS AS (LOWER(nombre)) VIRTUAL,
+                  apellidoNorm VARCHAR(100)
+                    GENERATED ALWAYS AS (LOWER(apellido)) VIRTUAL,
+                  INDEX idx_clientes_nombre_norm (nombreNorm),
+                  INDEX idx_clientes_apellido_norm (apellidoNorm)
                 )
             """)
             cursor.execute("""
@@ -55,7 +65,32 @@ class TablaCreator:
                   presentacion VARCHAR(255) NOT NULL,
                   accionFarmacologica VARCHAR(255) NOT NULL,
                   principioActivo VARCHAR(255) NOT NULL,
-                  laboratorio VARCHAR(255) NOT NULL
+                  laboratorio VARCHAR(255) NOT NULL,
+                  claveHash CHAR(40) NULL,
+                  contenidoHash CHAR(40) NULL,
+                  vigente TINYINT(1) NOT NULL DEFAULT 1,
+                  nombreComercialNorm VARCHAR(255)
+                    GENERATED ALWAYS AS (LOWER(nombreComercial)) VIRTUAL,
+                  principioActivoNorm VARCHAR(255)
+                    GENERATED ALWAYS AS (LOWER(principioActivo)) VIRTUAL,
+                  INDEX idx_vademecum_clave (claveHash),
+                  INDEX idx_vademecum_nombre_norm (nombreComercialNorm),
+                  INDEX idx_vademecum_principio_norm (principioActivoNorm),
+                  FULLTEXT INDEX ft_vademecum_nombre (nombreComercial),
+                  FULLTEXT INDEX ft_vademecum_multicampo (principioActivo, laboratorio, accionFarmacologica)
+                )
+            """)
+            # Versiones del Excel aplicadas (migración inicial y sincronizaciones)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS vademecum_versiones (
+                  versionID INT AUTO_INCREMENT PRIMARY KEY,
+                  archivo VARCHAR(255) NOT NULL,
+                  archivoHash CHAR(64) NOT NULL,
+                  aplicada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                  insertados INT NOT NULL DEFAULT 0,
+                  actualizados INT NOT NULL DEFAULT 0,
+                  retirados INT NOT NULL DEFAULT 0,
+                  INDEX idx_vademecum_versiones_hash (archivoHash)
                 )
             """)
             cursor.execute("""
@@ -65,7 +100,10 @@ class TablaCreator:
                   precio DECIMAL(10,2) NOT NULL,
                   stock INT NOT NULL,
                   activo TINYINT(1) NOT NULL DEFAULT 1,
-                  razonArchivado VARCHAR(300) NOT NULL DEFAULT ''
+                  razonArchivado VARCHAR(300) NOT NULL DEFAULT '',
+                  nombreNorm VARCHAR(100)
+                    GENERATED ALWAYS AS (LOWER(nombre)) VIRTUAL,
+                  INDEX idx_productos_nombre_norm (nombreNorm)
                 )
             """)
             cursor.execute("""
@@ -78,6 +116,7 @@ class TablaCreator:
                   cantidad_ingresada INT NOT NULL,
                   cantidad_disponible INT NOT NULL,
                   UNIQUE(prodID, numeroLote, fechaIngreso),
+                  INDEX idx_lotes_prod_venc (prodID, vencimiento, cantidad_disponible, numeroLote),
                   FOREIGN KEY (prodID) REFERENCES productos(prodID)
                 )
             """)
@@ -91,6 +130,7 @@ class TablaCreator:
                   total_bruto  DECIMAL(10,2) NOT NULL,
                   descuento    DECIMAL(5,2) DEFAULT 0.00,
                   tipoFactura  ENUM('A','B','C') NOT NULL DEFAULT 'B',
+                  INDEX idx_facturas_fecha (fechaEmision),
                   FOREIGN KEY (clienteID) REFERENCES clientes(clienteID)
                 )
             """)
@@ -104,7 +144,7 @@ class TablaCreator:
                   FOREIGN KEY (facturaID) REFERENCES facturas(facturaID)
                 )
             """)
-            # Aquí agregamos clienteDireccion
+            # Aquí agregamos direccionCliente
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS Remito (
                   remitoID INT AUTO_INCREMENT PRIMARY KEY,
@@ -128,6 +168,9 @@ class TablaCreator:
                 )
             """)
 
+            # Pasos de inicialización ya ejecutados (ver datos/bootstrap.py)
+            cursor.execute(SQL_BOOTSTRAP_VERSION)
+
             # 3) Inserción de datos iniciales
             usuarios_default = [
                 ('admin',      'admin',    'admin'),
@@ -159,7 +202,7 @@ class TablaCreator:
             total_prod = cursor.fetchone()[0]
             if total_prod == 0:
                 ruta_excel = os.path.join(os.path.dirname(__file__), "vademecum-marzo2025.xlsx")
-                df = pd.read_excel(ruta_excel, sheet_name=0)
+                df = leer_excel(ruta_excel)
                 nombres = (
                     df["nombre-comercial"]
                     .dropna().astype(str)
@@ -194,12 +237,16 @@ class TablaCreator:
             cursor.close()
             cnx.close()
             print("Base de datos, tablas y datos iniciales creados con éxito.")
+            return True
 
         except Error as sql_e:
             print("Error durante creación de tablas o inserción de datos:", sql_e)
         except Exception as e:
             print("Error general en crear_tablas:", e)
+        return False
 
 
 if __name__ == "__main__":
-    TablaCreator().crear_base_de_datos_y_tablas()
+    from datos.migraciones import aplicar_migraciones
+    if TablaCreator().crear_base_de_datos_y_tablas():
+        aplicar_migraciones()
@@ -0,0 +1,324 @@
+# src/datos/instrumentacion.py
+"""
+Instrumentación de las consultas SQL.
+
+Con config.db_instrumentacion = True (o FARMANACCIO_DB_INSTRUMENTAR=1) las
+conexiones que entrega el pool se envuelven para registrar, por cada
+sentencia: el SQL, la cantidad de parámetros, la latencia (ejecución más
+lectura de filas), las filas devueltas o afectadas, el método del gestor que
+la originó y la pantalla (método de una clase de gui/) desde la que se llamó.
+
+  - Las sentencias que superan config.db_consulta_lenta_ms se escriben en un
+    log rotativo (config.db_log_consultas_lentas).
+  - resumen() / informe() agrupan por pantalla, p. ej.
+        StockWindow.cargar_productos: 3 consultas, 412.0 ms, 1520 filas
+    y se imprimen al cerrar la aplicación.
+  - grabar() devuelve además las sentencias ejecutadas con sus parámetros
+    reales (lo usa scripts/verificar_explain.py).
+
+Desactivada, las conexiones se entregan sin envolver: no hay ningún costo.
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import config
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DIR_GUI = os.sep + "gui" + os.sep
+_DIR_LOGICA = os.sep + "logica" + os.sep
+# Marcos que no identifican a quien hizo la consulta
+_ARCHIVOS_PROPIOS = ("instrumentacion.py", "conexion_bd.py", "contextlib.py", "cargador_async.py")
+
+activa = bool(config.db_instrumentacion) or os.environ.get("FARMANACCIO_DB_INSTRUMENTAR") == "1"
+umbral_lenta_ms = float(os.environ.get("FARMANACCIO_DB_LENTA_MS", config.db_consulta_lenta_ms))
+
+_candado = threading.Lock()
+_por_pantalla = {}      # pantalla -> [consultas, segundos, filas]
+_por_metodo = {}        # método -> [consultas, segundos, filas]
+_log_lentas = None
+_hilo = threading.local()  # pantalla asignada a las consultas de un hilo de carga
+_grabacion = None       # lista de grabar() en curso, o None
+
+
+def activar(valor=True):
+    """
+    Activa o desactiva la instrumentación. Afecta a las conexiones que se
+    pidan a partir de ahora.
+    """
+    global activa
+    activa = bool(valor)
+    if activa:
+        _registrar_salida()
+
+
+def _logger():
+    global _log_lentas
+    if _log_lentas is None:
+        ruta = config.db_log_consultas_lentas
+        if not os.path.isabs(ruta):
+            ruta = os.path.join(_RAIZ, ruta)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        manejador = RotatingFileHandler(
+            ruta, maxBytes=config.db_log_tamanio_kb * 1024,
+            backupCount=config.db_log_respaldos, encoding="utf-8"
+        )
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        log = logging.getLogger("farmanaccio.consultas_lentas")
+        log.setLevel(logging.INFO)
+        log.propagate = False
+        log.addHandler(manejador)
+        _log_lentas = log
+    return _log_lentas
+
+
+def _nombre_de_marco(marco) -> str:
+    yo = marco.f_locals.get("self")
+    if yo is not None:
+        return f"{type(yo).__name__}.{marco.f_code.co_name}"
+    return f"{os.path.splitext(os.path.basename(marco.f_code.co_filename))[0]}.{marco.f_code.co_name}"
+
+
+def _origen():
+    """
+    Retorna (método, pantalla): el primer marco de la pila fuera de la capa de
+    datos y contextlib, preferentemente de logica/, y el primero de gui/.
+    """
+    metodo = pantalla = primero = None
+    marco = sys._getframe(2)
+    while marco is not None and (metodo is None or pantalla is None):
+        archivo = marco.f_code.co_filename
+        if archivo.endswith(_ARCHIVOS_PROPIOS):
+            marco = marco.f_back
+            continue
+        if primero is None:
+            primero = marco
+        if metodo is None and _DIR_LOGICA in archivo:
+            metodo = _nombre_de_marco(marco)
+        if pantalla is None and _DIR_GUI in archivo:
+            pantalla = _nombre_de_marco(marco)
+        marco = marco.f_back
+    if metodo is None:
+        metodo = _nombre_de_marco(primero) if primero is not None else "?"
+    return metodo, pantalla or getattr(_hilo, "pantalla", None) or "(sin pantalla)"
+
+
+def pantalla_llamadora() -> str:
+    """
+    Pantalla de gui/ en la pila actual. gui.cargador_async la toma al
+    encolar un pedido para atribuirle las consultas que se hagan en el hilo.
+    """
+    return _origen()[1]
+
+
+@contextmanager
+def en_pantalla(pantalla):
+    """
+    Atribuye a 'pantalla' las consultas de este hilo que no tengan una
+    pantalla en su propia pila.
+    """
+    anterior = getattr(_hilo, "pantalla", None)
+    _hilo.pantalla = pantalla
+    try:
+        yield
+    finally:
+        _hilo.pantalla = anterior
+
+
+@contextmanager
+def grabar():
+    """
+    Entrega una lista que se completa con (sql, parámetros, método) por cada
+    execute() que se haga dentro del bloque, en cualquier hilo. Activa la
+    instrumentación mientras dura (solo para las conexiones que se pidan
+    dentro del bloque).
+    """
+    global activa, _grabacion
+    anterior = activa
+    sentencias = []
+    activa, _grabacion = True, sentencias
+    try:
+        yield sentencias
+    finally:
+        activa, _grabacion = anterior, None
+
+
+class _Consulta:
+    __slots__ = ("sql", "parametros", "metodo", "pantalla", "segundos", "afectadas", "leidas")
+
+    def __init__(self, sql, parametros, metodo, pantalla):
+        self.sql = sql
+        self.parametros = parametros
+        self.metodo = metodo
+        self.pantalla = pantalla
+        self.segundos = 0.0
+        self.afectadas = 0
+        self.leidas = 0
+
+    @property
+    def filas(self) -> int:
+        # Filas leídas con fetch; si no se leyó nada, las afectadas (DML)
+        return self.leidas or self.afectadas
+
+
+def _registrar(consulta):
+    with _candado:
+        for clave, tabla in ((consulta.pantalla, _por_pantalla), (consulta.metodo, _por_metodo)):
+            acumulado = tabla.setdefault(clave, [0, 0.0, 0])
+            acumulado[0] += 1
+            acumulado[1] += consulta.segundos
+            acumulado[2] += consulta.filas
+    ms = consulta.segundos * 1000
+    if ms >= umbral_lenta_ms:
+        _logger().info(
+            "%.1f ms | %s | %s | filas=%d | parametros=%d | %s",
+            ms, consulta.metodo, consulta.pantalla, consulta.filas,
+            consulta.parametros, " ".join(str(consulta.sql).split())
+        )
+
+
+def _cantidad_parametros(params) -> int:
+    if params is None:
+        return 0
+    try:
+        return len(params)
+    except TypeError:
+        return 1
+
+
+class CursorInstrumentado:
+    """
+    Envuelve un cursor del conector. La consulta en curso se cierra (y se
+    registra) al ejecutar la siguiente o al cerrar el cursor, para sumar el
+    tiempo y las filas de los fetch.
+    """
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._actual = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        for fila in self._cursor:
+            if self._actual is not None:
+                self._actual.leidas += 1
+            yield fila
+
+    def _terminar(self):
+        if self._actual is not None:
+            consulta, self._actual = self._actual, None
+            _registrar(consulta)
+
+    def _medir(self, metodo, sql, params, parametros):
+        self._terminar()
+        origen, pantalla = _origen()
+        consulta = _Consulta(sql, parametros, origen, pantalla)
+        if _grabacion is not None and metodo == self._cursor.execute:
+            _grabacion.append((sql, params, origen))
+        inicio = time.perf_counter()
+        try:
+            return metodo(sql, params) if params is not None else metodo(sql)
+        finally:
+            consulta.segundos = time.perf_counter() - inicio
+            # En SELECT sin buffer rowcount es -1 hasta leer las filas
+            consulta.afectadas = max(self._cursor.rowcount or 0, 0)
+            self._actual = consulta
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        if args or kwargs:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        return self._medir(self._cursor.execute, sql, params, _cantidad_parametros(params))
+
+    def executemany(self, sql, filas):
+        filas = list(filas)
+        return self._medir(self._cursor.executemany, sql, filas,
+                           sum(_cantidad_parametros(f) for f in filas))
+
+    def _fetch(self, metodo, *args):
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        if self._actual is not None:
+            self._actual.segundos += time.perf_counter() - inicio
+            if isinstance(resultado, list):
+                self._actual.leidas += len(resultado)
+            elif resultado is not None:
+                self._actual.leidas += 1
+        return resultado
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=1):
+        return self._fetch(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def close(self):
+        self._terminar()
+        return self._cursor.close()
+
+
+class ConexionInstrumentada:
+    """
+    Conexión del pool cuyos cursores se instrumentan.
+    """
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self, *args, **kwargs):
+        return CursorInstrumentado(self._conexion.cursor(*args, **kwargs))
+
+    def close(self):
+        return self._conexion.close()
+
+
+def envolver(conexion):
+    return ConexionInstrumentada(conexion)
+
+
+def resumen(por="pantalla") -> dict:
+    """
+    {pantalla: {"consultas", "ms", "filas"}} (o por "metodo"), de mayor a
+    menor tiempo acumulado.
+    """
+    tabla = _por_pantalla if por == "pantalla" else _por_metodo
+    with _candado:
+        filas = sorted(tabla.items(), key=lambda kv: kv[1][1], reverse=True)
+    return {clave: {"consultas": n, "ms": seg * 1000, "filas": f} for clave, (n, seg, f) in filas}
+
+
+def informe(por="pantalla") -> str:
+    lineas = [f"  {clave}: {d['consultas']} consultas, {d['ms']:.1f} ms, {d['filas']} filas"
+              for clave, d in resumen(por).items()]
+    titulo = "Consultas por pantalla:" if por == "pantalla" else "Consultas por método:"
+    return titulo + ("\n" + "\n".join(lineas) if lineas else " (ninguna)")
+
+
+def reiniciar():
+    with _candado:
+        _por_pantalla.clear()
+        _por_metodo.clear()
+
+
+_salida_registrada = False
+
+
+def _registrar_salida():
+    global _salida_registrada
+    if not _salida_registrada:
+        _salida_registrada = True
+        atexit.register(lambda: print(informe("pantalla") + "\n" + informe("metodo")))
+
+
+if activa:
+    _registrar_salida()
@@ -0,0 +1,289 @@
+# src/datos/migraciones.py
+"""
+Migraciones versionadas del esquema.
+
+TablaCreator crea las tablas con CREATE TABLE IF NOT EXISTS, que nunca
+modifica una tabla existente. Todo cambio posterior (columnas, índices,
+particiones) se agrega aquí como una Migracion nueva al final de MIGRACIONES:
+  - se aplican en orden y una sola vez; cada una queda registrada en
+    schema_migrations con el checksum de sus sentencias;
+  - si una migración ya aplicada cambió (checksum distinto) no se continúa;
+  - los índices se crean en línea (ALGORITHM=INPLACE, LOCK=NONE) para no
+    bloquear escrituras en producción;
+  - las migraciones solo de datos (transaccional=True) corren en una única
+    transacción junto con su registro. El DDL de MySQL confirma
+    implícitamente, por eso cada paso DDL se protege con una condición de
+    existencia: reejecutar una migración interrumpida es seguro.
+
+Uso:
+    python -m datos.migraciones            aplica las pendientes
+    python -m datos.migraciones --estado   muestra aplicadas y pendientes
+"""
+import argparse
+import hashlib
+import time
+
+from datos.conexion_bd import ConexionBD
+from mysql.connector import Error
+
+# Operación no admitida en línea por el servidor (se reintenta sin ALGORITHM/LOCK)
+_ERRORES_DDL_EN_LINEA = (1845, 1846)
+
+
+class MigracionError(Exception):
+    pass
+
+
+def columna_existe(cursor, tabla, columna) -> bool:
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (tabla, columna))
+    return cursor.fetchone()[0] > 0
+
+
+def indice_existe(cursor, tabla, indice) -> bool:
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (tabla, indice))
+    return cursor.fetchone()[0] > 0
+
+
+class Paso:
+    """
+    Una sentencia de una migración. 'condicion(cursor)' (opcional) decide si
+    hace falta ejecutarla; 'en_linea' es la cláusula ALGORITHM/LOCK que se
+    agrega al final y se descarta si el servidor no la admite.
+    """
+    def __init__(self, sql, condicion=None, en_linea=""):
+        self.sql = " ".join(sql.split())
+        self.condicion = condicion
+        self.en_linea = en_linea
+
+    def texto(self) -> str:
+        return f"{self.sql}, {self.en_linea}" if self.en_linea else self.sql
+
+    def ejecutar(self, cursor):
+        if self.condicion is not None and not self.condicion(cursor):
+            return
+        if not self.en_linea:
+            cursor.execute(self.sql)
+            return
+        try:
+            cursor.execute(self.texto())
+        except Error as e:
+            if e.errno not in _ERRORES_DDL_EN_LINEA:
+                raise
+            print(f"  Aviso: el servidor no admite '{self.en_linea}' aquí ({e.msg}); se aplica sin ella.")
+            cursor.execute(self.sql)
+
+
+def agregar_columna(tabla, columna, definicion) -> Paso:
+    return Paso(
+        f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}",
+        condicion=lambda cur: not columna_existe(cur, tabla, columna)
+    )
+
+
+def agregar_columna_generada(tabla, columna, tipo, expresion) -> Paso:
+    """
+    Columna calculada VIRTUAL: se agrega en línea (solo cambia el
+    diccionario de datos) y admite índices secundarios, que guardan el valor
+    calculado. Una STORED obligaría a copiar la tabla bloqueando escrituras.
+    """
+    return Paso(
+        f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo} GENERATED ALWAYS AS ({expresion}) VIRTUAL",
+        condicion=lambda cur: not columna_existe(cur, tabla, columna),
+        en_linea="ALGORITHM=INPLACE, LOCK=NONE"
+    )
+
+
+def agregar_indice(tabla, indice, definicion, lock="NONE") -> Paso:
+    """
+    'definicion' es lo que sigue a ADD, p. ej. "INDEX idx_x (col)".
+    Los índices FULLTEXT no admiten LOCK=NONE: se crean con LOCK=SHARED
+    (permiten lecturas, no escrituras, mientras se construyen).
+    """
+    return Paso(
+        f"ALTER TABLE {tabla} ADD {definicion}",
+        condicion=lambda cur: not indice_existe(cur, tabla, indice),
+        en_linea=f"ALGORITHM=INPLACE, LOCK={lock}"
+    )
+
+
+class Migracion:
+    def __init__(self, version, descripcion, pasos, transaccional=False):
+        self.version = version
+        self.descripcion = descripcion
+        self.pasos = pasos
+        self.transaccional = transaccional
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256("\n".join(p.texto() for p in self.pasos).encode("utf-8")).hexdigest()
+
+
+# Agregar migraciones nuevas SIEMPRE al final; no modificar las ya publicadas.
+MIGRACIONES = [
+    Migracion("0001", "Búsqueda indexada del vademécum", [
+        agregar_columna_generada("vademecum", "nombreComercialNorm", "VARCHAR(255)", "LOWER(nombreComercial)"),
+        agregar_columna_generada("vademecum", "principioActivoNorm", "VARCHAR(255)", "LOWER(principioActivo)"),
+        agregar_indice("vademecum", "idx_vademecum_nombre_norm",
+                       "INDEX idx_vademecum_nombre_norm (nombreComercialNorm)"),
+        agregar_indice("vademecum", "idx_vademecum_principio_norm",
+                       "INDEX idx_vademecum_principio_norm (principioActivoNorm)"),
+        agregar_indice("vademecum", "ft_vademecum_nombre",
+                       "FULLTEXT INDEX ft_vademecum_nombre (nombreComercial)", lock="SHARED"),
+        agregar_indice("vademecum", "ft_vademecum_multicampo",
+                       "FULLTEXT INDEX ft_vademecum_multicampo "
+                       "(principioActivo, laboratorio, accionFarmacologica)", lock="SHARED"),
+    ]),
+    Migracion("0002", "Sincronización incremental del vademécum", [
+        agregar_columna("vademecum", "claveHash", "CHAR(40) NULL"),
+        agregar_columna("vademecum", "contenidoHash", "CHAR(40) NULL"),
+        agregar_columna("vademecum", "vigente", "TINYINT(1) NOT NULL DEFAULT 1"),
+        agregar_indice("vademecum", "idx_vademecum_clave", "INDEX idx_vademecum_clave (claveHash)"),
+    ]),
+    Migracion("0003", "Dirección del cliente en Remito", [
+        agregar_columna("Remito", "direccionCliente", "VARCHAR(150) NULL"),
+    ]),
+    Migracion("0004", "Índices de lotes, productos y facturas", [
+        # Asignación de lotes en la venta y detalle de lotes: filtra por prodID
+        # y ordena por vencimiento; cubre también el agregado del inventario.
+        agregar_indice("lotes_productos", "idx_lotes_prod_venc",
+                       "INDEX idx_lotes_prod_venc (prodID, vencimiento, cantidad_disponible, numeroLote)"),
+        # Búsqueda de productos por nombre sin distinguir mayúsculas
+        agregar_columna_generada("productos", "nombreNorm", "VARCHAR(100)", "LOWER(nombre)"),
+        agregar_indice("productos", "idx_productos_nombre_norm",
+                       "INDEX idx_productos_nombre_norm (nombreNorm)"),
+        # Reimpresión y consultas por rango de fechas
+        agregar_indice("facturas", "idx_facturas_fecha", "INDEX idx_facturas_fecha (fechaEmision)"),
+    ]),
+    Migracion("0005", "Búsqueda de clientes por prefijo", [
+        # El CUIL/CUIT ya tiene índice (UNIQUE) y no distingue mayúsculas
+        agregar_columna_generada("clientes", "nombreNorm", "VARCHAR(100)", "LOWER(nombre)"),
+        agregar_columna_generada("clientes", "apellidoNorm", "VARCHAR(100)", "LOWER(apellido)"),
+        agregar_indice("clientes", "idx_clientes_nombre_norm",
+                       "INDEX idx_clientes_nombre_norm (nombreNorm)"),
+        agregar_indice("clientes", "idx_clientes_apellido_norm",
+                       "INDEX idx_clientes_apellido_norm (apellidoNorm)"),
+    ]),
+    Migracion("0006", "Búsqueda por palabras en productos y clientes", [
+        # Complementan los índices por prefijo: "400" encuentra "Ibuprofeno 400"
+        # (ver logica/busqueda_texto.py)
+        agregar_indice("productos", "ft_productos_nombre",
+                       "FULLTEXT INDEX ft_productos_nombre (nombre)", lock="SHARED"),
+        agregar_indice("clientes", "ft_clientes_nombre",
+                       "FULLTEXT INDEX ft_clientes_nombre (nombre, apellido)", lock="SHARED"),
+    ]),
+]
+
+
+SQL_TABLA = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version VARCHAR(20) PRIMARY KEY,
+      descripcion VARCHAR(255) NOT NULL,
+      checksum CHAR(64) NOT NULL,
+      aplicada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      duracion_ms INT NOT NULL DEFAULT 0
+    )
+"""
+
+
+def _aplicadas(cursor) -> dict:
+    cursor.execute(SQL_TABLA)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def _aplicar(cursor, conexion, migracion):
+    inicio = time.perf_counter()
+    if migracion.transaccional:
+        conexion.start_transaction()
+    try:
+        for paso in migracion.pasos:
+            paso.ejecutar(cursor)
+        cursor.execute("""
+            INSERT INTO schema_migrations (version, descripcion, checksum, duracion_ms)
+            VALUES (%s, %s, %s, %s)
+        """, (migracion.version, migracion.descripcion, migracion.checksum,
+              int((time.perf_counter() - inicio) * 1000)))
+        conexion.commit()
+    except Error:
+        conexion.rollback()
+        raise
+    return time.perf_counter() - inicio
+
+
+def aplicar_migraciones(migraciones=None) -> bool:
+    """
+    Aplica en orden las migraciones pendientes. Retorna True si el esquema
+    quedó al día; False si alguna falló o si una migración ya aplicada fue
+    modificada (en ese caso no se aplica nada más).
+    """
+    migraciones = MIGRACIONES if migraciones is None else migraciones
+    conexion = ConexionBD.obtener_conexion()
+    if conexion is None:
+        print("No se pudo conectar a la base de datos.")
+        return False
+    cursor = conexion.cursor()
+    try:
+        aplicadas = _aplicadas(cursor)
+        conexion.commit()
+        for m in migraciones:
+            if m.version in aplicadas:
+                if aplicadas[m.version] != m.checksum:
+                    raise MigracionError(
+                        f"La migración {m.version} ({m.descripcion}) cambió después de "
+                        "aplicarse. Agregue una migración nueva en lugar de editarla."
+                    )
+                continue
+            duracion = _aplicar(cursor, conexion, m)
+            print(f"Migración {m.version} aplicada: {m.descripcion} ({duracion * 1000:.0f} ms)")
+        return True
+    except (Error, MigracionError) as e:
+        print("Error al aplicar migraciones:", e)
+        return False
+    finally:
+        cursor.close()
+        conexion.close()
+
+
+def estado(migraciones=None) -> list:
+    """
+    Retorna [(version, descripcion, estado)] con estado 'aplicada',
+    'pendiente' o 'modificada'.
+    """
+    migraciones = MIGRACIONES if migraciones is None else migraciones
+    conexion = ConexionBD.obtener_conexion()
+    if conexion is None:
+        return []
+    cursor = conexion.cursor()
+    try:
+        aplicadas = _aplicadas(cursor)
+        conexion.commit()
+    finally:
+        cursor.close()
+        conexion.close()
+    resultado = []
+    for m in migraciones:
+        if m.version not in aplicadas:
+            situacion = "pendiente"
+        elif aplicadas[m.version] != m.checksum:
+            situacion = "modificada"
+        else:
+            situacion = "aplicada"
+        resultado.append((m.version, m.descripcion, situacion))
+    return resultado
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--estado", action="store_true", help="solo mostrar el estado de las migraciones")
+    args = ap.parse_args()
+    if args.estado:
+        for version, descripcion, situacion in estado():
+            print(f"{version}  {situacion:<10}  {descripcion}")
+    else:
+        raise SystemExit(0 if aplicar_migraciones() else 1)
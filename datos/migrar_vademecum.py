@@ -1,94 +1,203 @@
 # src/datos/migrar_vademecum.py
 
+import csv
+import hashlib
 import os
-import pandas as pd
-from datos.conexion_bd import ConexionBD
+import tempfile
+import time
+import mysql.connector
+import config
+from datos.cache_excel import leer_excel, hash_de_archivo
+from datos.conexion_bd import ConexionBD, config_db
 from mysql.connector import Error
+from logica.indice_vademecum import invalidar_indice
 
-def migrar_vademecum(ruta_excel):
+# Columnas del Excel -> columnas de la tabla vademecum
+COLUMNAS_EXCEL = {
+    "nombre-comercial":     "nombreComercial",
+    "presentacion":         "presentacion",
+    "accion-farmacologica": "accionFarmacologica",
+    "principio-activo":     "principioActivo",
+    "laboratorio":          "laboratorio",
+}
+
+SQL_INSERT = """
+    INSERT INTO vademecum (nombreComercial, presentacion, accionFarmacologica, principioActivo, laboratorio,
+                           claveHash, contenidoHash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _hash(*partes) -> str:
+    return hashlib.sha1("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def clave_de_fila(fila) -> str:
+    """
+    Identidad de un registro entre versiones del Excel:
+    nombre comercial + presentación + laboratorio, normalizados.
+    """
+    nombre, presentacion, _, _, laboratorio = fila[:5]
+    return _hash(nombre.strip().lower(), presentacion.strip().lower(), laboratorio.strip().lower())
+
+
+def contenido_de_fila(fila) -> str:
+    """
+    Hash de los cinco campos tal cual: cambia si cambia cualquier dato.
+    """
+    return _hash(*fila[:5])
+
+
+def filas_desde_dataframe(df):
+    """
+    Convierte el DataFrame del Excel en una lista de tuplas listas para insertar:
+    los cinco campos más claveHash y contenidoHash.
+    Las columnas faltantes y los valores nulos quedan como cadena vacía;
+    la conversión es vectorizada (sin recorrer el DataFrame fila por fila).
+    """
+    datos = df.reindex(columns=list(COLUMNAS_EXCEL)).fillna("").astype(str)
+    return [
+        fila + (clave_de_fila(fila), contenido_de_fila(fila))
+        for fila in datos.itertuples(index=False, name=None)
+    ]
+
+
+def registrar_version(cursor, ruta_excel, archivo_hash, insertados=0, actualizados=0, retirados=0):
+    cursor.execute("""
+        INSERT INTO vademecum_versiones (archivo, archivoHash, insertados, actualizados, retirados)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (os.path.basename(ruta_excel), archivo_hash, insertados, actualizados, retirados))
+
+
+def _informar_progreso(hechas, total, inicio):
+    transcurrido = time.perf_counter() - inicio
+    velocidad = hechas / transcurrido if transcurrido > 0 else 0
+    print(f"  vademecum: {hechas}/{total} filas ({velocidad:.0f} filas/s)")
+
+
+def _insertar_por_lotes(cursor, filas, tamanio_lote):
+    """
+    Inserta 'filas' con executemany en lotes de 'tamanio_lote' (el conector
+    convierte cada lote en un único INSERT de varias filas).
+    """
+    inicio = time.perf_counter()
+    for desde in range(0, len(filas), tamanio_lote):
+        lote = filas[desde:desde + tamanio_lote]
+        cursor.executemany(SQL_INSERT, lote)
+        _informar_progreso(desde + len(lote), len(filas), inicio)
+
+
+def _insertar_load_data(cursor, filas):
+    """
+    Carga 'filas' con LOAD DATA LOCAL INFILE desde un CSV temporal, dentro de
+    la transacción de 'cursor'. Requiere local_infile habilitado en el
+    servidor y una conexión abierta con allow_local_infile (ver _conectar).
+    """
+    fd, ruta_csv = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f, lineterminator="\n").writerows(filas)
+        cursor.execute("""
+            LOAD DATA LOCAL INFILE %s
+            INTO TABLE vademecum
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+            LINES TERMINATED BY '\\n'
+            (nombreComercial, presentacion, accionFarmacologica, principioActivo, laboratorio,
+             claveHash, contenidoHash)
+        """, (ruta_csv,))
+    finally:
+        os.remove(ruta_csv)
+
+
+def _conectar(usar_load_data):
+    """
+    Las conexiones del pool no admiten LOAD DATA LOCAL: para esa vía toda la
+    migración usa una conexión propia abierta con allow_local_infile.
+    """
+    if not usar_load_data:
+        return ConexionBD.obtener_conexion()
+    try:
+        return mysql.connector.connect(**config_db, allow_local_infile=True)
+    except Error as e:
+        print("No se pudo abrir la conexión para LOAD DATA LOCAL INFILE:", e)
+        return None
+
+
+def migrar_vademecum(ruta_excel, usar_load_data=None) -> bool:
     """
     Verifica si la migración del vademecum se ha realizado (mediante un COUNT en la tabla).
     Si la tabla 'vademecum' está vacía, se lee el archivo Excel y se migran los registros.
-    
+
     Se espera que el Excel tenga las siguientes columnas:
       - "nombre-comercial"
       - "presentacion"
       - "accion-farmacologica"
-      - "principios-activos"
+      - "principio-activo"
       - "laboratorio"
+
+    Los registros y el alta en vademecum_versiones se confirman en una única
+    transacción, tanto en lotes de config.vademecum_tamanio_lote filas como
+    con LOAD DATA LOCAL INFILE si 'usar_load_data' (por defecto
+    config.vademecum_load_data) es True.
+
+    Solo carga la tabla vacía; las versiones mensuales siguientes se aplican
+    con datos/sincronizar_vademecum.py.
+    Retorna True si al terminar la tabla tiene datos (migrados ahora o antes)
+    y False si no se pudo migrar (no queda nada a medias).
     """
+    if usar_load_data is None:
+        usar_load_data = config.vademecum_load_data
+    conexion = _conectar(usar_load_data)
+    if conexion is None:
+        print("No se pudo conectar a la base de datos.")
+        return False
+    cursor = conexion.cursor()
     try:
-        conexion = ConexionBD.obtener_conexion()
-        if conexion is None:
-            print("No se pudo conectar a la base de datos.")
-            return
-        cursor = conexion.cursor()
-        cursor.execute("USE farmanaccio_db")
-        
         # Verificar si ya existen registros en la tabla vademecum
-        cursor.execute("SELECT COUNT(*) FROM vademecum")
-        count_result = cursor.fetchone()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM vademecum")
+            count_result = cursor.fetchone()
+        except Error as e:
+            print("Error al verificar la migración en la base de datos:", e)
+            return False
         if count_result and count_result[0] > 0:
             print("Migración del vademecum ya se realizó. Se omite la migración.")
-            cursor.close()
-            conexion.close()
-            return
+            return True
 
-    except Error as e:
-        print("Error al verificar la migración en la base de datos:", e)
-        return
-
-    # Si la tabla está vacía, procedemos a migrar
-    try:
-        df = pd.read_excel(ruta_excel, sheet_name=0)
-    except Exception as e:
-        print("Error al leer el Excel:", e)
-        return
+        # Si la tabla está vacía, procedemos a migrar
+        try:
+            df = leer_excel(ruta_excel)
+        except Exception as e:
+            print("Error al leer el Excel:", e)
+            return False
 
-    try:
-        # Reabrir la conexión si fue cerrada anteriormente
-        conexion = ConexionBD.obtener_conexion()
-        if conexion is None:
-            print("No se pudo conectar a la base de datos.")
-            return
-        cursor = conexion.cursor()
-        cursor.execute("USE farmanaccio_db")
-    except Error as e:
-        print("Error al conectar a la base de datos para migración:", e)
-        return
-
-    for index, row in df.iterrows():
-        nombreComercial = row.get("nombre-comercial")
-        presentacion = row.get("presentacion")
-        accionFarmacologica = row.get("accion-farmacologica")
-        principioActivo = row.get("principio-activo")
-        laboratorio = row.get("laboratorio")
-        
-        # Convertir valores nulos a cadena vacía
-        nombreComercial = "" if pd.isna(nombreComercial) else str(nombreComercial)
-        presentacion = "" if pd.isna(presentacion) else str(presentacion)
-        accionFarmacologica = "" if pd.isna(accionFarmacologica) else str(accionFarmacologica)
-        principioActivo = "" if pd.isna(principioActivo) else str(principioActivo)
-        laboratorio = "" if pd.isna(laboratorio) else str(laboratorio)
-        
-        sql_insert = """
-            INSERT INTO vademecum (nombreComercial, presentacion, accionFarmacologica, principioActivo, laboratorio)
-            VALUES (%s, %s, %s, %s, %s)
-        """
+        filas = filas_desde_dataframe(df)
+        archivo_hash = hash_de_archivo(ruta_excel)
+        inicio = time.perf_counter()
         try:
-            cursor.execute(sql_insert, (nombreComercial, presentacion, accionFarmacologica, principioActivo, laboratorio))
+            # Sin autocommit: la carga y su versión forman una única transacción
+            if usar_load_data:
+                _insertar_load_data(cursor, filas)
+            else:
+                _insertar_por_lotes(cursor, filas, config.vademecum_tamanio_lote)
+            registrar_version(cursor, ruta_excel, archivo_hash, insertados=len(filas))
+            conexion.commit()
         except Error as e:
-            print(f"Error al insertar el registro de la fila {index}: {e}")
-
-    try:
-        conexion.commit()
-        print("Migración del vademecum completada exitosamente.")
-    except Error as e:
-        print("Error al hacer commit durante la migración:", e)
+            conexion.rollback()
+            via = "LOAD DATA LOCAL INFILE" if usar_load_data else "inserción por lotes"
+            print(f"Error durante la migración del vademecum ({via}; no se insertó ningún registro):", e)
+            return False
     finally:
         cursor.close()
         conexion.close()
 
+    transcurrido = time.perf_counter() - inicio
+    invalidar_indice()
+    print(f"Migración del vademecum completada exitosamente: {len(filas)} registros "
+          f"en {transcurrido:.2f} s ({len(filas) / max(transcurrido, 1e-9):.0f} filas/s).")
+    return True
+
 if __name__ == "__main__":
     current_dir = os.path.dirname(os.path.abspath(__file__))
     ruta_excel = os.path.join(current_dir, "vademecum-marzo2025.xlsx")
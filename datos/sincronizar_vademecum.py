@@ -0,0 +1,234 @@
+# src/datos/sincronizar_vademecum.py
+"""
+Sincronización incremental del vademécum con un Excel mensual nuevo.
+
+Cada registro se identifica por claveHash (nombre comercial + presentación +
+laboratorio) y se compara por contenidoHash. Solo se escriben las diferencias:
+  - claves nuevas            -> INSERT (multi-fila, por lotes)
+  - contenido distinto, o
+    registro retirado        -> UPDATE (vía tabla temporal + UPDATE ... JOIN)
+  - claves que ya no están   -> vigente = 0 (no se borran: los productos
+                                pueden seguir referenciando el nombre)
+Todo se aplica en una transacción y la versión queda registrada en
+vademecum_versiones; un mismo archivo no se aplica dos veces.
+
+Uso:
+    python -m datos.sincronizar_vademecum datos/vademecum-abril2025.xlsx [--forzar]
+"""
+import argparse
+import time
+
+import config
+from datos.cache_excel import leer_excel, hash_de_archivo
+from datos.conexion_bd import ConexionBD
+from datos.migrar_vademecum import (
+    SQL_INSERT, clave_de_fila, contenido_de_fila, filas_desde_dataframe, registrar_version
+)
+from mysql.connector import Error
+from logica.indice_vademecum import invalidar_indice
+
+
+def _por_lotes(filas, tamanio):
+    for desde in range(0, len(filas), tamanio):
+        yield filas[desde:desde + tamanio]
+
+
+def _completar_hashes(cursor, tamanio_lote):
+    """
+    Calcula claveHash/contenidoHash de los registros cargados antes de que
+    existieran esas columnas. Los hashes se cargan en una tabla temporal
+    (INSERT multi-fila) y se aplican con un único UPDATE ... JOIN.
+    """
+    cursor.execute("""
+        SELECT vademecumID, nombreComercial, presentacion,
+               accionFarmacologica, principioActivo, laboratorio
+        FROM vademecum
+        WHERE claveHash IS NULL
+    """)
+    pendientes = [
+        (clave_de_fila(fila[1:]), contenido_de_fila(fila[1:]), fila[0])
+        for fila in cursor.fetchall()
+    ]
+    if not pendientes:
+        return 0
+    cursor.execute("""
+        CREATE TEMPORARY TABLE vademecum_hashes (
+          vademecumID INT PRIMARY KEY,
+          claveHash CHAR(40) NOT NULL,
+          contenidoHash CHAR(40) NOT NULL
+        )
+    """)
+    try:
+        for lote in _por_lotes(pendientes, tamanio_lote):
+            cursor.executemany("""
+                INSERT INTO vademecum_hashes (claveHash, contenidoHash, vademecumID)
+                VALUES (%s, %s, %s)
+            """, lote)
+        cursor.execute("""
+            UPDATE vademecum v
+            JOIN vademecum_hashes h ON h.vademecumID = v.vademecumID
+            SET v.claveHash     = h.claveHash,
+                v.contenidoHash = h.contenidoHash
+        """)
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS vademecum_hashes")
+    return len(pendientes)
+
+
+def _calcular_delta(actuales, nuevas):
+    """
+    'actuales': filas (vademecumID, claveHash, contenidoHash, vigente) de la base.
+    'nuevas': {claveHash: fila del Excel (7 campos)}.
+    Retorna (inserciones, actualizaciones, retiros):
+      inserciones      -> filas del Excel
+      actualizaciones  -> (vademecumID, fila del Excel)
+      retiros          -> vademecumID
+    """
+    existentes = {}
+    retiros = []
+    for vid, clave, contenido, vigente in actuales:
+        if clave in existentes:
+            # Clave duplicada en la base: se conserva el primer registro
+            if vigente:
+                retiros.append(vid)
+            continue
+        existentes[clave] = (vid, contenido, vigente)
+
+    inserciones, actualizaciones = [], []
+    for clave, fila in nuevas.items():
+        actual = existentes.get(clave)
+        if actual is None:
+            inserciones.append(fila)
+        else:
+            vid, contenido, vigente = actual
+            if contenido != fila[6] or not vigente:
+                actualizaciones.append((vid, fila))
+
+    retiros.extend(
+        vid for clave, (vid, _, vigente) in existentes.items()
+        if vigente and clave not in nuevas
+    )
+    return inserciones, actualizaciones, retiros
+
+
+def _aplicar_actualizaciones(cursor, actualizaciones, tamanio_lote):
+    cursor.execute("""
+        CREATE TEMPORARY TABLE vademecum_delta (
+          vademecumID INT PRIMARY KEY,
+          nombreComercial VARCHAR(255) NOT NULL,
+          presentacion VARCHAR(255) NOT NULL,
+          accionFarmacologica VARCHAR(255) NOT NULL,
+          principioActivo VARCHAR(255) NOT NULL,
+          laboratorio VARCHAR(255) NOT NULL,
+          contenidoHash CHAR(40) NOT NULL
+        )
+    """)
+    try:
+        filas = [(vid, *fila[:5], fila[6]) for vid, fila in actualizaciones]
+        for lote in _por_lotes(filas, tamanio_lote):
+            cursor.executemany("""
+                INSERT INTO vademecum_delta
+                  (vademecumID, nombreComercial, presentacion, accionFarmacologica,
+                   principioActivo, laboratorio, contenidoHash)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, lote)
+        cursor.execute("""
+            UPDATE vademecum v
+            JOIN vademecum_delta d ON d.vademecumID = v.vademecumID
+            SET v.nombreComercial     = d.nombreComercial,
+                v.presentacion        = d.presentacion,
+                v.accionFarmacologica = d.accionFarmacologica,
+                v.principioActivo     = d.principioActivo,
+                v.laboratorio         = d.laboratorio,
+                v.contenidoHash       = d.contenidoHash,
+                v.vigente             = 1
+        """)
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS vademecum_delta")
+
+
+def _aplicar_retiros(cursor, retiros, tamanio_lote):
+    for lote in _por_lotes(retiros, tamanio_lote):
+        marcadores = ", ".join(["%s"] * len(lote))
+        cursor.execute(
+            f"UPDATE vademecum SET vigente = 0 WHERE vademecumID IN ({marcadores})",
+            tuple(lote)
+        )
+
+
+def sincronizar_vademecum(ruta_excel, forzar=False):
+    """
+    Aplica el Excel 'ruta_excel' sobre la tabla vademecum tocando solo las
+    filas que cambiaron. Retorna un dict con la cantidad de insertados,
+    actualizados y retirados, o None si no se aplicó (error o versión ya
+    aplicada, salvo 'forzar').
+    """
+    inicio = time.perf_counter()
+    archivo_hash = hash_de_archivo(ruta_excel)
+    tamanio_lote = config.vademecum_tamanio_lote
+
+    conexion = ConexionBD.obtener_conexion()
+    if conexion is None:
+        print("No se pudo conectar a la base de datos.")
+        return None
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(
+            "SELECT versionID FROM vademecum_versiones WHERE archivoHash = %s LIMIT 1",
+            (archivo_hash,)
+        )
+        if cursor.fetchone() and not forzar:
+            print("Esta versión del vademecum ya fue aplicada. Se omite la sincronización.")
+            return None
+
+        try:
+            df = leer_excel(ruta_excel)
+        except Exception as e:
+            print("Error al leer el Excel:", e)
+            return None
+        # Una fila por clave (si el Excel repite una clave, gana la última)
+        nuevas = {fila[5]: fila for fila in filas_desde_dataframe(df)}
+
+        completados = _completar_hashes(cursor, tamanio_lote)
+        if completados:
+            print(f"  vademecum: hashes calculados para {completados} registros existentes")
+
+        cursor.execute("SELECT vademecumID, claveHash, contenidoHash, vigente FROM vademecum")
+        inserciones, actualizaciones, retiros = _calcular_delta(cursor.fetchall(), nuevas)
+
+        for lote in _por_lotes(inserciones, tamanio_lote):
+            cursor.executemany(SQL_INSERT, lote)
+        if actualizaciones:
+            _aplicar_actualizaciones(cursor, actualizaciones, tamanio_lote)
+        _aplicar_retiros(cursor, retiros, tamanio_lote)
+
+        registrar_version(cursor, ruta_excel, archivo_hash,
+                          len(inserciones), len(actualizaciones), len(retiros))
+        conexion.commit()
+    except Error as e:
+        conexion.rollback()
+        print("Error durante la sincronización del vademecum (no se aplicó ningún cambio):", e)
+        return None
+    finally:
+        cursor.close()
+        conexion.close()
+
+    invalidar_indice()
+    resumen = {
+        "insertados": len(inserciones),
+        "actualizados": len(actualizaciones),
+        "retirados": len(retiros),
+        "sin_cambios": len(nuevas) - len(inserciones) - len(actualizaciones),
+    }
+    print(f"Sincronización del vademecum completada en {time.perf_counter() - inicio:.2f} s: "
+          + ", ".join(f"{v} {k.replace('_', ' ')}" for k, v in resumen.items()))
+    return resumen
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("ruta_excel")
+    ap.add_argument("--forzar", action="store_true",
+                    help="aplicar aunque esta versión del archivo ya figure como aplicada")
+    args = ap.parse_args()
+    sincronizar_vademecum(args.ruta_excel, forzar=args.forzar)
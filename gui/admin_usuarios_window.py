@@ -6,6 +6,8 @@ import customtkinter as ctk
 from customtkinter import CTkToplevel, CTkScrollableFrame
 from logica.gestor_usuarios import UsuarioManager
 from gui.login import icono_logotipo
+from gui.cargador_async import CargadorAsync
+from logica import eventos
 
 class AdminUsuariosWindow(CTkToplevel):
     def __init__(self, parent, usuario_actual):
@@ -24,6 +26,8 @@ class AdminUsuariosWindow(CTkToplevel):
 
         self.usuario_actual = usuario_actual
         self.usuario_manager = UsuarioManager()
+        self.cargador = CargadorAsync(self)
+        self.cargador.suscribir(eventos.UsuarioCambiado, self._al_cambiar_usuario)
         self.inactive_user_roles = {}
 
         # Combobox para filtrar Activos/Inactivos
@@ -69,9 +73,18 @@ class AdminUsuariosWindow(CTkToplevel):
                 fg_color="#003300"
             ).grid(row=0, column=col, padx=5, pady=5)
 
+    def _al_cambiar_usuario(self, evento):
+        # Una modificación ya se ve en los campos de su fila; altas, bajas y
+        # restauraciones cambian qué usuarios lista el filtro
+        if evento.accion != eventos.MODIFICACION:
+            self.cargar_usuarios()
+
     def cargar_usuarios(self, *args):
         estado = 1 if self.filter_var.get() == "Activos" else 0
-        usuarios = self.usuario_manager.obtener_usuarios_por_estado(estado)
+        self.cargador.cargar("usuarios", lambda: self.usuario_manager.obtener_usuarios_por_estado(estado),
+                             lambda usuarios: self._mostrar_usuarios(estado, usuarios))
+
+    def _mostrar_usuarios(self, estado, usuarios):
 
         # Si no hay usuarios inactivos, mostrar mensaje
         if estado == 0 and not usuarios:
@@ -158,12 +171,8 @@ class AdminUsuariosWindow(CTkToplevel):
             messagebox.showwarning("Error", "Rol inválido.")
             return
 
-        ok = self.usuario_manager.actualizar_usuario(id_, ent_u, ent_p, ent_r)
-        if ok:
-            messagebox.showinfo("Éxito", "Usuario modificado.")
-            self.cargar_usuarios()
-        else:
-            messagebox.showerror("Error", "No se pudo modificar el usuario.")
+        self._guardar(lambda: self.usuario_manager.actualizar_usuario(id_, ent_u, ent_p, ent_r),
+                      "Usuario modificado.", "No se pudo modificar el usuario.")
 
     def eliminar_usuario(self, id_):
         prompt = CTkPromptArchivado(parent=self)
@@ -171,12 +180,8 @@ class AdminUsuariosWindow(CTkToplevel):
         if razon is None:  # Cancelado
             return
 
-        ok = self.usuario_manager.eliminar_usuario(id_, razon.strip())
-        if ok:
-            messagebox.showinfo("Éxito", "Usuario archivado.")
-            self.cargar_usuarios()
-        else:
-            messagebox.showerror("Error", "No se pudo archivar el usuario.")
+        self._guardar(lambda: self.usuario_manager.eliminar_usuario(id_, razon.strip()),
+                      "Usuario archivado.", "No se pudo archivar el usuario.")
 
     def restaurar_usuario(self, id_):
         nuevo_rol = self.inactive_user_roles[id_].get().strip().lower()
@@ -184,9 +189,17 @@ class AdminUsuariosWindow(CTkToplevel):
             messagebox.showerror("Error", "No se pudo determinar el nuevo rol.")
             return
         if messagebox.askyesno("Confirmar", f"¿Restaurar usuario con rol '{nuevo_rol}'?"):
-            ok = self.usuario_manager.restaurar_usuario(id_, nuevo_rol)
-            if ok:
-                messagebox.showinfo("Éxito", "Usuario restaurado.")
-                self.cargar_usuarios()
-            else:
-                messagebox.showerror("Error", "No se pudo restaurar el usuario.")
+            self._guardar(lambda: self.usuario_manager.restaurar_usuario(id_, nuevo_rol),
+                          "Usuario restaurado.", "No se pudo restaurar el usuario.")
+
+    def _guardar(self, funcion, exito, error):
+        """
+        Ejecuta un cambio del gestor en segundo plano e informa el resultado;
+        la lista se actualiza con el evento UsuarioCambiado. Se ignora
+        mientras haya otro en curso.
+        """
+        if self.cargador.en_curso("guardar"):
+            return
+        self.cargador.cargar("guardar", funcion,
+                             lambda ok: messagebox.showinfo("Éxito", exito, parent=self) if ok
+                             else messagebox.showerror("Error", error, parent=self))
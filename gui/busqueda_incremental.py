@@ -0,0 +1,52 @@
+# src/gui/busqueda_incremental.py
+"""
+Búsqueda al escribir sobre un campo de texto.
+
+Cada tecla reprograma la búsqueda; solo se dispara cuando el usuario deja
+de escribir config.busqueda_espera_ms milisegundos, y no se repite si el
+texto no cambió. Enter busca de inmediato. La función de búsqueda suele
+encolar la consulta en un CargadorAsync, que descarta las respuestas viejas.
+
+    self.busqueda = BusquedaIncremental(self.entry_busqueda, self.buscar_productos)
+"""
+import config
+
+
+class BusquedaIncremental:
+    def __init__(self, entry, buscar, espera_ms=None):
+        self.entry = entry
+        self.buscar = buscar
+        self.espera_ms = espera_ms or config.busqueda_espera_ms
+        self._pendiente = None
+        self._ultimo = None
+        entry.bind("<KeyRelease>", self._al_escribir, add="+")
+        entry.bind("<Return>", self.ahora, add="+")
+
+    def _al_escribir(self, event):
+        if event.keysym in ("Return", "KP_Enter"):
+            return
+        self._cancelar()
+        if self.entry.get().strip() != self._ultimo:
+            self._pendiente = self.entry.after(self.espera_ms, self._disparar)
+
+    def ahora(self, _event=None):
+        self._cancelar()
+        self._disparar()
+
+    def olvidar(self):
+        """
+        Olvida el último texto buscado (p. ej. al cambiar lo que se busca):
+        la próxima tecla vuelve a buscar aunque el texto sea el mismo.
+        """
+        self._cancelar()
+        self._ultimo = None
+
+    def _cancelar(self):
+        if self._pendiente is not None:
+            self.entry.after_cancel(self._pendiente)
+            self._pendiente = None
+
+    def _disparar(self):
+        self._pendiente = None
+        self._ultimo = self.entry.get().strip()
+        self.buscar()
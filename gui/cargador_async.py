@@ -0,0 +1,243 @@
+# src/gui/cargador_async.py
+"""
+Carga de datos en segundo plano para las ventanas.
+
+Las llamadas a los gestores corren en un pool de hilos y el resultado vuelve
+al hilo de Tk por una cola que se revisa con after(): Tk no admite que otro
+hilo toque los widgets. Cada pedido pertenece a un canal (p. ej.
+"productos"); uno nuevo en el mismo canal deja obsoleto al anterior, que se
+cancela si todavía no empezó y cuyo resultado se descarta si llega después.
+Mientras haya pedidos en curso la ventana muestra un indicador de carga.
+
+    self.cargador = CargadorAsync(self)
+    self.cargador.cargar("clientes", self.cliente_manager.obtener_clientes, self._poblar)
+
+Las funciones que se pasan no deben tocar widgets ni abrir diálogos; si
+necesitan preguntar algo al usuario a mitad de camino, lo hacen con
+en_hilo_tk(), que corre el diálogo en el hilo de Tk y espera la respuesta.
+
+suscribir() recibe los avisos de cambios de logica.eventos en el hilo de Tk
+mientras la ventana exista.
+"""
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox, TclError
+
+import customtkinter as ctk
+
+import config
+from datos import instrumentacion
+from logica import eventos
+
+INTERVALO_MS = 30
+INTERVALO_AVISOS_MS = 200
+
+_ejecutor = None
+_candado = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _ejecutor
+    with _candado:
+        if _ejecutor is None:
+            # Más hilos que conexiones solo agregaría espera en el pool de la base
+            _ejecutor = ThreadPoolExecutor(max_workers=config.db_pool_tamanio,
+                                           thread_name_prefix="cargador")
+        return _ejecutor
+
+
+class IndicadorCarga:
+    """
+    Etiqueta "Cargando…" superpuesta en la esquina superior derecha de 'master'.
+    """
+    def __init__(self, master, texto="Cargando…"):
+        self.etiqueta = ctk.CTkLabel(master, text=texto, fg_color="#333333",
+                                     text_color="white", corner_radius=6)
+
+    def mostrar(self):
+        self.etiqueta.place(relx=1.0, rely=0.0, x=-10, y=10, anchor="ne")
+        self.etiqueta.lift()
+
+    def ocultar(self):
+        self.etiqueta.place_forget()
+
+
+class CargadorAsync:
+    def __init__(self, widget, indicador=None):
+        self.widget = widget
+        self.indicador = indicador or IndicadorCarga(widget)
+        self._resultados = queue.Queue()
+        self._vigentes = {}     # canal -> (número, future, al_terminar, al_fallar)
+        self._numero = 0
+        self._pendientes = 0    # pedidos enviados cuyo resultado no se revisó
+        self._preguntas = queue.Queue()
+        self._revision = None
+        self._cerrado = False
+        self._avisos = queue.Queue()
+        self._revision_avisos = None
+        self._suscripciones = []
+        widget.bind("<Destroy>", self._al_destruir, add="+")
+
+    def cargar(self, canal, funcion, al_terminar, al_fallar=None):
+        """
+        Ejecuta 'funcion()' en segundo plano y luego, en el hilo de Tk,
+        'al_terminar(resultado)' o 'al_fallar(excepcion)' (por defecto, un
+        mensaje de error). Reemplaza al pedido anterior del mismo canal.
+        """
+        if self._cerrado:
+            return
+        self.cancelar(canal)
+        self._numero += 1
+        numero = self._numero
+        # Las consultas del hilo se atribuyen a la pantalla que las pidió
+        pantalla = instrumentacion.pantalla_llamadora() if instrumentacion.activa else None
+        future = _pool().submit(self._ejecutar, funcion, pantalla)
+        self._vigentes[canal] = (numero, future, al_terminar, al_fallar)
+        self._pendientes += 1
+        future.add_done_callback(lambda f: self._resultados.put((canal, numero, f)))
+        self.indicador.mostrar()
+        if self._revision is None:
+            self._revision = self.widget.after(INTERVALO_MS, self._revisar)
+
+    def cancelar(self, canal=None):
+        """
+        Descarta el pedido en curso de 'canal' (o todos).
+        """
+        canales = list(self._vigentes) if canal is None else [canal]
+        for c in canales:
+            vigente = self._vigentes.pop(c, None)
+            if vigente is not None:
+                vigente[1].cancel()
+        if not self._vigentes and not self._cerrado:
+            self.indicador.ocultar()
+
+    def en_curso(self, canal) -> bool:
+        return canal in self._vigentes
+
+    def en_hilo_tk(self, funcion):
+        """
+        Desde una función de cargar(): ejecuta 'funcion()' en el hilo de Tk
+        (p. ej. un diálogo) y retorna su resultado o relanza su excepción.
+        Retorna None si la ventana se cierra antes de responder.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return funcion()
+        listo = threading.Event()
+        respuesta = {}
+        self._preguntas.put((funcion, respuesta, listo))
+        while not listo.wait(0.1):
+            if self._cerrado:
+                return None
+        if "error" in respuesta:
+            raise respuesta["error"]
+        return respuesta.get("resultado")
+
+    def suscribir(self, tipo, funcion):
+        """
+        Llama a 'funcion(evento)' en el hilo de Tk por cada evento de 'tipo'
+        (ver logica.eventos) hasta que se destruya la ventana. Los que se
+        publican desde otro hilo se atienden en la siguiente revisión.
+        """
+        def recibir(evento):
+            if threading.current_thread() is threading.main_thread():
+                if not self._cerrado:
+                    self._llamar(funcion, evento)
+            else:
+                self._avisos.put((funcion, evento))
+        self._suscripciones.append(eventos.suscribir(tipo, recibir))
+        if self._revision_avisos is None:
+            self._revision_avisos = self.widget.after(INTERVALO_AVISOS_MS, self._revisar_avisos)
+
+    def _revisar_avisos(self):
+        self._revision_avisos = None
+        while not self._cerrado:
+            try:
+                funcion, evento = self._avisos.get_nowait()
+            except queue.Empty:
+                break
+            self._llamar(funcion, evento)
+        if not self._cerrado:
+            self._revision_avisos = self.widget.after(INTERVALO_AVISOS_MS, self._revisar_avisos)
+
+    @staticmethod
+    def _llamar(funcion, *args):
+        # Un callback con errores no debe cortar la revisión periódica ni dejar
+        # el indicador visible
+        try:
+            funcion(*args)
+        except Exception:
+            traceback.print_exc()
+
+    @staticmethod
+    def _ejecutar(funcion, pantalla):
+        if pantalla is None:
+            return funcion()
+        with instrumentacion.en_pantalla(pantalla):
+            return funcion()
+
+    def _responder_preguntas(self):
+        while not self._cerrado:
+            try:
+                funcion, respuesta, listo = self._preguntas.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                respuesta["resultado"] = funcion()
+            except Exception as e:
+                respuesta["error"] = e
+            listo.set()
+
+    def _revisar(self):
+        self._revision = None
+        if self._cerrado:
+            return
+        self._responder_preguntas()
+        while not self._cerrado:
+            try:
+                canal, numero, future = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            self._pendientes -= 1
+            vigente = self._vigentes.get(canal)
+            if vigente is None or vigente[0] != numero or future.cancelled():
+                continue  # reemplazado por un pedido más nuevo
+            del self._vigentes[canal]
+            _, _, al_terminar, al_fallar = vigente
+            error = future.exception()
+            if error is None:
+                self._llamar(al_terminar, future.result())
+            elif al_fallar is not None:
+                self._llamar(al_fallar, error)
+            else:
+                self._llamar(lambda: messagebox.showerror(
+                    "Error", f"No se pudieron cargar los datos:\n{error}", parent=self.widget))
+        if self._cerrado:
+            return
+        if self._pendientes:
+            # Un callback pudo haber encolado otro pedido y agendado la revisión.
+            # Se sigue revisando mientras corra algún pedido, aunque se haya
+            # descartado: puede estar esperando una respuesta de en_hilo_tk()
+            if self._revision is None:
+                self._revision = self.widget.after(INTERVALO_MS, self._revisar)
+        if not self._vigentes:
+            self.indicador.ocultar()
+
+    def _al_destruir(self, event):
+        if event.widget is not self.widget:
+            return
+        self._cerrado = True
+        for cancelar in self._suscripciones:
+            cancelar()
+        self._suscripciones.clear()
+        for vigente in self._vigentes.values():
+            vigente[1].cancel()
+        self._vigentes.clear()
+        for revision in (self._revision, self._revision_avisos):
+            if revision is not None:
+                try:
+                    self.widget.after_cancel(revision)
+                except TclError:
+                    pass
+        self._revision = self._revision_avisos = None
@@ -4,6 +4,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, StringVar
 from logica.gestor_clientes import ClienteManager
 from gui.login import icono_logotipo
+from gui.cargador_async import CargadorAsync
+from gui.busqueda_incremental import BusquedaIncremental
+from logica import eventos
+import config
 import tkinter.font as tkFont
 
 class ClientesWindow(ctk.CTkToplevel):
@@ -13,9 +17,13 @@ class ClientesWindow(ctk.CTkToplevel):
         self.resizable(False, False)
 
         self.cliente_manager = ClienteManager()
+        self.cargador = CargadorAsync(self)
+        # Altas, cambios y archivados confirmados actualizan solo la fila del cliente
+        self.cargador.suscribir(eventos.ClienteCambiado, self._al_cambiar_cliente)
         self.cliente_actual_id = None
         self.selected_cliente = None
         self.clientes_map = {}
+        self._termino_mostrado = ""     # búsqueda cuyos resultados se muestran
 
         # ─── FILTRO ACTIVO / ARCHIVADO ────────────────────
         self.frame_search = ctk.CTkFrame(self, fg_color="transparent")
@@ -36,6 +44,7 @@ class ClientesWindow(ctk.CTkToplevel):
         self.btn_search = ctk.CTkButton(self.frame_search, text="Buscar", width=100,
                                         command=self._buscar)
         self.btn_search.pack(side="left", padx=5)
+        self.busqueda = BusquedaIncremental(self.entry_search, self._buscar)
         self.btn_reset = ctk.CTkButton(self.frame_search, text="Mostrar Todos", width=110,
                                        command=self._cargar_por_filtro)
         self.btn_reset.pack(side="left", padx=5)
@@ -145,9 +154,41 @@ class ClientesWindow(ctk.CTkToplevel):
         self.clientes_map.clear()
         for c in lista:
             self.clientes_map[c["clienteID"]]=c
-            vals = (c["clienteID"],c["nombre"],c["apellido"],c["cuil"],
-                    c["telefono"],c["email"],c["direccion"],c.get("iva",""))
-            self.tree.insert("", "end", values=vals)
+            self.tree.insert("", "end", iid=str(c["clienteID"]), values=self._valores(c))
+        self._ajustar_id()
+
+    def _valores(self, c):
+        return (c["clienteID"],c["nombre"],c["apellido"],c["cuil"],
+                c["telefono"],c["email"],c["direccion"],c.get("iva",""))
+
+    def _al_cambiar_cliente(self, evento):
+        cid = evento.cliente_id
+        self.cargador.cargar(("cliente", cid), lambda: self.cliente_manager.obtener_cliente(cid),
+                             lambda cliente: self._actualizar_fila(cid, cliente))
+
+    def _actualizar_fila(self, cid, cliente):
+        # La fila aparece, cambia o desaparece según lo que se muestra: los
+        # resultados de la búsqueda (activos y archivados) o el filtro
+        # Activos/Archivados
+        iid = str(cid)
+        if cliente is None:
+            visible = False
+        elif self._termino_mostrado:
+            visible = self.cliente_manager.coincide_busqueda(cliente, self._termino_mostrado)
+        else:
+            estado = 1 if self.filter_var.get() == "Activos" else 0
+            visible = cliente.get("activo", 1) == estado
+        if not visible:
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+            self.clientes_map.pop(cid, None)
+        else:
+            self._clear_no_data()
+            self.clientes_map[cid] = cliente
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self._valores(cliente))
+            else:
+                self.tree.insert("", "end", iid=iid, values=self._valores(cliente))
         self._ajustar_id()
 
     def _restaurar_cliente(self):
@@ -157,19 +198,31 @@ class ClientesWindow(ctk.CTkToplevel):
             return
         cid = int(self.tree.item(sel[0], "values")[0])
         if messagebox.askyesno("Confirmar", "¿Desea restaurar este cliente?", parent=self):
-            if self.cliente_manager.restaurar_cliente(cid):
-                messagebox.showinfo("Éxito", "Cliente restaurado.")
-                self._cargar_por_filtro()
-            else:
-                messagebox.showerror("Error", "No se pudo restaurar el cliente.")
+            self._guardar(lambda: self.cliente_manager.restaurar_cliente(cid),
+                          "Cliente restaurado.", "No se pudo restaurar el cliente.")
+
+    def _guardar(self, funcion, exito, error):
+        """
+        Ejecuta un alta/cambio del gestor en segundo plano e informa el
+        resultado; la fila se actualiza con el evento ClienteCambiado. Se
+        ignora mientras haya otro en curso.
+        """
+        if self.cargador.en_curso("guardar"):
+            return
+        self.cargador.cargar("guardar", funcion,
+                             lambda ok: messagebox.showinfo("Éxito", exito, parent=self) if ok
+                             else messagebox.showerror("Error", error, parent=self))
 
 
     def _cargar_por_filtro(self, *a):
-        self._clear_no_data()
+        # Filtro y búsqueda comparten canal: el último pedido reemplaza al anterior
         estado = 1 if self.filter_var.get() == "Activos" else 0
+        self.cargador.cargar("clientes", lambda: self.cliente_manager.obtener_clientes_por_estado(estado),
+                             lambda filt: self._mostrar_por_filtro(estado, filt))
 
-        todos = self.cliente_manager.obtener_clientes()
-        filt = [c for c in todos if c.get("activo", 1) == estado]
+    def _mostrar_por_filtro(self, estado, filt):
+        self._termino_mostrado = ""
+        self._clear_no_data()
 
         # Si no hay datos archivados
         if estado == 0 and not filt:
@@ -196,11 +249,12 @@ class ClientesWindow(ctk.CTkToplevel):
         term = self.entry_search.get().strip().lower()
         if not term:
             return self._cargar_por_filtro()
-        todos = self.cliente_manager.obtener_clientes()
-        filt = [c for c in todos
-                if term in c["nombre"].lower()
-                or term in c["apellido"].lower()
-                or term in c["cuil"].lower()]
+        self.cargador.cargar("clientes",
+                             lambda: self.cliente_manager.buscar_clientes(term, config.busqueda_limite),
+                             lambda filt: self._mostrar_busqueda(term, filt))
+
+    def _mostrar_busqueda(self, term, filt):
+        self._termino_mostrado = term
         self._clear_no_data()
         self._poblar(filt)
 
@@ -247,21 +301,16 @@ class ClientesWindow(ctk.CTkToplevel):
             return
         datos={k:v.get().strip() for k,v in self.entries.items()}
         datos["iva"]=self.cmb_iva.get().strip()
-        if self.cliente_manager.crear_cliente(datos):
-            messagebox.showinfo("Éxito","Cliente agregado.")
-            self._cargar_por_filtro()
-        else:
-            messagebox.showerror("Error","No se pudo agregar cliente.")
+        self._guardar(lambda: self.cliente_manager.crear_cliente(datos),
+                      "Cliente agregado.", "No se pudo agregar cliente.")
 
     def _modificar(self):
         if not self.cliente_actual_id: return
         datos={k:v.get().strip() for k,v in self.entries.items()}
         datos["iva"]=self.cmb_iva.get().strip()
-        if self.cliente_manager.actualizar_cliente(self.cliente_actual_id, datos):
-            messagebox.showinfo("Éxito","Cliente actualizado.")
-            self._cargar_por_filtro()
-        else:
-            messagebox.showerror("Error","No se pudo actualizar cliente.")
+        cid = self.cliente_actual_id
+        self._guardar(lambda: self.cliente_manager.actualizar_cliente(cid, datos),
+                      "Cliente actualizado.", "No se pudo actualizar cliente.")
 
     def _archivar(self):
         if not self.cliente_actual_id:
@@ -273,11 +322,9 @@ class ClientesWindow(ctk.CTkToplevel):
         if razon is None:
             return
 
-        if self.cliente_manager.eliminar_cliente(self.cliente_actual_id, razon.strip()):
-            messagebox.showinfo("Éxito", "Cliente archivado.")
-            self._cargar_por_filtro()
-        else:
-            messagebox.showerror("Error", "No se pudo archivar cliente.")
+        cid = self.cliente_actual_id
+        self._guardar(lambda: self.cliente_manager.eliminar_cliente(cid, razon.strip()),
+                      "Cliente archivado.", "No se pudo archivar cliente.")
 
 
 if __name__=="__main__":
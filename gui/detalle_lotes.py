@@ -3,9 +3,10 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry  
-from datos.conexion_bd import ConexionBD
 from gui.login import icono_logotipo
-from mysql.connector import Error
+from gui.cargador_async import CargadorAsync
+from logica import eventos
+from logica.gestor_inventario import GestorInventario
 import datetime
 
 # Se modifica esta clase para que reciba, además, un diccionario "producto"
@@ -162,53 +163,23 @@ class DetalleLoteDetalleWindow(ctk.CTkToplevel):
             messagebox.showerror("Error", "Los valores deben ser numéricos.")
             return
         nuevo_vencimiento_str = self.date_vencimiento.get_date().isoformat()
-        try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                messagebox.showerror("Error", "No se pudo establecer conexión.")
-                return
-            cursor = conexion.cursor()
-            cursor.execute("USE farmanaccio_db")
-            sql = """
-                UPDATE lotes_productos
-                SET cantidad_ingresada = %s,
-                    cantidad_disponible = %s,
-                    vencimiento = %s
-                WHERE loteID = %s
-            """
-            cursor.execute(sql, (nueva_ingresada, nueva_disponible, nuevo_vencimiento_str, self.selected_record_id))
-            conexion.commit()
-            
-            # NUEVO: Actualizar también el campo "stock" en la tabla de productos
-            sql_update_productos = """
-                UPDATE productos
-                SET stock = (
-                    SELECT IFNULL(SUM(cantidad_disponible), 0)
-                    FROM lotes_productos
-                    WHERE prodID = %s
-                )
-                WHERE prodID = %s
-            """
-            cursor.execute(sql_update_productos, (self.producto["prodID"], self.producto["prodID"]))
-            conexion.commit()
-            
-            cursor.close()
-            conexion.close()
-            messagebox.showinfo("Éxito", "Registro actualizado correctamente.", parent=self)
-            current_vals = self.tree.item(self.selected_record_id, "values")
-            self.tree.item(self.selected_record_id, values=(
-                current_vals[0],
-                nueva_ingresada,
-                nueva_disponible,
-                nuevo_vencimiento_str
-            ))
-            
-            # Notificar a las ventanas superiores que se actualizaron los datos
-            # Se usa el widget raíz para asegurar que el evento se propague globalmente.
-            root = self.winfo_toplevel()
-            root.event_generate("<<DatosActualizados>>", when="tail")
-        except Error as e:
-            messagebox.showerror("Error", f"No se pudo actualizar el registro:\n{e}", parent=self)
+        # El lote y el stock del producto se confirman juntos; GestorInventario
+        # avisa del cambio a las ventanas abiertas (logica.eventos)
+        ok, error = GestorInventario().modificar_lote(
+            self.selected_record_id, self.producto["prodID"],
+            nueva_ingresada, nueva_disponible, nuevo_vencimiento_str
+        )
+        if not ok:
+            messagebox.showerror("Error", f"No se pudo actualizar el registro:\n{error}", parent=self)
+            return
+        messagebox.showinfo("Éxito", "Registro actualizado correctamente.", parent=self)
+        current_vals = self.tree.item(self.selected_record_id, "values")
+        self.tree.item(self.selected_record_id, values=(
+            current_vals[0],
+            nueva_ingresada,
+            nueva_disponible,
+            nuevo_vencimiento_str
+        ))
 
 
 # Ahora se modifica la invocación en DetalleLotesWindow para pasar también la información del producto.
@@ -254,7 +225,28 @@ class DetalleLotesWindow(ctk.CTkToplevel):
         self.tree.column("Stock Disponible", width=150, anchor="center")
         self.tree.column("Vencimiento", width=150, anchor="center")
         self.tree.pack(fill="both", expand=True)
+        self._mostrar_lotes(detalle_lotes)
+        
+        self.tree.bind("<Double-1>", self.ver_detalle_lote)
         
+        ctk.CTkButton(self, text="Cerrar", command=self.destroy).pack(pady=10)
+
+        # Al editar un registro de lote se relee el detalle de este producto
+        self.inventario_manager = GestorInventario()
+        self.cargador = CargadorAsync(self)
+        self.cargador.suscribir(eventos.LoteCambiado, self._al_cambiar_lote)
+
+        self.after(201, lambda: self.iconbitmap(icono_logotipo))
+
+    def _al_cambiar_lote(self, evento):
+        if str(evento.prod_id) != str(self.producto["prodID"]):
+            return
+        self.cargador.cargar("lotes", lambda: self.inventario_manager.obtener_detalle_lotes(evento.prod_id),
+                             self._mostrar_lotes)
+
+    def _mostrar_lotes(self, detalle_lotes):
+        self.detalle_lotes = detalle_lotes
+        self.tree.delete(*self.tree.get_children())
         self.lotes_agrupados = {}
         for rec in detalle_lotes:
             numero = rec["numeroLote"]
@@ -270,12 +262,6 @@ class DetalleLotesWindow(ctk.CTkToplevel):
         
         for lote, datos in self.lotes_agrupados.items():
             self.tree.insert("", "end", values=(lote, datos["cantidad_disponible"], datos["vencimiento"]))
-        
-        self.tree.bind("<Double-1>", self.ver_detalle_lote)
-        
-        ctk.CTkButton(self, text="Cerrar", command=self.destroy).pack(pady=10)
-
-        self.after(201, lambda: self.iconbitmap(icono_logotipo))
     
     def ver_detalle_lote(self, event):
         item = self.tree.focus()
@@ -1,13 +1,19 @@
 # src/gui/stock_window.py
 import customtkinter as ctk
 from gui.login import icono_logotipo
-from tkinter import ttk, messagebox, font as tkFont, simpledialog
+from tkinter import ttk, messagebox, simpledialog
 from tkcalendar import DateEntry  
 from utils.utilidades import Utilidades
+from utils import anchos_columnas
 from logica.gestor_vademecum import VademecumManager
 from logica.gestor_stock import StockManager
 from logica.gestor_inventario import GestorInventario  # Para inventario agrupado y detalles de lotes.
 from gui.detalle_lotes import DetalleLotesWindow
+from gui.tabla_virtual import TablaVirtual, FuenteLista, FuentePaginada
+from gui.cargador_async import CargadorAsync
+from gui.busqueda_incremental import BusquedaIncremental
+from logica import eventos
+import config
 import datetime
 
 # --- Integración de la clase personalizada para DateEntry ---
@@ -41,17 +47,19 @@ class StockWindow(ctk.CTkToplevel):
         self.stock_manager = StockManager()
         self.vademecum_manager = VademecumManager()
         self.inventario_manager = GestorInventario()
+        # Las consultas corren en segundo plano; la ventana no se congela
+        self.cargador = CargadorAsync(self)
         
-        # Vincular evento para refrescar stock
-        self.bind("<<DatosActualizados>>", self.refrescar_stock)
+        # Los cambios confirmados por los gestores actualizan solo las filas afectadas
+        self.cargador.suscribir(eventos.ProductoCambiado, self._al_cambiar_productos)
         
         # --- Sección de búsqueda ---
         self.frame_busqueda = ctk.CTkFrame(self, fg_color="transparent")
         self.frame_busqueda.pack(fill="x", padx=10, pady=5)
         self.combo_busqueda = ctk.CTkComboBox(
             self.frame_busqueda,
-            values=["Vademécum", "Stock", "Archivado"],  # Tres opciones
-            width=120,
+            values=["Vademécum", "Principio Activo", "Stock", "Archivado"],
+            width=140,
             command=lambda origen: self.cambiar_origen(origen)
         )
         self.combo_busqueda.set("Stock")
@@ -64,6 +72,7 @@ class StockWindow(ctk.CTkToplevel):
         self.entry_busqueda.pack(side="left", padx=(0, 5))
         self.btn_busqueda = ctk.CTkButton(self.frame_busqueda, text="Buscar", command=self.buscar_productos)
         self.btn_busqueda.pack(side="left", padx=5)
+        self.busqueda = BusquedaIncremental(self.entry_busqueda, self.buscar_productos)
         
         # --- Sección de tabla ---
         self.frame_tabla = ctk.CTkFrame(self)
@@ -96,6 +105,9 @@ class StockWindow(ctk.CTkToplevel):
         self.frame_tabla.rowconfigure(0, weight=1)
         self.frame_tabla.columnconfigure(0, weight=1)
 
+        # Solo las filas visibles existen como ítems del Treeview
+        self.tabla = TablaVirtual(self.tree, self.vscrollbar, cargador=self.cargador)
+
         # Bindings para doble clic y selección
         self.tree.unbind("<Double-1>")  
         self.tree.bind("<Double-1>", self._on_double_click)
@@ -174,10 +186,25 @@ class StockWindow(ctk.CTkToplevel):
         self.cargar_datos_iniciales()
         self.after(150, lambda: self.iconbitmap(icono_logotipo))
     
-    def refrescar_stock(self, event):
-        self.cargar_productos()
+    def _al_cambiar_productos(self, evento):
+        origen = self.combo_busqueda.get()
+        if origen == "Stock":
+            if evento.accion == eventos.MODIFICACION:
+                self.cargador.cargar(("productos", evento.ids),
+                                     lambda: self.inventario_manager.obtener_inventario_por_ids(evento.ids),
+                                     self._actualizar_filas_stock)
+            else:
+                # Cambió qué productos hay: se vuelven a leer el total y la página visible
+                self.cargador.cargar("refresco", self.tabla.releer(), self.tabla.refrescar)
+        elif origen == "Archivado" and evento.accion != eventos.MODIFICACION:
+            self.cargar_productos_archivados()
+
+    def _actualizar_filas_stock(self, filas):
+        if self.combo_busqueda.get() == "Stock":
+            self.tabla.actualizar_filas(filas, clave=lambda p: p["prodID"])
     
     def cambiar_origen(self, origen):
+        self.busqueda.olvidar()
         # Primero, ocultamos siempre el botón "Restaurar Producto"
         if hasattr(self, "btn_restaurar") and self.btn_restaurar is not None:
             self.btn_restaurar.grid_forget()
@@ -225,7 +252,8 @@ class StockWindow(ctk.CTkToplevel):
             self.label_vencimiento.grid_remove()
             self.entry_vencimiento.grid_remove()
             self.cargar_productos()
-        elif origen == "Vademécum":
+        elif origen in ("Vademécum", "Principio Activo"):
+            # "Principio Activo" busca sustitutos en el mismo vademécum
             columns = ("Nombre Comercial", "Presentación", "Acción Farmacológica", "Principio Activo", "Laboratorio")
             self.btn_agregar.configure(state="normal")
             self.btn_modificar.configure(state="disabled")
@@ -249,6 +277,8 @@ class StockWindow(ctk.CTkToplevel):
             self.entry_vencimiento.grid_remove()
             self.cargar_productos_archivados()
         
+        # Hasta que lleguen los datos del nuevo origen, la tabla queda vacía
+        self.tabla.limpiar()
         self.tree["columns"] = columns
         for col in columns:
             self.tree.heading(col, text=col)
@@ -272,88 +302,91 @@ class StockWindow(ctk.CTkToplevel):
     def buscar_productos(self):
         origen = self.combo_busqueda.get()
         termino = self.entry_busqueda.get().strip().lower()
-        self.tree.delete(*self.tree.get_children())
         if origen == "Stock":
-            inventario = self.inventario_manager.obtener_inventario_agrupado()
-            if termino:
-                inventario = [p for p in inventario if termino in p["nombre"].lower()]
-            for p in inventario:
-                venc = p.get("vencimiento_proximo") or ""
-                estado = p.get("estado", self.inventario_manager._calcular_estado(p.get("total_stock", 0))[0])
-                item = self.tree.insert("", "end", values=(
-                    p["prodID"],
-                    p["nombre"],
-                    p["precio"],
-                    p["total_stock"],
-                    estado,
-                    venc,
-                    "Ver Detalle"
-                ))
-                if estado == "Crítico":
-                    self.tree.item(item, tags=("critical",))
-                elif estado == "Preocupante":
-                    self.tree.item(item, tags=("warning",))
-                else:
-                    self.tree.item(item, tags=("ok",))
-            self.ajustar_ancho_columnas()
-        elif origen == "Vademécum":
-            registros = self.vademecum_manager.buscar_vademecum(termino)
-            for r in registros:
-                self.tree.insert("", "end", values=(r["nombreComercial"],
-                                                     r["presentacion"],
-                                                     r["accionFarmacologica"],
-                                                     r["principioActivo"],
-                                                     r["laboratorio"]))
-            self.ajustar_ancho_columnas()
+            self.cargar_productos(termino)
+        elif origen in ("Vademécum", "Principio Activo"):
+            if not termino:
+                self.cargar_vademecum()
+                return
+            if origen == "Principio Activo":
+                buscar = self.vademecum_manager.buscar_vademecum_multicampo
+            else:
+                buscar = self.vademecum_manager.buscar_vademecum
+            self.cargador.cargar("tabla", lambda: FuenteLista(buscar(termino)),
+                                 lambda fuente: self._mostrar(fuente, self._valores_vademecum))
         elif origen == "Archivado":
             self.cargar_productos_archivados()
-    
-    def cargar_productos(self):
-        self.tree.delete(*self.tree.get_children())
-        inventario = self.inventario_manager.obtener_inventario_agrupado()
-        for p in inventario:
-            venc = p.get("vencimiento_proximo") or ""
-            estado = p.get("estado", self.inventario_manager._calcular_estado(p.get("total_stock", 0))[0])
-            item = self.tree.insert("", "end", values=(
-                p["prodID"],
-                p["nombre"],
-                p["precio"],
-                p["total_stock"],
-                estado,
-                venc,
-                "Ver Detalle"
-            ))
-            if estado == "Crítico":
-                self.tree.item(item, tags=("critical",))
-            elif estado == "Preocupante":
-                self.tree.item(item, tags=("warning",))
-            else:
-                self.tree.item(item, tags=("ok",))
-        self.ajustar_ancho_columnas()
+
+    # --- Filas de la tabla virtualizada ---
+    def _valores_inventario(self, p):
+        return (
+            p["prodID"],
+            p["nombre"],
+            p["precio"],
+            p["total_stock"],
+            p["estado"],
+            p.get("vencimiento_proximo") or "",
+            "Ver Detalle"
+        )
+
+    def _etiqueta_estado(self, p):
+        if p["estado"] == "Crítico":
+            return ("critical",)
+        elif p["estado"] == "Preocupante":
+            return ("warning",)
+        return ("ok",)
+
+    def _valores_vademecum(self, r):
+        return (r["nombreComercial"],
+                r["presentacion"],
+                r["accionFarmacologica"],
+                r["principioActivo"],
+                r["laboratorio"])
+
+    def _valores_archivado(self, prod):
+        return (
+            prod["prodID"],
+            prod["nombre"],
+            prod["precio"],
+            prod["stock"],
+            prod.get("razonArchivado", "")
+        )
+
+    def _mostrar(self, fuente, valores, etiquetas=None, clave=None):
+        self.tabla.cargar(fuente, valores, etiquetas)
+        self.ajustar_ancho_columnas(clave)
+
+    # Todos los orígenes usan el canal "tabla": cambiar de origen o buscar
+    # descarta la carga anterior que no haya terminado.
+    def cargar_productos(self, termino=""):
+        # Solo se piden a la base las páginas que se recorren; el total y la
+        # primera, en segundo plano. Una búsqueda muestra a lo sumo
+        # config.busqueda_limite resultados.
+        limite = config.busqueda_limite if termino else None
+        fuente = FuentePaginada(
+            lambda: self.inventario_manager.contar_inventario(termino, limite),
+            lambda desde, cantidad: self.inventario_manager.obtener_inventario_pagina(desde, cantidad, termino)
+        )
+        self.cargador.cargar("tabla", fuente.precargar,
+                             lambda f: self._mostrar(f, self._valores_inventario, self._etiqueta_estado))
     
     def cargar_vademecum(self):
-        self.tree.delete(*self.tree.get_children())
-        registros = self.vademecum_manager.obtener_vademecum()
-        for r in registros:
-            self.tree.insert("", "end", values=(r["nombreComercial"],
-                                                 r["presentacion"],
-                                                 r["accionFarmacologica"],
-                                                 r["principioActivo"],
-                                                 r["laboratorio"]))
-        self.ajustar_ancho_columnas()
+        fuente = FuentePaginada(self.vademecum_manager.contar_vademecum,
+                                self.vademecum_manager.obtener_vademecum_pagina)
+        def leer():
+            return fuente.precargar(), self.vademecum_manager.huella_vademecum()
+        def mostrar(resultado):
+            f, huella = resultado
+            self.tabla.cargar(f, self._valores_vademecum)
+            # El vademécum solo cambia al migrarlo o sincronizarlo: los anchos
+            # se memorizan por la huella de la tabla (sin huella, no se memorizan)
+            self.ajustar_ancho_columnas(clave=("vademecum", huella) if huella else None)
+        self.cargador.cargar("tabla", leer, mostrar)
     
     def cargar_productos_archivados(self):
-        self.tree.delete(*self.tree.get_children())
-        productos = self.stock_manager.obtener_productos_archivados()
-        for prod in productos:
-            self.tree.insert("", "end", values=(
-                prod["prodID"],
-                prod["nombre"],
-                prod["precio"],
-                prod["stock"],
-                prod.get("razonArchivado", "")
-            ))
-        self.ajustar_ancho_columnas()
+        self.cargador.cargar("tabla",
+                             lambda: FuenteLista(self.stock_manager.obtener_productos_archivados()),
+                             lambda fuente: self._mostrar(fuente, self._valores_archivado))
 
     def _on_double_click(self, event):
         if self.combo_busqueda.get() == "Archivado":
@@ -372,16 +405,8 @@ class StockWindow(ctk.CTkToplevel):
             parent=self
         )
     
-    def ajustar_ancho_columnas(self):
-        tree_font = tkFont.nametofont("TkDefaultFont")
-        for col in self.tree["columns"]:
-            max_width = tree_font.measure(col) + 10
-            for item in self.tree.get_children():
-                cell_text = str(self.tree.set(item, col))
-                cell_width = tree_font.measure(cell_text) + 10
-                if cell_width > max_width:
-                    max_width = cell_width
-            self.tree.column(col, width=max_width)
+    def ajustar_ancho_columnas(self, clave=None):
+        anchos_columnas.aplicar(self.tree, self.tabla.valores_leidos(), clave=clave)
     
     def mostrar_detalles(self, event):
         item = self.tree.identify_row(event.y)
@@ -392,7 +417,13 @@ class StockWindow(ctk.CTkToplevel):
             self.abrir_detalles_producto(prodID, values)
     
     def abrir_detalles_producto(self, prodID, valores):
-        detalles_generales = self.inventario_manager.obtener_detalles_generales_producto(valores[1])
+        def leer():
+            return (self.inventario_manager.obtener_detalles_generales_producto(valores[1]),
+                    self.inventario_manager.obtener_detalle_lotes(prodID))
+        self.cargador.cargar("detalle", leer,
+                             lambda r: self._mostrar_detalle_lotes(prodID, valores, *r))
+
+    def _mostrar_detalle_lotes(self, prodID, valores, detalles_generales, detalles):
         producto = {
             "prodID": prodID,
             "nombre": valores[1],
@@ -401,7 +432,6 @@ class StockWindow(ctk.CTkToplevel):
             "principioActivo": detalles_generales.get("principioActivo", "No Disponible"),
             "laboratorio": detalles_generales.get("laboratorio", "No Disponible")
         }
-        detalles = self.inventario_manager.obtener_detalle_lotes(prodID)
         if not detalles:
             messagebox.showinfo("Detalle", "No se encontraron detalles de lotes para este producto.", parent=self)
             return
@@ -465,17 +495,36 @@ class StockWindow(ctk.CTkToplevel):
             "lote": lote,
             "vencimiento": vencimiento
         }
-        if self.stock_manager.agregar_o_actualizar_producto(producto):
-            messagebox.showinfo("Éxito", "Producto agregado/actualizado correctamente.")
-            self.combo_busqueda.set("Stock")
-            self.cambiar_origen("Stock")
-            self.cargar_productos()
-            self.entry_nombre.delete(0, "end")
-            self.entry_precio.delete(0, "end")
-            self.entry_stock.delete(0, "end")
-            self.entry_lote.delete(0, "end")
-        else:
-            messagebox.showerror("Error", "No se pudo agregar/actualizar el producto.")
+        # Los diálogos de conflicto de precio o de lote vuelven al hilo de Tk
+        self._guardar(lambda: self.stock_manager.agregar_o_actualizar_producto(producto, self.cargador.en_hilo_tk),
+                      "Producto agregado/actualizado correctamente.",
+                      "No se pudo agregar/actualizar el producto.",
+                      self._al_agregar)
+
+    def _al_agregar(self):
+        self.combo_busqueda.set("Stock")
+        self.cambiar_origen("Stock")
+        self.entry_nombre.delete(0, "end")
+        self.entry_precio.delete(0, "end")
+        self.entry_stock.delete(0, "end")
+        self.entry_lote.delete(0, "end")
+
+    def _guardar(self, funcion, exito, error, al_confirmar=None):
+        """
+        Ejecuta un alta/cambio del gestor en segundo plano e informa el
+        resultado; la tabla se actualiza con el evento que publica el gestor.
+        Se ignora mientras haya otro en curso.
+        """
+        if self.cargador.en_curso("guardar"):
+            return
+        def informar(ok):
+            if ok:
+                messagebox.showinfo("Éxito", exito, parent=self)
+                if al_confirmar:
+                    al_confirmar()
+            else:
+                messagebox.showerror("Error", error, parent=self)
+        self.cargador.cargar("guardar", funcion, informar)
     
     def modificar(self):
         selected = self.tree.focus()
@@ -493,11 +542,8 @@ class StockWindow(ctk.CTkToplevel):
         except ValueError:
             messagebox.showerror("Error de Datos", "El precio debe ser numérico.")
             return
-        if self.stock_manager.modificar_producto(self, product_id, {"nombre": nombre, "precio": precio}):
-            messagebox.showinfo("Éxito", "Producto modificado correctamente.")
-            self.cargar_productos()
-        else:
-            messagebox.showerror("Error", "No se pudo modificar el producto.")
+        self._guardar(lambda: self.stock_manager.modificar_producto(self, product_id, {"nombre": nombre, "precio": precio}),
+                      "Producto modificado correctamente.", "No se pudo modificar el producto.")
     
     def eliminar(self):
         sel = self.tree.focus()
@@ -511,11 +557,8 @@ class StockWindow(ctk.CTkToplevel):
         if razon is None:
             return  # cancelado
 
-        if self.stock_manager.eliminar_producto(prod_id, razon.strip()):
-            messagebox.showinfo("Éxito", "Producto archivado.", parent=self)
-            self.cambiar_origen(self.combo_busqueda.get())
-        else:
-            messagebox.showerror("Error", "No se pudo archivar el producto.", parent=self)
+        self._guardar(lambda: self.stock_manager.eliminar_producto(prod_id, razon.strip()),
+                      "Producto archivado.", "No se pudo archivar el producto.")
 
     
     def restaurar_producto(self):
@@ -527,19 +570,8 @@ class StockWindow(ctk.CTkToplevel):
         prod_id = valores[0]
         if not messagebox.askyesno("Confirmar", "¿Desea restaurar este producto?"):
             return
-        try:
-            from datos.conexion_bd import ConexionBD
-            conexion = ConexionBD.obtener_conexion()
-            cursor = conexion.cursor()
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute("UPDATE productos SET activo = 1 WHERE prodID = %s", (prod_id,))
-            conexion.commit()
-            cursor.close()
-            conexion.close()
-            messagebox.showinfo("Éxito", "Producto restaurado correctamente.")
-            self.cargar_productos_archivados()
-        except Exception as ex:
-            messagebox.showerror("Error", str(ex))
+        self._guardar(lambda: self.stock_manager.restaurar_producto(prod_id),
+                      "Producto restaurado correctamente.", "No se pudo restaurar el producto.")
     
 if __name__ == "__main__":
     app = StockWindow()
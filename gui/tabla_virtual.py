@@ -0,0 +1,416 @@
+# src/gui/tabla_virtual.py
+"""
+Tabla virtualizada sobre un ttk.Treeview.
+
+El Treeview solo contiene los ítems de las filas visibles (uno por renglón
+en pantalla, reutilizados al desplazarse); los datos se piden a la fuente de
+a páginas a medida que se recorren y se conservan unas pocas en memoria.
+Así el tiempo de carga y la memoria no dependen de la cantidad de resultados.
+
+Una fuente es cualquier objeto con:
+    contar() -> int
+    pagina(desde, cantidad) -> list
+FuenteLista envuelve una lista ya obtenida; FuentePaginada, un par de
+métodos de un gestor (p. ej. contar_vademecum / obtener_vademecum_pagina).
+
+Con un CargadorAsync (gui/cargador_async.py) las páginas que no están en
+memoria y los totales de refrescar() se leen en segundo plano: mientras
+tanto los renglones muestran "Cargando…" y se repintan al llegar los datos.
+El hilo de Tk solo consulta la base si no hay cargador.
+"""
+import tkinter.font as tkFont
+from collections import OrderedDict
+from tkinter import ttk
+
+
+class FuenteLista:
+    en_memoria = True   # se lee en el hilo de Tk sin consultar la base
+
+    def __init__(self, filas):
+        self.filas = list(filas)
+
+    def contar(self) -> int:
+        return len(self.filas)
+
+    def pagina(self, desde, cantidad) -> list:
+        return self.filas[desde:desde + cantidad]
+
+
+class FuentePaginada:
+    en_memoria = False
+
+    def __init__(self, contar, pagina):
+        self._contar = contar
+        self._pagina = pagina
+        self._total_previo = None
+        self._primera_previa = None
+
+    def precargar(self, cantidad=None):
+        """
+        Lee el total y la primera página por adelantado (desde un hilo de
+        gui.cargador_async), para que cargar() no consulte la base. Lo
+        precargado se usa una sola vez: refrescar() vuelve a leer.
+        """
+        cantidad = cantidad or TablaVirtual.TAMANIO_PAGINA
+        self._total_previo = self._contar()
+        self._primera_previa = (cantidad, self._pagina(0, cantidad))
+        return self
+
+    def contar(self) -> int:
+        if self._total_previo is not None:
+            total, self._total_previo = self._total_previo, None
+            return total
+        return self._contar()
+
+    def pagina(self, desde, cantidad) -> list:
+        previa, self._primera_previa = self._primera_previa, None
+        if previa is not None and desde == 0 and previa[0] == cantidad:
+            return previa[1]
+        return self._pagina(desde, cantidad)
+
+
+class TablaVirtual:
+    """
+    Controla 'tree' y su barra de desplazamiento vertical 'scrollbar'.
+
+      cargar(fuente, valores, etiquetas)  muestra una fuente nueva desde el inicio;
+          'valores(fila)' retorna la tupla de celdas y 'etiquetas(fila)' (opcional)
+          los tags del ítem.
+      refrescar()                         vuelve a leer la fuente conservando la posición.
+      releer()                            lo mismo que refrescar() pero leyendo en segundo
+          plano: retorna la función para el hilo; su resultado se pasa a refrescar().
+      fila_seleccionada()                 fila de datos seleccionada (o None).
+
+    Los ítems visibles tienen iids "v0", "v1", ...; los valores mostrados
+    siempre corresponden a la fila que ocupa ese renglón, de modo que
+    tree.focus() / tree.item(iid, "values") siguen funcionando.
+
+    cargar() lee el total y la primera página en el momento: la fuente debe
+    ser una FuenteLista o venir precargada (FuentePaginada.precargar, desde el
+    cargador). Con 'cargador' el resto de las páginas y refrescar() no
+    consultan la base en el hilo de Tk.
+    """
+    TAMANIO_PAGINA = 200
+    PAGINAS_EN_MEMORIA = 8
+    MARCADOR_CARGA = ("Cargando…",)
+
+    def __init__(self, tree, scrollbar, tamanio_pagina=None, paginas_en_memoria=None, cargador=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.cargador = cargador
+        self.tamanio_pagina = tamanio_pagina or self.TAMANIO_PAGINA
+        self.paginas_en_memoria = paginas_en_memoria or self.PAGINAS_EN_MEMORIA
+
+        self._fuente = None
+        self._valores = None
+        self._etiquetas = None
+        self._total = 0
+        self._inicio = 0
+        self._seleccion = None
+        self._paginas = OrderedDict()
+        self._pedidas = set()     # números de página que se están leyendo
+        self._visibles = int(tree.cget("height") or 10)
+
+        scrollbar.configure(command=self._desplazar)
+        tree.configure(yscrollcommand="")
+        tree.bind("<Configure>", self._al_redimensionar, add="+")
+        tree.bind("<<TreeviewSelect>>", self._al_seleccionar, add="+")
+        tree.bind("<MouseWheel>", self._rueda, add="+")
+        tree.bind("<Button-4>", lambda e: self._mover(-3), add="+")
+        tree.bind("<Button-5>", lambda e: self._mover(3), add="+")
+        for tecla, paso in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-pagina"),
+                            ("<Next>", "pagina"), ("<Home>", "inicio"), ("<End>", "fin")):
+            tree.bind(tecla, lambda e, p=paso: self._tecla(p), add="+")
+
+    # --- API ---
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def fuente(self):
+        return self._fuente
+
+    def cargar(self, fuente, valores, etiquetas=None):
+        self._cancelar_pedidas()
+        self._fuente = fuente
+        self._valores = valores
+        self._etiquetas = etiquetas
+        self._inicio = 0
+        self._seleccion = None
+        self.tree.selection_remove(self.tree.selection())
+        total = fuente.contar()
+        paginas = {0: fuente.pagina(0, self.tamanio_pagina)} if total else {}
+        self.refrescar((fuente, total, paginas))
+
+    def releer(self):
+        """
+        Retorna una función sin argumentos que lee el total y las páginas de
+        la posición actual sin tocar widgets, para gui.cargador_async:
+
+            self.cargador.cargar("refresco", self.tabla.releer(), self.tabla.refrescar)
+        """
+        fuente, tamanio = self._fuente, self.tamanio_pagina
+        numeros = range(self._inicio // tamanio, max(self._inicio, self._fin() - 1) // tamanio + 1)
+
+        def leer():
+            if fuente is None:
+                return None
+            return fuente, fuente.contar(), {n: fuente.pagina(n * tamanio, tamanio) for n in numeros}
+        return leer
+
+    def refrescar(self, leido=None):
+        """
+        Vuelve a leer la fuente conservando la posición. Con 'leido' (resultado
+        de releer()) no consulta la fuente, salvo por las páginas que falten si
+        mientras tanto cambió la posición; si la tabla ya muestra otra fuente,
+        no hace nada. Sin 'leido' y con cargador, la lectura se hace en
+        segundo plano.
+        """
+        if leido is None and self._asincronica():
+            self.cargador.cargar((id(self), "refresco"), self.releer(), self.refrescar)
+            return
+        if leido is not None and leido[0] is not self._fuente:
+            return
+        self._cancelar_pedidas()
+        self._paginas.clear()
+        if leido is not None:
+            _, self._total, paginas = leido
+            self._paginas.update(paginas)
+        else:
+            self._total = self._fuente.contar() if self._fuente is not None else 0
+        if self._seleccion is not None and self._seleccion >= self._total:
+            self._seleccion = None
+        self._inicio = max(0, min(self._inicio, self._total - self._visibles))
+        self._pintar()
+
+    def limpiar(self):
+        self.cargar(FuenteLista([]), lambda fila: ())
+
+    def fila_cargada(self, indice) -> bool:
+        return indice // self.tamanio_pagina in self._paginas
+
+    def actualizar_filas(self, filas, clave) -> int:
+        """
+        Reemplaza las filas leídas cuya 'clave(fila)' coincide con la de alguna
+        de 'filas' y vuelve a pintar; no consulta la fuente. Las que no están
+        en memoria se leerán actualizadas al llegar a su página. Retorna
+        cuántas se reemplazaron.
+        """
+        nuevas = {clave(f): f for f in filas}
+        if not nuevas:
+            return 0
+        reemplazadas = sum(self._reemplazar(pagina, nuevas, clave) for pagina in self._paginas.values())
+        if isinstance(self._fuente, FuenteLista):
+            # Las páginas de una lista son copias: también se actualiza el original
+            self._reemplazar(self._fuente.filas, nuevas, clave)
+        if reemplazadas:
+            self._pintar()
+        return reemplazadas
+
+    @staticmethod
+    def _reemplazar(lista, nuevas, clave) -> int:
+        reemplazadas = 0
+        for i, fila in enumerate(lista):
+            nueva = nuevas.get(clave(fila))
+            if nueva is not None:
+                lista[i] = nueva
+                reemplazadas += 1
+        return reemplazadas
+
+    def fila_seleccionada(self):
+        if self._seleccion is None:
+            return None
+        return self._fila(self._seleccion)
+
+    def valores_leidos(self) -> list:
+        """
+        Celdas de las filas ya leídas de la fuente: todas las de una
+        FuenteLista, las páginas en memoria de una paginada. Sirve para
+        dimensionar las columnas sin recorrer el Treeview.
+        """
+        if isinstance(self._fuente, FuenteLista):
+            filas = self._fuente.filas
+        else:
+            filas = [f for pagina in self._paginas.values() for f in pagina]
+        return [self._valores(f) for f in filas]
+
+    def filas_visibles(self) -> list:
+        return [f for f in (self._fila(i) for i in range(self._inicio, self._fin())) if f is not None]
+
+    def seleccionar(self, indice):
+        if not self._total:
+            return
+        indice = max(0, min(indice, self._total - 1))
+        self._seleccion = indice
+        if indice < self._inicio:
+            self._ir_a(indice)
+        elif indice >= self._inicio + self._visibles:
+            self._ir_a(indice - self._visibles + 1)
+        self._sincronizar_seleccion()
+
+    # --- Datos ---
+    def _asincronica(self) -> bool:
+        return (self.cargador is not None and self._fuente is not None
+                and not getattr(self._fuente, "en_memoria", False))
+
+    def _fila(self, indice):
+        """
+        Fila 'indice' de la fuente, o None si su página todavía se está
+        leyendo en segundo plano.
+        """
+        numero, resto = divmod(indice, self.tamanio_pagina)
+        pagina = self._paginas.get(numero)
+        if pagina is None:
+            if self._asincronica():
+                self._pedir_pagina(numero)
+                return None
+            pagina = self._fuente.pagina(numero * self.tamanio_pagina, self.tamanio_pagina)
+            self._guardar_pagina(numero, pagina)
+        else:
+            self._paginas.move_to_end(numero)
+        return pagina[resto] if resto < len(pagina) else None
+
+    def _guardar_pagina(self, numero, pagina):
+        self._paginas[numero] = pagina
+        if len(self._paginas) > self.paginas_en_memoria:
+            self._paginas.popitem(last=False)
+
+    def _pedir_pagina(self, numero):
+        if numero in self._pedidas:
+            return
+        self._pedidas.add(numero)
+        fuente, tamanio = self._fuente, self.tamanio_pagina
+        self.cargador.cargar((id(self), "pagina", numero),
+                             lambda: fuente.pagina(numero * tamanio, tamanio),
+                             lambda filas: self._recibir_pagina(fuente, numero, filas),
+                             lambda error: self._fallo_pagina(fuente, numero, error))
+
+    def _recibir_pagina(self, fuente, numero, filas):
+        if fuente is not self._fuente:
+            return
+        self._pedidas.discard(numero)
+        self._guardar_pagina(numero, filas)
+        primera, ultima = self._paginas_visibles()
+        if primera <= numero <= ultima:
+            self._pintar()
+
+    def _fallo_pagina(self, fuente, numero, error):
+        # Se vuelve a pedir la próxima vez que se pinte ese renglón
+        if fuente is self._fuente:
+            self._pedidas.discard(numero)
+        print("No se pudo leer la página de la tabla:", error)
+
+    def _paginas_visibles(self):
+        return self._inicio // self.tamanio_pagina, max(self._inicio, self._fin() - 1) // self.tamanio_pagina
+
+    def _cancelar_pedidas(self, conservar=()):
+        """
+        Descarta las lecturas de páginas en curso, salvo las de 'conservar'.
+        """
+        for numero in list(self._pedidas):
+            if numero not in conservar:
+                self.cargador.cancelar((id(self), "pagina", numero))
+                self._pedidas.discard(numero)
+
+    def _fin(self) -> int:
+        return min(self._total, self._inicio + self._visibles)
+
+    # --- Dibujo ---
+    def _pintar(self):
+        n = self._fin() - self._inicio
+        existentes = self.tree.get_children()
+        if len(existentes) > n:
+            self.tree.delete(*existentes[n:])
+        for i in range(len(existentes), n):
+            self.tree.insert("", "end", iid=f"v{i}")
+        for i in range(n):
+            fila = self._fila(self._inicio + i)
+            if fila is None:
+                cargando = not self.fila_cargada(self._inicio + i)
+                self.tree.item(f"v{i}", values=self.MARCADOR_CARGA if cargando else (), tags=())
+                continue
+            self.tree.item(f"v{i}", values=self._valores(fila),
+                           tags=self._etiquetas(fila) if self._etiquetas else ())
+        self._sincronizar_seleccion()
+        if self._total:
+            self.scrollbar.set(self._inicio / self._total, self._fin() / self._total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _sincronizar_seleccion(self):
+        # La selección sigue a la fila de datos, no al renglón
+        if self._seleccion is not None and self._inicio <= self._seleccion < self._fin():
+            iid = f"v{self._seleccion - self._inicio}"
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+            self.tree.focus("")
+
+    def _ir_a(self, inicio):
+        inicio = max(0, min(int(inicio), self._total - self._visibles))
+        if inicio != self._inicio:
+            self._inicio = inicio
+            if self._pedidas:
+                # Las páginas que se dejaron atrás ya no hace falta leerlas
+                primera, ultima = self._paginas_visibles()
+                self._cancelar_pedidas(conservar=range(primera, ultima + 1))
+            self._pintar()
+
+    # --- Eventos ---
+    def _desplazar(self, accion, valor, unidad=None):
+        if accion == "moveto":
+            self._ir_a(round(float(valor) * self._total))
+        elif accion == "scroll":
+            paso = int(valor) * (self._visibles if unidad == "pages" else 1)
+            self._ir_a(self._inicio + paso)
+
+    def _mover(self, paso):
+        self._ir_a(self._inicio + paso)
+        return "break"
+
+    def _rueda(self, event):
+        # Windows informa múltiplos de 120; macOS, valores pequeños
+        paso = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        return self._mover(paso * 3)
+
+    def _tecla(self, paso):
+        actual = self._seleccion if self._seleccion is not None else self._inicio - 1
+        if paso == "pagina":
+            destino = actual + self._visibles
+        elif paso == "-pagina":
+            destino = actual - self._visibles
+        elif paso == "inicio":
+            destino = 0
+        elif paso == "fin":
+            destino = self._total - 1
+        else:
+            destino = actual + paso
+        self.seleccionar(destino)
+        return "break"
+
+    def _al_seleccionar(self, _event):
+        seleccion = self.tree.selection()
+        if seleccion and seleccion[0].startswith("v"):
+            self._seleccion = self._inicio + int(seleccion[0][1:])
+
+    def _al_redimensionar(self, event):
+        visibles = max(1, (event.height - self._alto_encabezado()) // self._alto_renglon())
+        if visibles != self._visibles:
+            self._visibles = visibles
+            self._inicio = max(0, min(self._inicio, self._total - self._visibles))
+            self._pintar()
+
+    def _alto_renglon(self) -> int:
+        alto = ttk.Style(self.tree).lookup(self.tree.cget("style") or "Treeview", "rowheight")
+        try:
+            return max(1, int(alto))
+        except (TypeError, ValueError):
+            return tkFont.nametofont("TkDefaultFont").metrics("linespace") + 3
+
+    def _alto_encabezado(self) -> int:
+        if "headings" not in str(self.tree.cget("show")):
+            return 0
+        return self._alto_renglon() + 4
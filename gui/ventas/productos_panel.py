@@ -1,9 +1,11 @@
 # src/gui/ventas/productos_panel.py
 import customtkinter as ctk
-from tkinter import ttk, font as tkFont
+from tkinter import ttk
+from gui.tabla_virtual import TablaVirtual, FuenteLista
+from utils import anchos_columnas
 
 class PanelProductos(ctk.CTkFrame):
-    def __init__(self, master, on_buscar, on_refrescar, on_seleccion, on_agregar, cantidad_var):
+    def __init__(self, master, on_buscar, on_refrescar, on_seleccion, on_agregar, cantidad_var, cargador=None):
         super().__init__(master, fg_color="#408E57")
 
         self.on_seleccion = on_seleccion
@@ -42,12 +44,14 @@ class PanelProductos(ctk.CTkFrame):
         self.tree.tag_configure("warning", background="#ffffcc", foreground="#666600")
         self.tree.tag_configure("ok", background="#ccffcc", foreground="#006600")
         self.tree.grid(row=0, column=0, sticky="nsew")
-        scrollbar = ctk.CTkScrollbar(self.tree_frame, orientation="vertical", command=self.tree.yview)
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ctk.CTkScrollbar(self.tree_frame, orientation="vertical", command=self.tree.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
         self.tree_frame.columnconfigure(0, weight=1)
         self.tree_frame.rowconfigure(0, weight=1)
         self.tree.bind("<<TreeviewSelect>>", on_seleccion)
+        # Solo las filas visibles existen como ítems del Treeview
+        self.tabla = TablaVirtual(self.tree, self.scrollbar, cargador=cargador)
 
         ctk.CTkButton(self, text="Refrescar Lista", command=on_refrescar).pack(padx=5, pady=5)
 
@@ -70,19 +74,23 @@ class PanelProductos(ctk.CTkFrame):
         return self.entry_search.get().strip()
 
     def cargar_productos(self, productos):
-        self.tree.delete(*self.tree.get_children())
-        for prod in productos:
-            item = self.tree.insert("", "end", values=(
-                prod["prodID"], prod["nombre"], prod["precio"], prod["stock"], prod["indicador"]
-            ))
-            if prod["indicador"] == "Crítico":
-                self.tree.item(item, tags=("critical",))
-            elif prod["indicador"] == "Preocupante":
-                self.tree.item(item, tags=("warning",))
-            else:
-                self.tree.item(item, tags=("ok",))
+        """
+        'productos' es una lista o una fuente paginada (ver gui.tabla_virtual).
+        """
+        fuente = FuenteLista(productos) if isinstance(productos, list) else productos
+        self.tabla.cargar(fuente, self._valores, self._etiquetas)
         self.ajustar_ancho_columnas()
 
+    def _valores(self, prod):
+        return (prod["prodID"], prod["nombre"], prod["precio"], prod["stock"], prod["indicador"])
+
+    def _etiquetas(self, prod):
+        if prod["indicador"] == "Crítico":
+            return ("critical",)
+        elif prod["indicador"] == "Preocupante":
+            return ("warning",)
+        return ("ok",)
+
     def obtener_producto_seleccionado(self):
         item = self.tree.focus()
         if not item:
@@ -127,14 +135,5 @@ class PanelProductos(ctk.CTkFrame):
             self.cantidad_var.set(str(actual + 1))
 
     def ajustar_ancho_columnas(self):
-        # Se obtiene la fuente por defecto del sistema (TkDefaultFont)
-        tree_font = tkFont.nametofont("TkDefaultFont")
-        for col in self.tree["columns"]:
-            max_width = tree_font.measure(col) + 10
-            for item in self.tree.get_children():
-                cell_text = str(self.tree.set(item, col))
-                cell_width = tree_font.measure(cell_text) + 10
-                if cell_width > max_width:
-                    max_width = cell_width
-            self.tree.column(col, width=max_width)
+        anchos_columnas.aplicar(self.tree, self.tabla.valores_leidos())
 
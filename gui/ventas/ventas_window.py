@@ -4,12 +4,17 @@ import customtkinter as ctk
 from tkinter import messagebox, Toplevel
 from gui.login import icono_logotipo
 from gui.ventas.productos_panel import PanelProductos
+from gui.tabla_virtual import FuentePaginada
+from gui.cargador_async import CargadorAsync
+from gui.busqueda_incremental import BusquedaIncremental
+from logica import eventos
 from gui.ventas.carrito_panel import PanelCarrito
 from gui.ventas.controlador_carrito import ControladorCarrito
 from logica.gestor_stock import StockManager
 from logica.gestor_ventas import VentaManager
 from logica.generar_remito import RemitoGenerator
 from utils.utilidades import Utilidades
+import config
 
 class VentasWindow(ctk.CTkToplevel):
     def __init__(self, master=None):
@@ -22,6 +27,7 @@ class VentasWindow(ctk.CTkToplevel):
         self.stock_manager       = StockManager()
         self.venta_manager       = VentaManager()
         self.controlador_carrito = ControladorCarrito(self.stock_manager)
+        self.cargador            = CargadorAsync(self)
 
         # variables
         self.quantity_var           = ctk.StringVar(value="1")
@@ -34,6 +40,7 @@ class VentasWindow(ctk.CTkToplevel):
         self.fechaVencimientoRemito = None
 
         self._build_layout()
+        self.busqueda = BusquedaIncremental(self.panel_productos.entry_search, self.buscar_productos)
         self.cargar_productos()
 
     def _build_layout(self):
@@ -49,7 +56,8 @@ class VentasWindow(ctk.CTkToplevel):
             on_refrescar=self.cargar_productos,
             on_seleccion=self.seleccionar_producto,
             on_agregar=self.agregar_al_carrito,
-            cantidad_var=self.quantity_var
+            cantidad_var=self.quantity_var,
+            cargador=self.cargador
         )
         self.panel_productos.grid(row=0, column=0, sticky="nsew")
 
@@ -100,17 +108,33 @@ class VentasWindow(ctk.CTkToplevel):
         self.combo_tipo_factura.pack(side="left", padx=5)
         ctk.CTkButton(self, text="Volver", command=self.destroy).pack(pady=10)
 
-        self.bind("<<DatosActualizados>>", lambda e: self.cargar_productos())
+        # Ventas y ediciones confirmadas actualizan solo las filas afectadas
+        self.cargador.suscribir(eventos.ProductoCambiado, self._al_cambiar_productos)
 
-    def cargar_productos(self):
-        productos = self.stock_manager.obtener_productos()
-        self.panel_productos.cargar_productos(productos)
+    def _al_cambiar_productos(self, evento):
+        if evento.accion == eventos.MODIFICACION:
+            self.cargador.cargar(("productos", evento.ids),
+                                 lambda: self.stock_manager.obtener_productos_por_ids(evento.ids),
+                                 lambda filas: self.panel_productos.tabla.actualizar_filas(
+                                     filas, clave=lambda p: p["prodID"]))
+        else:
+            # Cambió qué productos hay: se vuelven a leer el total y la página visible
+            tabla = self.panel_productos.tabla
+            self.cargador.cargar("refresco", tabla.releer(), tabla.refrescar)
+
+    def cargar_productos(self, termino=""):
+        # La tabla pide a StockManager solo las páginas que se recorren; el
+        # total y la primera se leen en segundo plano. Una búsqueda muestra a
+        # lo sumo config.busqueda_limite resultados.
+        limite = config.busqueda_limite if termino else None
+        fuente = FuentePaginada(
+            lambda: self.stock_manager.contar_productos(termino, limite),
+            lambda desde, cantidad: self.stock_manager.obtener_productos_pagina(desde, cantidad, termino)
+        )
+        self.cargador.cargar("productos", fuente.precargar, self.panel_productos.cargar_productos)
 
     def buscar_productos(self):
-        término = self.panel_productos.obtener_termino_busqueda().lower()
-        todos = self.stock_manager.obtener_productos()
-        filtrados = [p for p in todos if término in p["nombre"].lower()]
-        self.panel_productos.cargar_productos(filtrados)
+        self.cargar_productos(self.panel_productos.obtener_termino_busqueda())
 
     def seleccionar_producto(self, event=None):
         self.selected_product = self.panel_productos.obtener_producto_seleccionado()
@@ -238,7 +262,6 @@ class VentasWindow(ctk.CTkToplevel):
                 )
             self.controlador_carrito.limpiar()
             self._render_carrito()
-            self.cargar_productos()
         else:
             messagebox.showerror("Error", msg, parent=self)
 
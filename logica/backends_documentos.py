@@ -0,0 +1,270 @@
+# src/logica/backends_documentos.py
+import abc
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+import time
+from xml.sax.saxutils import escape
+
+import config
+from logica.cache_plantillas import obtener_cache
+
+
+class BackendDocumentos(abc.ABC):
+    """
+    Interfaz común de los backends que producen el PDF de facturas y remitos.
+
+    Cada backend recibe el generador (FacturaGenerator / RemitoGenerator, que
+    conoce su plantilla y cómo insertar la tabla), el contexto ya armado y las
+    filas de la tabla, y deja el PDF en 'ruta_pdf'.
+    """
+    nombre = ""
+
+    @abc.abstractmethod
+    def generar_factura(self, generador, ctx, detalles, ruta_pdf):
+        ...
+
+    @abc.abstractmethod
+    def generar_remito(self, generador, ctx, carrito, ruta_pdf):
+        ...
+
+
+class _BackendPlantillaDocx(BackendDocumentos):
+    """
+    Base de los backends que renderizan la plantilla .docx con docxtpl y luego
+    la convierten a PDF. Las subclases implementan convertir().
+    """
+    def _renderizar(self, generador, ctx, filas, ruta_pdf):
+        # La plantilla sale de la caché en memoria (se lee del disco una vez)
+        doc = obtener_cache().nueva(generador.plantilla)
+        doc.render(ctx)
+        generador.insert_table_in_doc(doc, filas)
+
+        ruta_docx = os.path.splitext(ruta_pdf)[0] + ".docx"
+        doc.save(ruta_docx)
+        try:
+            self.convertir(ruta_docx, ruta_pdf)
+        finally:
+            if os.path.exists(ruta_docx):
+                os.remove(ruta_docx)
+        return ruta_pdf
+
+    def generar_factura(self, generador, ctx, detalles, ruta_pdf):
+        return self._renderizar(generador, ctx, detalles, ruta_pdf)
+
+    def generar_remito(self, generador, ctx, carrito, ruta_pdf):
+        return self._renderizar(generador, ctx, carrito, ruta_pdf)
+
+    @abc.abstractmethod
+    def convertir(self, ruta_docx, ruta_pdf):
+        ...
+
+
+class BackendDocx2Pdf(_BackendPlantillaDocx):
+    """
+    Conversión con docx2pdf (requiere Microsoft Word; solo Windows/macOS).
+    Es el comportamiento histórico del sistema.
+    """
+    nombre = "docx2pdf"
+
+    def convertir(self, ruta_docx, ruta_pdf):
+        from docx2pdf import convert
+        convert(ruta_docx, ruta_pdf)
+
+
+class BackendLibreOffice(_BackendPlantillaDocx):
+    """
+    Conversión a través de un LibreOffice headless de larga vida, controlado
+    con unoserver (https://pypi.org/project/unoserver/). El proceso se lanza
+    una única vez y se reutiliza para todos los documentos, evitando el costo
+    de arranque por conversión. Funciona en Linux.
+
+    Con lanzar=False solo se conecta a un servidor ya iniciado por otro
+    proceso (p. ej. los procesos hijos de un pool).
+    """
+    nombre = "libreoffice"
+
+    def __init__(self, host=None, puerto=None, lanzar=True):
+        self.host = host or config.libreoffice_host
+        self.puerto = int(puerto or config.libreoffice_puerto)
+        self.lanzar = lanzar
+        self._proceso = None
+        self._cliente = None
+
+    def _servidor_activo(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.puerto), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def asegurar_servidor(self):
+        """
+        Inicia el servidor si no está escuchando en host:puerto.
+        """
+        if self._servidor_activo():
+            return
+        if not self.lanzar:
+            raise RuntimeError(f"LibreOffice no responde en {self.host}:{self.puerto}.")
+        ejecutable = shutil.which("unoserver")
+        if ejecutable is None:
+            raise RuntimeError("No se encontró 'unoserver'. Instale el paquete unoserver y LibreOffice.")
+        self._proceso = subprocess.Popen(
+            [ejecutable, "--interface", self.host, "--port", str(self.puerto)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        # El servidor lo lanzó este proceso: no debe sobrevivirlo
+        atexit.register(self.cerrar)
+        limite = time.monotonic() + 30
+        while not self._servidor_activo():
+            if self._proceso.poll() is not None or time.monotonic() > limite:
+                raise RuntimeError("No se pudo iniciar LibreOffice en modo headless.")
+            time.sleep(0.2)
+
+    def convertir(self, ruta_docx, ruta_pdf):
+        from unoserver.client import UnoClient
+
+        self.asegurar_servidor()
+        if self._cliente is None:
+            self._cliente = UnoClient(server=self.host, port=str(self.puerto))
+        self._cliente.convert(inpath=ruta_docx, outpath=ruta_pdf, convert_to="pdf")
+
+    def cerrar(self):
+        if self._proceso is not None:
+            self._proceso.terminate()
+            try:
+                self._proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._proceso.kill()
+            self._proceso = None
+            atexit.unregister(self.cerrar)
+            self._cliente = None
+
+
+def _valor(ctx, clave):
+    """
+    Valor del contexto listo para insertarse en un Paragraph de ReportLab
+    (los Paragraph interpretan marcado, por eso se escapa).
+    """
+    valor = ctx.get(clave)
+    return escape("" if valor is None else str(valor))
+
+
+class BackendReportLab(BackendDocumentos):
+    """
+    Genera el PDF directamente con ReportLab, a partir de los mismos contextos
+    que usan las plantillas .docx. No depende de Word ni de LibreOffice.
+    """
+    nombre = "reportlab"
+
+    def _estilos(self):
+        from reportlab.lib.styles import getSampleStyleSheet
+        estilos = getSampleStyleSheet()
+        return estilos["Title"], estilos["Normal"]
+
+    def _tabla(self, encabezados, filas, anchos):
+        from reportlab.lib import colors
+        from reportlab.platypus import Table, TableStyle
+
+        tabla = Table([encabezados] + filas, colWidths=anchos, repeatRows=1)
+        tabla.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("LINEBELOW", (0, 0), (-1, 0), 0.8, colors.black),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]))
+        return tabla
+
+    def _iva(self, ctx):
+        etiquetas = [
+            ("ivaExento", "Exento"), ("ivaMonotributo", "Monotributo"),
+            ("ivaRespInsc", "Resp. Insc."), ("ivaEventual", "Eventual"),
+            ("ivaConsFinal", "Cons. Final"),
+        ]
+        return "IVA: " + "   ".join(f"{ctx.get(clave, '○')} {texto}" for clave, texto in etiquetas)
+
+    def _construir(self, ruta_pdf, bloques):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+
+        doc = SimpleDocTemplate(ruta_pdf, pagesize=A4, title=os.path.basename(ruta_pdf))
+        doc.build(bloques)
+        return ruta_pdf
+
+    def generar_factura(self, generador, ctx, detalles, ruta_pdf):
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, Spacer
+
+        titulo, normal = self._estilos()
+        filas = [
+            [str(d["cantidad"]), Paragraph(escape(str(d["nombre"])), normal),
+             f"${d['precioUnitario']:.2f}", f"${d['subtotal']:.2f}"]
+            for d in detalles
+        ]
+        bloques = [
+            Paragraph(f"Factura {_valor(ctx, 'tipoFactura')} N.º {_valor(ctx, 'facturaID')}", titulo),
+            Paragraph(f"Fecha: {_valor(ctx, 'fecha')} &nbsp;&nbsp; Hora: {_valor(ctx, 'hora')}", normal),
+            Spacer(1, 4 * mm),
+            Paragraph(f"Cliente: {_valor(ctx, 'clienteNombre')} (ID {_valor(ctx, 'clienteID')})", normal),
+            Paragraph(f"CUIT/CUIL: {_valor(ctx, 'clienteCUIT_CUIL')}", normal),
+            Paragraph(self._iva(ctx), normal),
+            Spacer(1, 6 * mm),
+            self._tabla(["Cantidad", "Producto", "Precio Unit.", "Sub-total"], filas,
+                        [22 * mm, 90 * mm, 30 * mm, 30 * mm]),
+            Spacer(1, 6 * mm),
+            Paragraph(f"Total bruto: ${float(ctx.get('total_bruto', 0)):.2f}", normal),
+            Paragraph(f"Descuento: {ctx.get('descuento', '0%')}", normal),
+            Paragraph(f"<b>Total neto: ${float(ctx.get('total_neto', 0)):.2f}</b>", normal),
+        ]
+        return self._construir(ruta_pdf, bloques)
+
+    def generar_remito(self, generador, ctx, carrito, ruta_pdf):
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, Spacer
+
+        titulo, normal = self._estilos()
+        filas = [
+            [Paragraph(escape(str(it.get("nombre", ""))), normal), str(it.get("cantidad", ""))]
+            for it in carrito
+        ]
+        bloques = [
+            Paragraph(f"Remito N.º {_valor(ctx, 'remitoID')}", titulo),
+            Paragraph(f"Fecha: {_valor(ctx, 'fechaInicioRemito')} &nbsp;&nbsp; "
+                      f"Hora: {_valor(ctx, 'horaInicioRemito')}", normal),
+            Paragraph(f"Vencimiento: {_valor(ctx, 'fechaVencRemito')}", normal),
+            Spacer(1, 4 * mm),
+            Paragraph(f"Cliente: {_valor(ctx, 'clienteNombre')} (ID {_valor(ctx, 'clienteID')})", normal),
+            Paragraph(f"CUIT/CUIL: {_valor(ctx, 'clienteCUIT_CUIL')}", normal),
+            Paragraph(f"Dirección: {_valor(ctx, 'clienteDireccion')}", normal),
+            Paragraph(self._iva(ctx), normal),
+            Spacer(1, 6 * mm),
+            self._tabla(["Producto", "Cantidad"], filas, [130 * mm, 30 * mm]),
+        ]
+        return self._construir(ruta_pdf, bloques)
+
+
+BACKENDS = {
+    BackendDocx2Pdf.nombre: BackendDocx2Pdf,
+    BackendLibreOffice.nombre: BackendLibreOffice,
+    BackendReportLab.nombre: BackendReportLab,
+}
+
+_instancias = {}
+
+def obtener_backend(nombre=None) -> BackendDocumentos:
+    """
+    Retorna (y reutiliza) el backend indicado, o el configurado en
+    config.backend_documentos si no se especifica.
+    """
+    nombre = nombre or config.backend_documentos
+    if nombre not in BACKENDS:
+        raise ValueError(
+            f"Backend de documentos desconocido: '{nombre}'. Opciones: {', '.join(BACKENDS)}"
+        )
+    if nombre not in _instancias:
+        _instancias[nombre] = BACKENDS[nombre]()
+    return _instancias[nombre]
+
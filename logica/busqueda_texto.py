@@ -0,0 +1,95 @@
+# src/logica/busqueda_texto.py
+import unicodedata
+
+"""
+Búsqueda de texto con índices, compartida por los gestores.
+
+El criterio es el de VademecumManager.buscar_vademecum: coinciden los nombres
+que empiezan con el término (B-tree sobre la columna normalizada) y los que
+tienen palabras que empiezan con él (índice FULLTEXT, p. ej. "400" encuentra
+"Ibuprofeno 400"). Solo si ninguno coincide se busca el término en cualquier
+parte del nombre con LIKE '%termino%', que recorre toda la tabla.
+"""
+
+# Caracteres con significado especial en búsquedas FULLTEXT en modo booleano
+_OPERADORES_FULLTEXT = str.maketrans({c: " " for c in '+-<>()~*"@'})
+
+# Largo mínimo de palabra que indexa FULLTEXT en InnoDB (innodb_ft_min_token_size)
+LARGO_MINIMO_FULLTEXT = 3
+
+
+def normalizar(termino) -> str:
+    return (termino or "").strip().lower()
+
+
+def escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def palabras_fulltext(termino: str) -> list:
+    return [p for p in termino.translate(_OPERADORES_FULLTEXT).split() if len(p) >= LARGO_MINIMO_FULLTEXT]
+
+
+def consulta_fulltext(termino: str) -> str:
+    """
+    Convierte el término en una consulta booleana donde cada palabra debe
+    aparecer como prefijo ('+ibu* +400*'). Las palabras más cortas que el
+    mínimo de indexación de InnoDB (3) se descartan.
+    """
+    return " ".join(f"+{p}*" for p in palabras_fulltext(termino))
+
+
+def _sin_acentos(texto: str) -> str:
+    # La intercalación de MySQL tampoco distingue acentos
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def coincide(textos, termino: str) -> bool:
+    """
+    True si alguno de 'textos' coincide con 'termino' según el criterio del
+    módulo, sin distinguir mayúsculas ni acentos. Como no sabe si la base
+    recurrió al respaldo, acepta también el término en cualquier parte: sirve
+    para decidir si una fila modificada entra en los resultados mostrados.
+    """
+    termino = _sin_acentos(normalizar(termino))
+    if not termino:
+        return True
+    textos = [_sin_acentos(str(t or "").lower()) for t in textos]
+    if any(t.startswith(termino) or termino in t for t in textos):
+        return True
+    palabras = palabras_fulltext(termino)
+    if not palabras:
+        return False
+    del_registro = " ".join(textos).split()
+    return all(any(w.startswith(p) for w in del_registro) for p in palabras)
+
+
+def filtro_por_nombre(cursor, termino, tabla, alias, clave, columna_norm, columnas_ft):
+    """
+    Filtro para las filas de 'tabla' (con alias 'alias' en la consulta) cuyo
+    nombre coincide con 'termino'. Retorna (union, condicion, parametros):
+    'union' va después de "FROM tabla alias" y 'condicion' al final del
+    WHERE; 'parametros' corresponde al que no esté vacío.
+
+    Los candidatos (prefijo sobre 'columna_norm' y palabras en 'columnas_ft')
+    se juntan por 'clave' en una tabla derivada, de modo que cada rama usa su
+    índice. Si no hay ninguno se usa LIKE '%termino%'; para saberlo se
+    consulta con 'cursor' si existe al menos un candidato.
+    """
+    termino = normalizar(termino)
+    if not termino:
+        return "", "", ()
+    prefijo = escapar_like(termino) + "%"
+    ramas = [f"SELECT {clave} FROM {tabla} WHERE {columna_norm} LIKE %s"]
+    params = (prefijo,)
+    consulta_ft = consulta_fulltext(termino)
+    if consulta_ft:
+        ramas.append(f"SELECT {clave} FROM {tabla} WHERE MATCH({columnas_ft}) AGAINST (%s IN BOOLEAN MODE)")
+        params += (consulta_ft,)
+
+    cursor.execute("SELECT " + " OR ".join(f"EXISTS({r} LIMIT 1)" for r in ramas) + " AS hay", params)
+    fila = cursor.fetchone()
+    if fila["hay"] if isinstance(fila, dict) else fila[0]:
+        union = f" JOIN ({' UNION '.join(ramas)}) coincidencias ON coincidencias.{clave} = {alias}.{clave}"
+        return union, "", params
+    return "", f" AND {alias}.{columna_norm} LIKE %s", ("%" + escapar_like(termino) + "%",)
@@ -0,0 +1,83 @@
+# src/logica/cache_plantillas.py
+import copy
+import threading
+
+
+class CachePlantillas:
+    """
+    Caché de plantillas .docx por proceso.
+
+    - Cada plantilla se lee y se interpreta (zip + XML) una única vez; cada
+      render parte de una copia profunda de ese documento maestro, sin volver
+      a abrir el archivo ni a parsear su XML.
+    - La posición de la celda que contiene el marcador de tabla
+      (tabla, fila, celda, párrafo) se recuerda tras la primera búsqueda, de
+      modo que los renders siguientes la consultan directamente en lugar de
+      recorrer todas las tablas del documento. Si la posición recordada ya no
+      contiene el marcador (plantilla modificada), se vuelve a buscar.
+    """
+    def __init__(self):
+        self._maestras = {}       # ruta -> DocxTemplate ya interpretado (no se renderiza)
+        self._ubicaciones = {}    # (ruta, marcador) -> (tabla, fila, celda, párrafo)
+        self._candado = threading.Lock()
+
+    def _maestra(self, ruta):
+        maestra = self._maestras.get(ruta)
+        if maestra is None:
+            with self._candado:
+                maestra = self._maestras.get(ruta)
+                if maestra is None:
+                    from docxtpl import DocxTemplate
+                    maestra = DocxTemplate(ruta)
+                    # Las versiones recientes de docxtpl parsean recién en render()
+                    if getattr(maestra, "docx", None) is None:
+                        maestra.init_docx()
+                    self._maestras[ruta] = maestra
+        return maestra
+
+    def nueva(self, ruta):
+        """
+        Retorna un DocxTemplate nuevo, listo para render(): una copia profunda
+        del documento maestro, que nunca se modifica.
+        """
+        return copy.deepcopy(self._maestra(ruta))
+
+    def localizar_marcador(self, ruta, doc, marcador):
+        """
+        Retorna (celda, párrafo) del documento donde está 'marcador', o
+        (None, None) si no se encuentra.
+        """
+        clave = (ruta, marcador)
+        posicion = self._ubicaciones.get(clave)
+        if posicion is not None:
+            t, f, c, p = posicion
+            try:
+                celda = doc.tables[t].rows[f].cells[c]
+                para = celda.paragraphs[p]
+                if marcador in para.text:
+                    return celda, para
+            except IndexError:
+                pass
+
+        for t, tabla in enumerate(doc.tables):
+            for f, row in enumerate(tabla.rows):
+                for c, celda in enumerate(row.cells):
+                    for p, para in enumerate(celda.paragraphs):
+                        if marcador in para.text:
+                            self._ubicaciones[clave] = (t, f, c, p)
+                            return celda, para
+        return None, None
+
+    def limpiar(self):
+        with self._candado:
+            self._maestras.clear()
+            self._ubicaciones.clear()
+
+
+_cache = CachePlantillas()
+
+def obtener_cache() -> CachePlantillas:
+    """
+    Retorna la caché de plantillas compartida por todo el proceso.
+    """
+    return _cache
@@ -0,0 +1,142 @@
+# src/logica/cola_documentos.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from logica.generar_factura import FacturaGenerator
+
+
+def _inicializar_hilo():
+    """
+    docx2pdf usa COM (Microsoft Word) en Windows: cada hilo que convierte
+    documentos necesita su propia inicialización de COM.
+    """
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+
+
+class ColaDocumentos:
+    """
+    Cola de renderizado de facturas en segundo plano.
+
+    La venta se confirma (commit) antes de encolar el documento, así que la
+    generación del PDF nunca mantiene bloqueos sobre lotes ni productos.
+    Los trabajos corren en un pool de hilos; los resultados se entregan al
+    hilo de Tk mediante una cola que se sondea con after() (ver vincular).
+
+    Las facturas cuyo render falla quedan registradas por facturaID y pueden
+    reintentarse con reintentar(): se vuelven a leer de la base y se renderizan
+    de nuevo, sin tocar el stock.
+    """
+    def __init__(self, max_hilos=None):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_hilos or config.hilos_render_documentos,
+            thread_name_prefix="render-documentos",
+            initializer=_inicializar_hilo
+        )
+        self._resultados = queue.Queue()
+        self._fallidas = {}       # facturaID -> (ruta_pdf, cliente)
+        self._candado = threading.Lock()
+        self._widget = None
+        self._intervalo_ms = 150
+
+    # --- Integración con Tk ---
+    def vincular(self, widget, intervalo_ms=150):
+        """
+        Empieza a sondear los resultados desde el loop de Tk del widget dado
+        (se usa la ventana raíz para que el sondeo sobreviva a las ventanas hijas).
+        """
+        self._intervalo_ms = intervalo_ms
+        raiz = widget._root()
+        if self._widget is raiz:
+            return
+        self._widget = raiz
+        raiz.after(intervalo_ms, self._sondear)
+
+    def _sondear(self):
+        widget = self._widget
+        if widget is None:
+            return
+        try:
+            if not widget.winfo_exists():
+                self._widget = None
+                return
+        except Exception:
+            self._widget = None
+            return
+        self.procesar_resultados()
+        widget.after(self._intervalo_ms, self._sondear)
+
+    def procesar_resultados(self):
+        """
+        Ejecuta los callbacks de los trabajos terminados. Debe llamarse desde
+        el hilo de Tk (vincular() lo hace periódicamente).
+        """
+        while True:
+            try:
+                callback, args = self._resultados.get_nowait()
+            except queue.Empty:
+                return
+            if callback is not None:
+                callback(*args)
+
+    # --- Trabajos ---
+    def _renderizar(self, factura_id, ruta_pdf, cliente, al_terminar):
+        try:
+            FacturaGenerator().generar_pdf(factura_id, ruta_pdf, cliente=cliente)
+        except Exception as ex:
+            with self._candado:
+                self._fallidas[factura_id] = (ruta_pdf, cliente)
+            self._resultados.put((al_terminar, (factura_id, ruta_pdf, ex)))
+            return
+        with self._candado:
+            self._fallidas.pop(factura_id, None)
+        self._resultados.put((al_terminar, (factura_id, ruta_pdf, None)))
+
+    def encolar_factura(self, factura_id, ruta_pdf, cliente=None, al_terminar=None):
+        """
+        Encola el render de una factura ya confirmada.
+        'al_terminar(factura_id, ruta_pdf, error)' se invoca en el hilo de Tk;
+        'error' es None si el PDF se generó correctamente.
+        """
+        cliente = dict(cliente) if cliente else None
+        return self._pool.submit(self._renderizar, factura_id, ruta_pdf, cliente, al_terminar)
+
+    def reintentar(self, factura_id, al_terminar=None):
+        """
+        Vuelve a encolar una factura cuyo render falló. Retorna False si la
+        factura no figura entre las fallidas.
+        """
+        with self._candado:
+            pendiente = self._fallidas.get(factura_id)
+        if pendiente is None:
+            return False
+        ruta_pdf, cliente = pendiente
+        self.encolar_factura(factura_id, ruta_pdf, cliente, al_terminar)
+        return True
+
+    def fallidas(self) -> dict:
+        """
+        Retorna {facturaID: ruta_pdf} de las facturas pendientes de reintento.
+        """
+        with self._candado:
+            return {fid: ruta for fid, (ruta, _) in self._fallidas.items()}
+
+    def cerrar(self, esperar=True):
+        self._pool.shutdown(wait=esperar)
+
+
+_cola = None
+
+def obtener_cola() -> ColaDocumentos:
+    """
+    Retorna la cola de documentos compartida por todo el proceso.
+    """
+    global _cola
+    if _cola is None:
+        _cola = ColaDocumentos()
+    return _cola
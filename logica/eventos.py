@@ -0,0 +1,86 @@
+# src/logica/eventos.py
+"""
+Avisos de cambios en los datos, dentro del proceso.
+
+Los gestores publican un evento después de confirmar cada transacción; las
+ventanas se suscriben a los tipos que les interesan y actualizan solo las
+filas afectadas en lugar de recargar todo.
+
+    eventos.suscribir(eventos.ProductoCambiado, self._al_cambiar_productos)
+    eventos.publicar(eventos.ProductoCambiado((prodID,), eventos.MODIFICACION))
+
+publicar() llama a los suscriptores en el hilo que publica. Las ventanas se
+suscriben con gui.cargador_async.CargadorAsync.suscribir, que los atiende en
+el hilo de Tk y cancela la suscripción al cerrarse la ventana.
+"""
+import threading
+from dataclasses import dataclass
+
+# Acciones: ALTA y BAJA (y RESTAURACION) cambian qué filas hay en un listado;
+# MODIFICACION solo cambia el contenido de las filas existentes.
+ALTA = "alta"
+MODIFICACION = "modificacion"
+BAJA = "baja"
+RESTAURACION = "restauracion"
+
+
+@dataclass(frozen=True)
+class ProductoCambiado:
+    """
+    Cambiaron nombre, precio, stock o estado de los productos 'ids'.
+    """
+    ids: tuple
+    accion: str = MODIFICACION
+
+
+@dataclass(frozen=True)
+class LoteCambiado:
+    """
+    Se editó el registro 'lote_id' del producto 'prod_id' (el stock del
+    producto se recalcula en la misma transacción).
+    """
+    lote_id: int
+    prod_id: int
+
+
+@dataclass(frozen=True)
+class ClienteCambiado:
+    cliente_id: int
+    accion: str = MODIFICACION
+
+
+@dataclass(frozen=True)
+class UsuarioCambiado:
+    usuario_id: int
+    accion: str = MODIFICACION
+
+
+_candado = threading.Lock()
+_suscriptores = {}      # tipo de evento -> [función]
+
+
+def suscribir(tipo, funcion):
+    """
+    Llama a 'funcion(evento)' por cada evento de 'tipo' que se publique.
+    Retorna una función sin argumentos que cancela la suscripción.
+    """
+    with _candado:
+        _suscriptores.setdefault(tipo, []).append(funcion)
+
+    def cancelar():
+        with _candado:
+            lista = _suscriptores.get(tipo, [])
+            if funcion in lista:
+                lista.remove(funcion)
+    return cancelar
+
+
+def publicar(evento):
+    with _candado:
+        funciones = list(_suscriptores.get(type(evento), ()))
+    for funcion in funciones:
+        try:
+            funcion(evento)
+        except Exception as e:
+            # La operación ya está confirmada: un suscriptor con errores no la afecta
+            print(f"Error al notificar {type(evento).__name__}:", e)
@@ -1,9 +1,8 @@
 import os
-from docxtpl import DocxTemplate
-from docx2pdf import convert
-from tkinter.filedialog import asksaveasfilename
-from tkinter import messagebox
 from docx.shared import Pt
+from datos.conexion_bd import ConexionBD
+from logica.backends_documentos import obtener_backend
+from logica.cache_plantillas import obtener_cache
 
 class FacturaGenerator:
     def __init__(self):
@@ -34,119 +33,148 @@ class FacturaGenerator:
             detalles = filas
         return factura, detalles
 
-    def insert_table_in_doc(self, doc, detalles):
-        # Reemplaza el marcador de tabla en la plantilla
-        for tabla in doc.tables:
-            for row in tabla.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        if "%%tabla_placeholder%%" in para.text:
-                            cell._tc.remove(para._element)
-                            tbl = cell.add_table(rows=1, cols=4)
-                            hdr = tbl.rows[0].cells
-                            hdr[0].text, hdr[1].text = "Cantidad", "Producto"
-                            hdr[2].text, hdr[3].text = "Precio Unit.", "Sub-total"
-                            # Estilo de encabezados
-                            for c in hdr:
-                                for r in c.paragraphs[0].runs:
-                                    r.font.name = "Helvetica"
-                                    r.font.size = Pt(10)
-                                    r.font.bold = True
-                            # Filas de datos
-                            for item in detalles:
-                                rc = tbl.add_row().cells
-                                rc[0].text = str(item["cantidad"])
-                                rc[1].text = item["nombre"]
-                                # Anteponer símbolo de peso $
-                                rc[2].text = f"${item['precioUnitario']:.2f}"
-                                rc[3].text = f"${item['subtotal']:.2f}"
-                            return
-
-    def generar_factura_con_transaccion(self, parent, conexion, factura_id, cliente: dict = None):
+    def obtener_facturas_por_rango(self, cursor, desde, hasta):
         """
-        Genera la factura usando la conexión activa. Recibe opcionalmente un dict cliente:
-          { 'nombre','apellido','cuit','iva','clienteID' }
-        Inserta el tipo de factura, el descuento real y rellena datos de cliente en la plantilla.
+        Recupera en dos consultas todas las facturas emitidas entre 'desde' y
+        'hasta' (inclusive), con su cliente y su detalle.
+        Retorna una lista de tuplas (factura, detalles, cliente) ordenada por facturaID.
         """
-        try:
-            cursor = conexion.cursor(dictionary=True)
-            datos, detalles = self.obtener_factura_y_detalles(cursor, factura_id)
-            if not datos:
-                messagebox.showerror("Error", "No se encontró la factura.", parent=parent)
-                return False
+        cursor.execute("""
+            SELECT f.facturaID, f.fechaEmision, f.horaEmision,
+                   f.total_neto, f.total_bruto, f.descuento, f.tipoFactura,
+                   c.clienteID, c.nombre, c.apellido, c.`cuil-cuit` AS cuit, c.iva
+            FROM facturas f
+            LEFT JOIN clientes c ON c.clienteID = f.clienteID
+            WHERE f.fechaEmision BETWEEN %s AND %s
+            ORDER BY f.facturaID
+        """, (desde, hasta))
+        cabeceras = cursor.fetchall()
 
-            # Formateo del descuento
-            dcto = float(datos["descuento"])
-            descuento_str = "0%" if dcto == 0 else f"{dcto:.2f}%"
+        cursor.execute("""
+            SELECT fd.facturaID, fd.prodID, p.nombre, fd.cantidad, fd.precioUnitario
+            FROM facturas f
+            JOIN factura_detalles fd ON fd.facturaID = f.facturaID
+            JOIN productos p ON fd.prodID = p.prodID
+            WHERE f.fechaEmision BETWEEN %s AND %s
+            ORDER BY fd.facturaID, fd.facturaDetalleID
+        """, (desde, hasta))
+        detalles_por_factura = {}
+        for fila in cursor.fetchall():
+            fila["subtotal"] = fila["cantidad"] * fila["precioUnitario"]
+            detalles_por_factura.setdefault(fila.pop("facturaID"), []).append(fila)
 
-            # Círculos de IVA
-            iva_val = (cliente or {}).get("iva", "").lower()
-            circ = lambda cond: "●" if cond else "○"
-            iva_ctx = {
-                "ivaExento":      circ(iva_val == "exento"),
-                "ivaMonotributo": circ(iva_val == "monotributo"),
-                "ivaRespInsc":    circ(iva_val in ("resp. insc.", "responsable inscripto")),
-                "ivaEventual":    circ(iva_val == "eventual"),
-                "ivaConsFinal":   circ(iva_val == "cons. final"),
-            }
+        resultado = []
+        claves_cliente = ("clienteID", "nombre", "apellido", "cuit", "iva")
+        for cab in cabeceras:
+            cliente = {k: cab.pop(k) for k in claves_cliente}
+            if cliente["clienteID"] is None:
+                cliente = None
+            resultado.append((cab, detalles_por_factura.get(cab["facturaID"], []), cliente))
+        return resultado
 
-            # Construcción de contexto con tipoFactura e IVA
-            ctx = {
-                "facturaID":     datos["facturaID"],
-                "fecha":         datos["fechaEmision"],
-                "hora":          datos["horaEmision"],
-                "total_bruto":   datos["total_bruto"],
-                "descuento":     descuento_str,
-                "total_neto":    datos["total_neto"],
-                "tipoFactura":   datos["tipoFactura"],
-                "tabla_placeholder": "%%tabla_placeholder%%",
-                **iva_ctx
-            }
+    def insert_table_in_doc(self, doc, detalles):
+        # Reemplaza el marcador de tabla en la plantilla (posición cacheada por plantilla)
+        cell, para = obtener_cache().localizar_marcador(self.plantilla, doc, "%%tabla_placeholder%%")
+        if cell is None:
+            return
+        cell._tc.remove(para._element)
+        tbl = cell.add_table(rows=1, cols=4)
+        hdr = tbl.rows[0].cells
+        hdr[0].text, hdr[1].text = "Cantidad", "Producto"
+        hdr[2].text, hdr[3].text = "Precio Unit.", "Sub-total"
+        # Estilo de encabezados
+        for c in hdr:
+            for r in c.paragraphs[0].runs:
+                r.font.name = "Helvetica"
+                r.font.size = Pt(10)
+                r.font.bold = True
+        # Filas de datos
+        for item in detalles:
+            rc = tbl.add_row().cells
+            rc[0].text = str(item["cantidad"])
+            rc[1].text = item["nombre"]
+            # Anteponer símbolo de peso $
+            rc[2].text = f"${item['precioUnitario']:.2f}"
+            rc[3].text = f"${item['subtotal']:.2f}"
 
-            # ➡️ MOD: agregar clienteID al contexto
-            if cliente:
-                nombre_full = f"{cliente.get('nombre','')} {cliente.get('apellido','')}".strip()
-                ctx["clienteNombre"]    = nombre_full
-                ctx["clienteCUIT_CUIL"] = cliente.get("cuit","")
-                ctx["clienteID"]        = cliente.get("clienteID","")  # MOD
-            else:
-                ctx["clienteNombre"]    = ""
-                ctx["clienteCUIT_CUIL"] = ""
-                ctx["clienteID"]        = ""  # MOD
+    def obtener_cliente_de_factura(self, cursor, factura_id):
+        """
+        Recupera los datos del cliente asociado a una factura ya registrada,
+        con el mismo formato de dict que recibe la generación de la factura.
+        Retorna None si la factura no tiene cliente.
+        """
+        cursor.execute("""
+            SELECT c.clienteID, c.nombre, c.apellido, c.`cuil-cuit` AS cuit, c.iva
+            FROM facturas f
+            JOIN clientes c ON c.clienteID = f.clienteID
+            WHERE f.facturaID = %s
+        """, (factura_id,))
+        return cursor.fetchone()
 
-            # Renderizado de la plantilla
-            doc = DocxTemplate(self.plantilla)
-            doc.render(ctx)
-            self.insert_table_in_doc(doc, detalles)
+    def construir_contexto(self, datos, cliente: dict = None) -> dict:
+        """
+        Arma el contexto de la plantilla a partir de la cabecera de la factura
+        y del dict cliente (opcional).
+        """
+        # Formateo del descuento
+        dcto = float(datos["descuento"])
+        descuento_str = "0%" if dcto == 0 else f"{dcto:.2f}%"
 
-            # Guardar .docx
-            ruta = asksaveasfilename(
-                defaultextension=".docx",
-                filetypes=[("Word","*.docx")],
-                title="Guardar Factura"
-            )
-            if not ruta:
-                messagebox.showwarning("Cancelado", "Guardado cancelado.", parent=parent)
-                return False
+        # Círculos de IVA
+        iva_val = ((cliente or {}).get("iva") or "").lower()
+        circ = lambda cond: "●" if cond else "○"
+        iva_ctx = {
+            "ivaExento":      circ(iva_val == "exento"),
+            "ivaMonotributo": circ(iva_val == "monotributo"),
+            "ivaRespInsc":    circ(iva_val in ("resp. insc.", "responsable inscripto")),
+            "ivaEventual":    circ(iva_val == "eventual"),
+            "ivaConsFinal":   circ(iva_val == "cons. final"),
+        }
 
-            # Convertir a PDF
-            doc.save(ruta)
-            pdf = os.path.splitext(ruta)[0] + ".pdf"
-            convert(ruta, pdf)
-            os.remove(ruta)
+        # Construcción de contexto con tipoFactura e IVA
+        ctx = {
+            "facturaID":     datos["facturaID"],
+            "fecha":         datos["fechaEmision"],
+            "hora":          datos["horaEmision"],
+            "total_bruto":   datos["total_bruto"],
+            "descuento":     descuento_str,
+            "total_neto":    datos["total_neto"],
+            "tipoFactura":   datos["tipoFactura"],
+            "tabla_placeholder": "%%tabla_placeholder%%",
+            **iva_ctx
+        }
 
-            messagebox.showinfo("Éxito", f"Factura guardada en {pdf}", parent=parent)
-            return True
+        # ➡️ MOD: agregar clienteID al contexto
+        if cliente:
+            nombre_full = f"{cliente.get('nombre','')} {cliente.get('apellido','')}".strip()
+            ctx["clienteNombre"]    = nombre_full
+            ctx["clienteCUIT_CUIL"] = cliente.get("cuit","")
+            ctx["clienteID"]        = cliente.get("clienteID","")  # MOD
+        else:
+            ctx["clienteNombre"]    = ""
+            ctx["clienteCUIT_CUIL"] = ""
+            ctx["clienteID"]        = ""  # MOD
+        return ctx
 
-        except Exception as ex:
-            messagebox.showerror("Error Generando Factura", str(ex), parent=parent)
-            return False
+    def guardar_pdf(self, ctx, detalles, ruta_pdf):
+        """
+        Genera el PDF con el backend configurado (config.backend_documentos)
+        y lo deja en 'ruta_pdf'.
+        """
+        return obtener_backend().generar_factura(self, ctx, detalles, ruta_pdf)
 
-        finally:
-            try:
-                cursor.close()
-            except:
-                pass
+    def generar_pdf(self, factura_id, ruta_pdf, cliente: dict = None):
+        """
+        Genera el PDF de una factura ya confirmada, sin interfaz gráfica y con
+        su propia conexión (apto para ejecutarse en un hilo de fondo).
+        Si no se recibe 'cliente', se toma de la base. Lanza excepción si falla.
+        """
+        with ConexionBD.sesion(dictionary=True) as cursor:
+            datos, detalles = self.obtener_factura_y_detalles(cursor, factura_id)
+            if not datos:
+                raise LookupError(f"No se encontró la factura {factura_id}.")
+            if cliente is None:
+                cliente = self.obtener_cliente_de_factura(cursor, factura_id)
 
-    def generar_factura(self, parent, conexion, factura_id, cliente: dict = None):
-        return self.generar_factura_con_transaccion(parent, conexion, factura_id, cliente)
\ No newline at end of file
+        ctx = self.construir_contexto(datos, cliente)
+        return self.guardar_pdf(ctx, detalles, ruta_pdf)
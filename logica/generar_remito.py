@@ -1,11 +1,11 @@
 import os
 from datetime import datetime
-from docxtpl import DocxTemplate
-from docx2pdf import convert
 from tkinter.filedialog import asksaveasfilename
 from tkinter import messagebox
 from docx.shared import Pt
 from datos.conexion_bd import ConexionBD
+from logica.backends_documentos import obtener_backend
+from logica.cache_plantillas import obtener_cache
 
 class RemitoGenerator:
     def __init__(self):
@@ -16,28 +16,25 @@ class RemitoGenerator:
     def insert_table_in_doc(self, doc, carrito):
         """
         Inserta la tabla de productos dentro de la plantilla del remito.
-        Busca el marcador %%tabla_placeholder_remito%% y lo reemplaza
-        por una tabla con columnas [Producto, Cantidad].
+        Busca el marcador %%tabla_placeholder_remito%% (posición cacheada por
+        plantilla) y lo reemplaza por una tabla con columnas [Producto, Cantidad].
         """
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        if "%%tabla_placeholder_remito%%" in para.text:
-                            cell._tc.remove(para._element)
-                            tbl = cell.add_table(rows=1, cols=2)
-                            hdr = tbl.rows[0].cells
-                            hdr[0].text, hdr[1].text = "Producto", "Cantidad"
-                            for c in hdr:
-                                for r in c.paragraphs[0].runs:
-                                    r.font.name = "Helvetica"
-                                    r.font.size = Pt(10)
-                                    r.font.bold = True
-                            for it in carrito:
-                                rc = tbl.add_row().cells
-                                rc[0].text = it.get("nombre", "")
-                                rc[1].text = str(it.get("cantidad", ""))
-                            return
+        cell, para = obtener_cache().localizar_marcador(self.plantilla, doc, "%%tabla_placeholder_remito%%")
+        if cell is None:
+            return
+        cell._tc.remove(para._element)
+        tbl = cell.add_table(rows=1, cols=2)
+        hdr = tbl.rows[0].cells
+        hdr[0].text, hdr[1].text = "Producto", "Cantidad"
+        for c in hdr:
+            for r in c.paragraphs[0].runs:
+                r.font.name = "Helvetica"
+                r.font.size = Pt(10)
+                r.font.bold = True
+        for it in carrito:
+            rc = tbl.add_row().cells
+            rc[0].text = it.get("nombre", "")
+            rc[1].text = str(it.get("cantidad", ""))
 
     def insertar_en_bd(self, cliente, carrito, fecha_venc):
         """
@@ -45,62 +42,52 @@ class RemitoGenerator:
         Ahora guarda también la dirección del cliente.
         Retorna el remitoID (auto-increment) o None si falla.
         """
+        sql = """
+            INSERT INTO Remito
+              (clienteID, cuit_cuil, ivaEstado, direccionCliente, fechaInicio, vencimientoRemito)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        hoy = datetime.now().date().isoformat()
+        venc = fecha_venc.isoformat() if fecha_venc else None
+        direccion = cliente.get("direccion", "")
         try:
-            cnx = ConexionBD.obtener_conexion()
-            cursor = cnx.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-
-            # Obtener clienteID por cuil-cuit
-            cursor.execute(
-                "SELECT clienteID FROM clientes WHERE `cuil-cuit` = %s",
-                (cliente.get("cuit"),)
-            )
-            fila = cursor.fetchone()
-            cid = fila["clienteID"] if fila else None
-            # ➡️ MOD: guardamos el ID en el atributo
-            self.clienteID = cid
-
-            sql = """
-                INSERT INTO Remito
-                  (clienteID, cuit_cuil, ivaEstado, direccionCliente, fechaInicio, vencimientoRemito)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            hoy = datetime.now().date().isoformat()
-            venc = fecha_venc.isoformat() if fecha_venc else None
-            direccion = cliente.get("direccion", "")
-            cursor.execute(sql, (
-                cid,
-                cliente.get("cuit"),
-                cliente.get("iva"),
-                direccion,
-                hoy,
-                venc
-            ))
-            remito_id = cursor.lastrowid
-
-            for it in carrito:
+            # La sesión hace rollback si algo falla
+            with ConexionBD.sesion(dictionary=True, commit=True) as cursor:
+                # Obtener clienteID por cuil-cuit
                 cursor.execute(
+                    "SELECT clienteID FROM clientes WHERE `cuil-cuit` = %s",
+                    (cliente.get("cuit"),)
+                )
+                fila = cursor.fetchone()
+                cid = fila["clienteID"] if fila else None
+                # ➡️ MOD: guardamos el ID en el atributo
+                self.clienteID = cid
+
+                cursor.execute(sql, (
+                    cid,
+                    cliente.get("cuit"),
+                    cliente.get("iva"),
+                    direccion,
+                    hoy,
+                    venc
+                ))
+                remito_id = cursor.lastrowid
+
+                # Un único INSERT de varias filas para todo el detalle
+                cursor.executemany(
                     "INSERT INTO RemitoDetalle (remitoID, prodID, cantidad) VALUES (%s, %s, %s)",
-                    (remito_id, it.get("prodID"), it.get("cantidad"))
+                    [(remito_id, it.get("prodID"), it.get("cantidad")) for it in carrito]
                 )
-
-            cnx.commit()
-            cursor.close()
-            cnx.close()
             return remito_id
 
         except Exception as ex:
-            try:
-                cnx.rollback()
-            except:
-                pass
             messagebox.showerror("Error BD Remito", str(ex))
             return None
 
     def generar_remito_con_transaccion(self, parent, cliente, carrito, fecha_vencimiento=None):
         """
         Genera el remito: lo inserta en BD (con dirección),
-        luego renderiza la plantilla y guarda .docx/.pdf.
+        luego genera el PDF con el backend configurado.
         """
         try:
             iva_val = cliente.get("iva", "").lower()
@@ -131,23 +118,17 @@ class RemitoGenerator:
                 "clienteID":         self.clienteID
             }
 
-            doc = DocxTemplate(self.plantilla)
-            doc.render(ctx)
-            self.insert_table_in_doc(doc, carrito)
-
             ruta = asksaveasfilename(
-                defaultextension=".docx",
-                filetypes=[("Word","*.docx")],
+                defaultextension=".pdf",
+                filetypes=[("PDF","*.pdf")],
                 title="Guardar Remito"
             )
             if not ruta:
                 messagebox.showwarning("Cancelado", "Guardado cancelado.", parent=parent)
                 return False
 
-            doc.save(ruta)
             pdf = os.path.splitext(ruta)[0] + ".pdf"
-            convert(ruta, pdf)
-            os.remove(ruta)
+            obtener_backend().generar_remito(self, ctx, carrito, pdf)
             messagebox.showinfo("Éxito", f"Remito guardado en {pdf}", parent=parent)
             return True
 
@@ -1,8 +1,8 @@
 # src/logica/gestor_clientes.py
 from datos.conexion_bd import ConexionBD
 from mysql.connector import Error
-import tkinter.messagebox as messagebox
 from tkinter import simpledialog
+from logica import eventos, busqueda_texto
 
 class ClienteManager:
     """
@@ -10,114 +10,209 @@ class ClienteManager:
     """
 
     def crear_cliente(self, cliente: dict) -> bool:
+        sql = """
+          INSERT INTO clientes
+            (nombre,apellido,`cuil-cuit`,telefono,email,direccion,iva)
+          VALUES(%s,%s,%s,%s,%s,%s,%s)
+        """
+        datos = (
+            cliente["nombre"], cliente["apellido"],
+            cliente["cuil"], cliente.get("telefono",""),
+            cliente.get("email",""), cliente.get("direccion",""),
+            cliente.get("iva","")
+        )
         try:
-            cnx = ConexionBD.obtener_conexion()
-            if cnx is None: return False
-            cur = cnx.cursor()
-            cur.execute("USE farmanaccio_db")
-            sql = """
-              INSERT INTO clientes
-                (nombre,apellido,`cuil-cuit`,telefono,email,direccion,iva)
-              VALUES(%s,%s,%s,%s,%s,%s,%s)
-            """
-            datos = (
-                cliente["nombre"], cliente["apellido"],
-                cliente["cuil"], cliente.get("telefono",""),
-                cliente.get("email",""), cliente.get("direccion",""),
-                cliente.get("iva","")
-            )
-            cur.execute(sql,datos)
-            cnx.commit()
-            cur.close(); cnx.close()
-            return True
+            with ConexionBD.sesion(commit=True) as cur:
+                cur.execute(sql,datos)
+                cid = cur.lastrowid
         except Error as e:
-            messagebox.showerror("Error al crear cliente",str(e))
+            # Se llama desde un hilo de carga: la ventana informa el fallo
+            print("Error al crear cliente:", e)
             return False
+        eventos.publicar(eventos.ClienteCambiado(cid, eventos.ALTA))
+        return True
 
     def obtener_clientes(self) -> list:
         try:
-            cnx = ConexionBD.obtener_conexion()
-            if cnx is None: return []
-            cur = cnx.cursor(dictionary=True)
-            cur.execute("USE farmanaccio_db")
-            # Incluimos razonArchivado en la consulta
-            cur.execute("""
-              SELECT clienteID,
-                     nombre,
-                     apellido,
-                     `cuil-cuit` AS cuil,
-                     telefono,
-                     email,
-                     direccion,
-                     iva,
-                     activo,
-                     razonArchivado
-                FROM clientes
-            """)
-            rows = cur.fetchall()
-            cur.close()
-            cnx.close()
-            return rows
+            with ConexionBD.sesion(dictionary=True) as cur:
+                # Incluimos razonArchivado en la consulta
+                cur.execute("""
+                  SELECT clienteID,
+                         nombre,
+                         apellido,
+                         `cuil-cuit` AS cuil,
+                         telefono,
+                         email,
+                         direccion,
+                         iva,
+                         activo,
+                         razonArchivado
+                    FROM clientes
+                """)
+                return cur.fetchall()
         except Error as e:
-            messagebox.showerror("Error al obtener clientes", str(e))
+            # Se llama desde un hilo de carga: no se puede abrir un diálogo
+            print("Error al obtener clientes:", e)
             return []
 
+    def obtener_clientes_por_estado(self, activo: int) -> list:
+        """
+        Clientes activos (1) o archivados (0), con las columnas de
+        obtener_clientes.
+        """
+        try:
+            with ConexionBD.sesion(dictionary=True) as cur:
+                cur.execute("""
+                  SELECT clienteID,
+                         nombre,
+                         apellido,
+                         `cuil-cuit` AS cuil,
+                         telefono,
+                         email,
+                         direccion,
+                         iva,
+                         activo,
+                         razonArchivado
+                    FROM clientes
+                   WHERE activo = %s
+                """, (activo,))
+                return cur.fetchall()
+        except Error as e:
+            print("Error al obtener clientes por estado:", e)
+            return []
+
+
+    def obtener_cliente(self, cid: int):
+        """
+        Un cliente (activo o archivado) con las columnas de obtener_clientes,
+        o None si no existe.
+        """
+        try:
+            with ConexionBD.sesion(dictionary=True) as cur:
+                cur.execute("""
+                  SELECT clienteID,
+                         nombre,
+                         apellido,
+                         `cuil-cuit` AS cuil,
+                         telefono,
+                         email,
+                         direccion,
+                         iva,
+                         activo,
+                         razonArchivado
+                    FROM clientes
+                   WHERE clienteID = %s
+                """, (cid,))
+                return cur.fetchone()
+        except Error as e:
+            print("Error al obtener cliente:", e)
+            return None
+
+    def buscar_clientes(self, termino: str, limite: int = 500) -> list:
+        """
+        Clientes (activos o archivados) cuyo nombre, apellido o CUIL/CUIT
+        coincide con 'termino', como máximo 'limite'. Mismas columnas que
+        obtener_clientes.
+
+        Con el criterio de logica.busqueda_texto: cada campo se busca por
+        prefijo en su propio índice (idx_clientes_nombre_norm,
+        idx_clientes_apellido_norm y el UNIQUE de `cuil-cuit`) y las palabras
+        de nombre y apellido con ft_clientes_nombre; los resultados se unen.
+        Solo si no hay ninguno se busca el término en cualquier parte.
+        """
+        termino = busqueda_texto.normalizar(termino)
+        if not termino:
+            return self.obtener_clientes()
+        patron = busqueda_texto.escapar_like(termino) + "%"
+        columnas = """
+            clienteID, nombre, apellido, `cuil-cuit` AS cuil, telefono,
+            email, direccion, iva, activo, razonArchivado
+        """
+        limite = int(limite)
+        sql = f"""
+                  (SELECT {columnas} FROM clientes WHERE nombreNorm LIKE %s LIMIT %s)
+                  UNION
+                  (SELECT {columnas} FROM clientes WHERE apellidoNorm LIKE %s LIMIT %s)
+                  UNION
+                  (SELECT {columnas} FROM clientes WHERE `cuil-cuit` LIKE %s LIMIT %s)"""
+        params = (patron, limite, patron, limite, patron, limite)
+        consulta_ft = busqueda_texto.consulta_fulltext(termino)
+        if consulta_ft:
+            sql += f"""
+                  UNION
+                  (SELECT {columnas} FROM clientes
+                    WHERE MATCH(nombre, apellido) AGAINST (%s IN BOOLEAN MODE) LIMIT %s)"""
+            params += (consulta_ft, limite)
+        try:
+            with ConexionBD.sesion(dictionary=True) as cur:
+                cur.execute(sql + " LIMIT %s", params + (limite,))
+                clientes = cur.fetchall()
+                if not clientes:
+                    # Respaldo: subcadena arbitraria (recorre toda la tabla)
+                    patron = "%" + patron
+                    cur.execute(f"""
+                      SELECT {columnas} FROM clientes
+                       WHERE nombreNorm LIKE %s OR apellidoNorm LIKE %s OR `cuil-cuit` LIKE %s
+                       LIMIT %s
+                    """, (patron, patron, patron, limite))
+                    clientes = cur.fetchall()
+                return clientes
+        except Error as e:
+            print("Error al buscar clientes:", e)
+            return []
+
+    @staticmethod
+    def coincide_busqueda(cliente: dict, termino: str) -> bool:
+        """
+        True si 'cliente' (fila de obtener_cliente) puede figurar en
+        buscar_clientes(termino) (ver busqueda_texto.coincide).
+        """
+        return busqueda_texto.coincide(
+            [cliente.get(campo) for campo in ("nombre", "apellido", "cuil")], termino)
 
     def actualizar_cliente(self, cid:int, cliente:dict) -> bool:
+        sql = """
+          UPDATE clientes SET
+            nombre=%s,apellido=%s,`cuil-cuit`=%s,
+            telefono=%s,email=%s,direccion=%s,iva=%s
+          WHERE clienteID=%s
+        """
+        datos=(
+            cliente["nombre"],cliente["apellido"],cliente["cuil"],
+            cliente.get("telefono",""),cliente.get("email",""),
+            cliente.get("direccion",""),cliente.get("iva",""),
+            cid
+        )
         try:
-            cnx = ConexionBD.obtener_conexion()
-            if cnx is None: return False
-            cur = cnx.cursor()
-            cur.execute("USE farmanaccio_db")
-            sql = """
-              UPDATE clientes SET
-                nombre=%s,apellido=%s,`cuil-cuit`=%s,
-                telefono=%s,email=%s,direccion=%s,iva=%s
-              WHERE clienteID=%s
-            """
-            datos=(
-                cliente["nombre"],cliente["apellido"],cliente["cuil"],
-                cliente.get("telefono",""),cliente.get("email",""),
-                cliente.get("direccion",""),cliente.get("iva",""),
-                cid
-            )
-            cur.execute(sql,datos)
-            cnx.commit()
-            cur.close(); cnx.close()
-            return True
+            with ConexionBD.sesion(commit=True) as cur:
+                cur.execute(sql,datos)
         except Error as e:
-            messagebox.showerror("Error al actualizar cliente",str(e))
+            print("Error al actualizar cliente:", e)
             return False
+        eventos.publicar(eventos.ClienteCambiado(int(cid)))
+        return True
 
     def eliminar_cliente(self, cid: int, razon: str) -> bool:
         try:
-            cnx = ConexionBD.obtener_conexion()
-            if cnx is None:
-                return False
-            cur = cnx.cursor()
-            cur.execute("USE farmanaccio_db")
-            cur.execute("""
-                UPDATE clientes
-                SET activo = 0,
-                    razonArchivado = %s
-                WHERE clienteID = %s
-            """, (razon, cid))
-            cnx.commit()
-            cur.close(); cnx.close()
-            return True
+            with ConexionBD.sesion(commit=True) as cur:
+                cur.execute("""
+                    UPDATE clientes
+                    SET activo = 0,
+                        razonArchivado = %s
+                    WHERE clienteID = %s
+                """, (razon, cid))
         except Error as e:
-            messagebox.showerror("Error al archivar cliente", str(e))
+            print("Error al archivar cliente:", e)
             return False
+        eventos.publicar(eventos.ClienteCambiado(int(cid), eventos.BAJA))
+        return True
     
     def restaurar_cliente(self, cliente_id: int) -> bool:
         try:
-            cnx = ConexionBD.obtener_conexion()
-            cur = cnx.cursor()
-            cur.execute("USE farmanaccio_db")
-            cur.execute("UPDATE clientes SET activo = 1 WHERE clienteID = %s", (cliente_id,))
-            cnx.commit()
-            cur.close(); cnx.close()
-            return True
+            with ConexionBD.sesion(commit=True) as cur:
+                cur.execute("UPDATE clientes SET activo = 1 WHERE clienteID = %s", (cliente_id,))
         except Error as e:
-            messagebox.showerror("Error al restaurar cliente", str(e))
+            print("Error al restaurar cliente:", e)
             return False
+        eventos.publicar(eventos.ClienteCambiado(int(cliente_id), eventos.RESTAURACION))
+        return True
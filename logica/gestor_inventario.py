@@ -1,6 +1,7 @@
 # src/logica/gestor_inventario.py
 from datos.conexion_bd import ConexionBD
 from mysql.connector import Error
+from logica import eventos, busqueda_texto
 
 class GestorInventario:
     def _calcular_estado(self, stock: int) -> tuple:
@@ -29,40 +30,128 @@ class GestorInventario:
         """
         inventario = []
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return inventario
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            sql = """
-                SELECT 
-                    p.prodID, 
-                    p.nombre, 
-                    p.precio,
-                    IFNULL(SUM(l.cantidad_disponible), 0) AS total_stock,
-                    MIN(l.vencimiento) AS vencimiento_proximo
-                FROM productos p
-                JOIN lotes_productos l ON p.prodID = l.prodID
-                WHERE p.activo = 1
-                GROUP BY p.prodID, p.nombre, p.precio
-            """
-            cursor.execute(sql)
-            inventario = cursor.fetchall()
-            for p in inventario:
-                stock = p["total_stock"]
-                estado, color = self._calcular_estado(stock)
-                p["estado"] = estado
-                p["bg_color"] = color
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                sql = """
+                    SELECT 
+                        p.prodID, 
+                        p.nombre, 
+                        p.precio,
+                        IFNULL(SUM(l.cantidad_disponible), 0) AS total_stock,
+                        MIN(l.vencimiento) AS vencimiento_proximo
+                    FROM productos p
+                    JOIN lotes_productos l ON p.prodID = l.prodID
+                    WHERE p.activo = 1
+                    GROUP BY p.prodID, p.nombre, p.precio
+                """
+                cursor.execute(sql)
+                inventario = cursor.fetchall()
+                for p in inventario:
+                    stock = p["total_stock"]
+                    estado, color = self._calcular_estado(stock)
+                    p["estado"] = estado
+                    p["bg_color"] = color
         except Error as e:
             print("Error al obtener inventario agrupado:", e)
         return inventario
 
+    def _filtro_nombre(self, cursor, termino):
+        """
+        (unión, condición, parámetros, orden) para filtrar los productos cuyo
+        nombre coincide con 'termino' (ver logica.busqueda_texto).
+        """
+        union, condicion, params = busqueda_texto.filtro_por_nombre(
+            cursor, termino, "productos", "p", "prodID", "nombreNorm", "nombre")
+        orden = "p.nombreNorm, p.prodID" if union or condicion else "p.prodID"
+        return union, condicion, params, orden
+
+    def contar_inventario(self, termino="", limite=None) -> int:
+        """
+        Cantidad de filas de obtener_inventario_pagina (productos activos con
+        lotes). Con 'limite' la cuenta se corta al llegar a ese valor.
+        """
+        try:
+            with ConexionBD.sesion() as cursor:
+                union, filtro, params, _ = self._filtro_nombre(cursor, termino)
+                sql = f"""
+                    SELECT 1
+                    FROM productos p{union}
+                    WHERE p.activo = 1{filtro}
+                      AND EXISTS (SELECT 1 FROM lotes_productos l WHERE l.prodID = p.prodID)
+                """
+                if limite:
+                    sql += " LIMIT %s"
+                    params += (int(limite),)
+                cursor.execute(f"SELECT COUNT(*) FROM ({sql}) t", params)
+                return cursor.fetchone()[0]
+        except Error as e:
+            print("Error al contar el inventario:", e)
+            return 0
+
+    def obtener_inventario_pagina(self, desde: int, cantidad: int, termino="") -> list:
+        """
+        Una página de obtener_inventario_agrupado, ordenada por prodID (o por
+        nombre si se filtra por 'termino'), para la tabla virtualizada.
+        """
+        inventario = []
+        try:
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                union, filtro, params, orden = self._filtro_nombre(cursor, termino)
+                cursor.execute(f"""
+                    SELECT
+                        p.prodID,
+                        p.nombre,
+                        p.precio,
+                        IFNULL(SUM(l.cantidad_disponible), 0) AS total_stock,
+                        MIN(l.vencimiento) AS vencimiento_proximo
+                    FROM productos p{union}
+                    JOIN lotes_productos l ON p.prodID = l.prodID
+                    WHERE p.activo = 1{filtro}
+                    GROUP BY p.prodID, p.nombre, p.precio, p.nombreNorm
+                    ORDER BY {orden}
+                    LIMIT %s OFFSET %s
+                """, params + (int(cantidad), int(desde)))
+                inventario = cursor.fetchall()
+            for p in inventario:
+                p["estado"], p["bg_color"] = self._calcular_estado(p["total_stock"])
+        except Error as e:
+            print("Error al obtener la página del inventario:", e)
+        return inventario
+
+    def obtener_inventario_por_ids(self, prod_ids) -> list:
+        """
+        Filas de obtener_inventario_pagina para los productos 'prod_ids', para
+        actualizar solo las filas afectadas por un cambio.
+        """
+        prod_ids = [int(i) for i in prod_ids]
+        if not prod_ids:
+            return []
+        marcadores = ", ".join(["%s"] * len(prod_ids))
+        inventario = []
+        try:
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute(f"""
+                    SELECT
+                        p.prodID,
+                        p.nombre,
+                        p.precio,
+                        IFNULL(SUM(l.cantidad_disponible), 0) AS total_stock,
+                        MIN(l.vencimiento) AS vencimiento_proximo
+                    FROM productos p
+                    JOIN lotes_productos l ON p.prodID = l.prodID
+                    WHERE p.activo = 1 AND p.prodID IN ({marcadores})
+                    GROUP BY p.prodID, p.nombre, p.precio
+                """, prod_ids)
+                inventario = cursor.fetchall()
+            for p in inventario:
+                p["estado"], p["bg_color"] = self._calcular_estado(p["total_stock"])
+        except Error as e:
+            print("Error al obtener el inventario de los productos:", e)
+        return inventario
+
     def obtener_detalles_generales_producto(self, nombre_producto: str) -> dict:
         """
         Retorna un diccionario con los detalles generales del producto a partir del
-        vademécum, basado en la columna 'nombreComercial'.
+        vademécum (solo registros vigentes), basado en la columna 'nombreComercial'.
         
         Los detalles incluyen:
           - presentacion
@@ -74,35 +163,24 @@ class GestorInventario:
         """
         detalles = {}
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return {
-                    "presentacion": "No Disponible", 
-                    "accionFarmacologica": "No Disponible",
-                    "principioActivo": "No Disponible", 
-                    "laboratorio": "No Disponible"
-                }
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            sql = """
-                SELECT presentacion, accionFarmacologica, principioActivo, laboratorio 
-                FROM vademecum 
-                WHERE LOWER(nombreComercial) = LOWER(%s) 
-                LIMIT 1
-            """
-            cursor.execute(sql, (nombre_producto,))
-            resultado = cursor.fetchone()
-            if resultado:
-                detalles = resultado
-            else:
-                detalles = {
-                    "presentacion": "No Disponible", 
-                    "accionFarmacologica": "No Disponible",
-                    "principioActivo": "No Disponible", 
-                    "laboratorio": "No Disponible"
-                }
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                sql = """
+                    SELECT presentacion, accionFarmacologica, principioActivo, laboratorio 
+                    FROM vademecum 
+                    WHERE nombreComercialNorm = LOWER(%s) AND vigente = 1
+                    LIMIT 1
+                """
+                cursor.execute(sql, (nombre_producto,))
+                resultado = cursor.fetchone()
+                if resultado:
+                    detalles = resultado
+                else:
+                    detalles = {
+                        "presentacion": "No Disponible", 
+                        "accionFarmacologica": "No Disponible",
+                        "principioActivo": "No Disponible", 
+                        "laboratorio": "No Disponible"
+                    }
         except Exception as e:
             detalles = {
                 "presentacion": "No Disponible",
@@ -120,25 +198,49 @@ class GestorInventario:
         """
         detalles = []
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return detalles
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            sql = """
-                SELECT loteID, numeroLote, fechaIngreso, vencimiento, cantidad_ingresada, cantidad_disponible
-                FROM lotes_productos
-                WHERE prodID = %s
-                ORDER BY vencimiento ASC
-            """
-            cursor.execute(sql, (prodID,))
-            detalles = cursor.fetchall()
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                sql = """
+                    SELECT loteID, numeroLote, fechaIngreso, vencimiento, cantidad_ingresada, cantidad_disponible
+                    FROM lotes_productos
+                    WHERE prodID = %s
+                    ORDER BY vencimiento ASC
+                """
+                cursor.execute(sql, (prodID,))
+                detalles = cursor.fetchall()
         except Error as e:
             print("Error al obtener detalle de lotes:", e)
         return detalles
 
+    def modificar_lote(self, lote_id, prod_id, cantidad_ingresada: int, cantidad_disponible: int,
+                       vencimiento: str) -> tuple:
+        """
+        Actualiza un registro de lotes_productos y recalcula el stock del
+        producto en la misma transacción. Retorna (ok, mensaje de error).
+        """
+        try:
+            with ConexionBD.sesion(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE lotes_productos
+                    SET cantidad_ingresada = %s,
+                        cantidad_disponible = %s,
+                        vencimiento = %s
+                    WHERE loteID = %s
+                """, (cantidad_ingresada, cantidad_disponible, vencimiento, lote_id))
+                cursor.execute("""
+                    UPDATE productos
+                    SET stock = (
+                        SELECT IFNULL(SUM(cantidad_disponible), 0)
+                        FROM lotes_productos
+                        WHERE prodID = %s
+                    )
+                    WHERE prodID = %s
+                """, (prod_id, prod_id))
+        except Error as e:
+            return False, str(e)
+        eventos.publicar(eventos.LoteCambiado(int(lote_id), int(prod_id)))
+        eventos.publicar(eventos.ProductoCambiado((int(prod_id),)))
+        return True, ""
+
 # Ejemplo de uso:
 if __name__ == "__main__":
     gestor = GestorInventario()
@@ -2,9 +2,10 @@
 import tkinter.messagebox as messagebox
 import datetime
 import customtkinter as ctk  # Para el diálogo personalizado
-from datos.conexion_bd import ConexionBD
+from datos.conexion_bd import ConexionBD, SesionCancelada
 from mysql.connector import Error
 from utils.utilidades import Utilidades
+from logica import eventos, busqueda_texto
 from gui.login import icono_logotipo
 
 # --- Nueva clase para preguntar por el precio ---
@@ -103,6 +104,21 @@ class TripleOptionDialog(ctk.CTkToplevel):
         self.destroy()
 
 
+def _raiz_tk():
+    """
+    Ventana raíz de Tk para los diálogos (la crea oculta si no hay ninguna).
+    """
+    from tkinter import Tk
+    try:
+        if Tk._default_root is None:
+            root = Tk()
+            root.withdraw()
+            return root
+        return Tk._default_root
+    except Exception:
+        return None
+
+
 class StockManager:
     """
     Clase que maneja la lógica para la gestión de productos y lotes.
@@ -121,130 +137,121 @@ class StockManager:
         else:
             return "Razonable"
 
-    def agregar_o_actualizar_producto(self, producto) -> bool:
+    def agregar_o_actualizar_producto(self, producto, en_hilo_tk=None) -> bool:
         """
         Agrega o actualiza un producto y registra el lote correspondiente.
         (No se agrega ningún campo en la BD para el indicador; se calcula en tiempo real).
+
+        Los mensajes y diálogos se abren con 'en_hilo_tk(funcion)'; desde un
+        hilo de carga se pasa CargadorAsync.en_hilo_tk. Por defecto se abren
+        directamente.
         """
+        tk = en_hilo_tk or (lambda funcion: funcion())
         if producto.get("stock") in (None, ""):
-            messagebox.showerror("Error", "El campo 'Stock' es obligatorio.", parent=None)
+            tk(lambda: messagebox.showerror("Error", "El campo 'Stock' es obligatorio.", parent=None))
             return False
         if not producto.get("vencimiento"):
-            messagebox.showerror("Error", "El campo 'Fecha de vencimiento' es obligatorio.", parent=None)
+            tk(lambda: messagebox.showerror("Error", "El campo 'Fecha de vencimiento' es obligatorio.", parent=None))
             return False
-        if not Utilidades.validar_producto(None, producto):
+        if not tk(lambda: Utilidades.validar_producto(None, producto)):
             return False
 
+        confirmado = False
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return False
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            # Buscar si existe un producto (ignorando mayúsculas)
-            sql_busqueda = "SELECT prodID, stock, activo, precio FROM productos WHERE LOWER(nombre) = LOWER(%s)"
-            cursor.execute(sql_busqueda, (producto["nombre"],))
-            resultado = cursor.fetchone()
-            nuevo_stock = producto["stock"]
-            if resultado:
-                prodID = resultado["prodID"]
-                if resultado["activo"] == 1:
-                    stock_actual = resultado["stock"]
-                    nuevo_stock = stock_actual + producto["stock"]
-
-                    # Verificar conflicto de precio
-                    new_price = producto["precio"]
-                    if float(new_price) != float(resultado["precio"]):
-                        # Prepara el diálogo para decidir qué hacer con el precio
-                        from tkinter import Tk
-                        try:
-                            if Tk._default_root is None:
-                                root = Tk()
-                                root.withdraw()
-                            else:
-                                root = Tk._default_root
-                        except Exception:
-                            root = None
-                        dialog = PrecioOptionDialog(root, producto["nombre"], resultado["precio"], new_price)
-                        opcion = dialog.result
-                        if opcion is None or opcion == "atras":
-                            cursor.close()
-                            conexion.close()
-                            return False
-                        elif opcion == "actualizar":
-                            new_price = new_price  # se usará el precio nuevo
-                        elif opcion == "mantener":
-                            new_price = resultado["precio"]
-
-                    sql_update = "UPDATE productos SET stock = %s, precio = %s WHERE prodID = %s"
-                    cursor.execute(sql_update, (nuevo_stock, new_price, prodID))
-                else:
-                    confirmacion = messagebox.askyesno(
-                        "Reactivar producto",
-                        "Se encontró un registro inactivo para este producto. ¿Deseas reactivarlo y reiniciar el stock con el nuevo valor?",
-                        parent=None
-                    )
-                    if confirmacion:
-                        sql_reactivar = "UPDATE productos SET stock = %s, precio = %s, activo = 1 WHERE prodID = %s"
-                        cursor.execute(sql_reactivar, (nuevo_stock, producto["precio"], prodID))
+            with ConexionBD.sesion(dictionary=True, commit=True) as cursor:
+                # Buscar si existe un producto (ignorando mayúsculas; usa idx_productos_nombre_norm)
+                sql_busqueda = "SELECT prodID, stock, activo, precio FROM productos WHERE nombreNorm = LOWER(%s)"
+                cursor.execute(sql_busqueda, (producto["nombre"],))
+                resultado = cursor.fetchone()
+                nuevo_stock = producto["stock"]
+                accion = eventos.MODIFICACION
+                if resultado:
+                    prodID = resultado["prodID"]
+                    if resultado["activo"] == 1:
+                        stock_actual = resultado["stock"]
+                        nuevo_stock = stock_actual + producto["stock"]
+
+                        # Verificar conflicto de precio
+                        new_price = producto["precio"]
+                        if float(new_price) != float(resultado["precio"]):
+                            # Diálogo para decidir qué hacer con el precio
+                            opcion = tk(lambda: PrecioOptionDialog(
+                                _raiz_tk(), producto["nombre"], resultado["precio"], new_price).result)
+                            if opcion is None or opcion == "atras":
+                                return False
+                            elif opcion == "actualizar":
+                                new_price = new_price  # se usará el precio nuevo
+                            elif opcion == "mantener":
+                                new_price = resultado["precio"]
+
+                        sql_update = "UPDATE productos SET stock = %s, precio = %s WHERE prodID = %s"
+                        cursor.execute(sql_update, (nuevo_stock, new_price, prodID))
                     else:
-                        sql_insert = "INSERT INTO productos (nombre, precio, stock, activo) VALUES (%s, %s, %s, 1)"
-                        cursor.execute(sql_insert, (producto["nombre"], producto["precio"], nuevo_stock))
-                        prodID = cursor.lastrowid
-            else:
-                sql_insert = "INSERT INTO productos (nombre, precio, stock, activo) VALUES (%s, %s, %s, 1)"
-                cursor.execute(sql_insert, (producto["nombre"], producto["precio"], nuevo_stock))
-                prodID = cursor.lastrowid
-
-            # Procesar la tabla lotes_productos
-            lote_valor = producto.get("lote", "")
-            sql_verificar_lote = """
-                SELECT loteID, vencimiento, cantidad_ingresada, cantidad_disponible
-                FROM lotes_productos
-                WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
-                LIMIT 1
-            """
-            cursor.execute(sql_verificar_lote, (prodID, lote_valor))
-            registro_lote = cursor.fetchone()
-            cantidad = producto["stock"]
-            nuevo_vencimiento = producto.get("vencimiento", None)
-            if registro_lote:
-                if nuevo_vencimiento is not None:
-                    if isinstance(registro_lote["vencimiento"], (datetime.date, datetime.datetime)):
-                        vencimiento_existente_str = registro_lote["vencimiento"].isoformat()
-                    else:
-                        vencimiento_existente_str = str(registro_lote["vencimiento"])
-                    nuevo_vencimiento_str = str(nuevo_vencimiento)
-                    if nuevo_vencimiento_str != vencimiento_existente_str:
-                        mensaje_conflicto = (
-                            f"El lote '{lote_valor}' ya existe con vencimiento {vencimiento_existente_str}.\n\n"
-                            f"¿Deseas actualizar la fecha de vencimiento a la nueva ingresada ({nuevo_vencimiento_str}) "
-                            "o continuar usando la fecha vigente?"
-                        )
-                        from tkinter import Tk
-                        try:
-                            if Tk._default_root is None:
-                                root = Tk()
-                                root.withdraw()
-                            else:
-                                root = Tk._default_root
-                        except Exception:
-                            root = None
-                        dialogo = TripleOptionDialog(root, mensaje_conflicto)
-                        opcion = dialogo.result
-                        if opcion == "atras" or opcion is None:
-                            cursor.close()
-                            conexion.close()
-                            return False
-                        elif opcion == "actualizar":
-                            cursor.execute("""
-                                UPDATE lotes_productos
-                                SET vencimiento = %s,
-                                    cantidad_ingresada = cantidad_ingresada + %s,
-                                    cantidad_disponible = cantidad_disponible + %s
-                                WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
-                            """, (nuevo_vencimiento_str, cantidad, cantidad, prodID, lote_valor))
-                        elif opcion == "continuar":
+                        confirmacion = tk(lambda: messagebox.askyesno(
+                            "Reactivar producto",
+                            "Se encontró un registro inactivo para este producto. ¿Deseas reactivarlo y reiniciar el stock con el nuevo valor?",
+                            parent=None
+                        ))
+                        if confirmacion:
+                            sql_reactivar = "UPDATE productos SET stock = %s, precio = %s, activo = 1 WHERE prodID = %s"
+                            cursor.execute(sql_reactivar, (nuevo_stock, producto["precio"], prodID))
+                            accion = eventos.RESTAURACION
+                        else:
+                            sql_insert = "INSERT INTO productos (nombre, precio, stock, activo) VALUES (%s, %s, %s, 1)"
+                            cursor.execute(sql_insert, (producto["nombre"], producto["precio"], nuevo_stock))
+                            prodID = cursor.lastrowid
+                            accion = eventos.ALTA
+                else:
+                    sql_insert = "INSERT INTO productos (nombre, precio, stock, activo) VALUES (%s, %s, %s, 1)"
+                    cursor.execute(sql_insert, (producto["nombre"], producto["precio"], nuevo_stock))
+                    prodID = cursor.lastrowid
+                    accion = eventos.ALTA
+
+                # Procesar la tabla lotes_productos
+                lote_valor = producto.get("lote", "")
+                sql_verificar_lote = """
+                    SELECT loteID, vencimiento, cantidad_ingresada, cantidad_disponible
+                    FROM lotes_productos
+                    WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
+                    LIMIT 1
+                """
+                cursor.execute(sql_verificar_lote, (prodID, lote_valor))
+                registro_lote = cursor.fetchone()
+                cantidad = producto["stock"]
+                nuevo_vencimiento = producto.get("vencimiento", None)
+                if registro_lote:
+                    if nuevo_vencimiento is not None:
+                        if isinstance(registro_lote["vencimiento"], (datetime.date, datetime.datetime)):
+                            vencimiento_existente_str = registro_lote["vencimiento"].isoformat()
+                        else:
+                            vencimiento_existente_str = str(registro_lote["vencimiento"])
+                        nuevo_vencimiento_str = str(nuevo_vencimiento)
+                        if nuevo_vencimiento_str != vencimiento_existente_str:
+                            mensaje_conflicto = (
+                                f"El lote '{lote_valor}' ya existe con vencimiento {vencimiento_existente_str}.\n\n"
+                                f"¿Deseas actualizar la fecha de vencimiento a la nueva ingresada ({nuevo_vencimiento_str}) "
+                                "o continuar usando la fecha vigente?"
+                            )
+                            opcion = tk(lambda: TripleOptionDialog(_raiz_tk(), mensaje_conflicto).result)
+                            if opcion == "atras" or opcion is None:
+                                # Descarta lo ya escrito en productos
+                                raise SesionCancelada
+                            elif opcion == "actualizar":
+                                cursor.execute("""
+                                    UPDATE lotes_productos
+                                    SET vencimiento = %s,
+                                        cantidad_ingresada = cantidad_ingresada + %s,
+                                        cantidad_disponible = cantidad_disponible + %s
+                                    WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
+                                """, (nuevo_vencimiento_str, cantidad, cantidad, prodID, lote_valor))
+                            elif opcion == "continuar":
+                                cursor.execute("""
+                                    UPDATE lotes_productos
+                                    SET cantidad_ingresada = cantidad_ingresada + %s,
+                                        cantidad_disponible = cantidad_disponible + %s
+                                    WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
+                                """, (cantidad, cantidad, prodID, lote_valor))
+                        else:
                             cursor.execute("""
                                 UPDATE lotes_productos
                                 SET cantidad_ingresada = cantidad_ingresada + %s,
@@ -252,6 +259,7 @@ class StockManager:
                                 WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
                             """, (cantidad, cantidad, prodID, lote_valor))
                     else:
+                        # Si no hay vencimiento (aunque se valida antes) se actualiza solo la cantidad
                         cursor.execute("""
                             UPDATE lotes_productos
                             SET cantidad_ingresada = cantidad_ingresada + %s,
@@ -259,27 +267,20 @@ class StockManager:
                             WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
                         """, (cantidad, cantidad, prodID, lote_valor))
                 else:
-                    # Si no hay vencimiento (aunque se valida antes) se actualiza solo la cantidad
+                    nuevo_vencimiento_str = str(nuevo_vencimiento)
                     cursor.execute("""
-                        UPDATE lotes_productos
-                        SET cantidad_ingresada = cantidad_ingresada + %s,
-                            cantidad_disponible = cantidad_disponible + %s
-                        WHERE prodID = %s AND numeroLote = %s AND fechaIngreso = CURDATE()
-                    """, (cantidad, cantidad, prodID, lote_valor))
-            else:
-                nuevo_vencimiento_str = str(nuevo_vencimiento)
-                cursor.execute("""
-                    INSERT INTO lotes_productos
-                        (prodID, numeroLote, fechaIngreso, vencimiento, cantidad_ingresada, cantidad_disponible)
-                    VALUES (%s, %s, CURDATE(), %s, %s, %s)
-                """, (prodID, lote_valor, nuevo_vencimiento_str, cantidad, cantidad))
-            conexion.commit()
-            cursor.close()
-            conexion.close()
-            return True
+                        INSERT INTO lotes_productos
+                            (prodID, numeroLote, fechaIngreso, vencimiento, cantidad_ingresada, cantidad_disponible)
+                        VALUES (%s, %s, CURDATE(), %s, %s, %s)
+                    """, (prodID, lote_valor, nuevo_vencimiento_str, cantidad, cantidad))
+                confirmado = True
+            if not confirmado:
+                return False
         except Error as e:
-            messagebox.showerror("Error en agregar/actualizar_producto:", e)
+            tk(lambda: messagebox.showerror("Error en agregar/actualizar_producto:", e))
             return False
+        eventos.publicar(eventos.ProductoCambiado((prodID,), accion))
+        return True
 
     def obtener_productos(self) -> list:
         """
@@ -288,45 +289,110 @@ class StockManager:
         """
         productos = []
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if conexion:
-                cursor = conexion.cursor(dictionary=True)
-                cursor.execute("USE farmanaccio_db")
+            with ConexionBD.sesion(dictionary=True) as cursor:
                 cursor.execute("SELECT prodID, nombre, precio, stock FROM productos WHERE activo = 1")
                 productos = cursor.fetchall()
-                cursor.close()
-                conexion.close()
-                # Para cada producto, calcular el indicador (sin guardarlo en BD)
-                for prod in productos:
-                    prod["indicador"] = self._calcular_indicador(prod["stock"])
+            # Para cada producto, calcular el indicador (sin guardarlo en BD)
+            for prod in productos:
+                prod["indicador"] = self._calcular_indicador(prod["stock"])
         except Error as e:
             messagebox.showerror("Error al obtener productos:", e)
         return productos
 
+    def _filtro_nombre(self, cursor, termino):
+        """
+        (unión, condición, parámetros, orden) para los productos cuyo nombre
+        coincide con 'termino' según logica.busqueda_texto: prefijo
+        (idx_productos_nombre_norm) o palabras (ft_productos_nombre) y, si no
+        hay ninguno, el término en cualquier parte del nombre.
+        """
+        union, condicion, params = busqueda_texto.filtro_por_nombre(
+            cursor, termino, "productos", "p", "prodID", "nombreNorm", "nombre")
+        orden = "p.nombreNorm, p.prodID" if union or condicion else "p.prodID"
+        return union, condicion, params, orden
+
+    def contar_productos(self, termino="", limite=None) -> int:
+        """
+        Cantidad de productos activos cuyo nombre coincide con 'termino'. Con
+        'limite' la cuenta se corta al llegar a ese valor (búsqueda al escribir).
+        """
+        try:
+            with ConexionBD.sesion() as cursor:
+                union, filtro, params, _ = self._filtro_nombre(cursor, termino)
+                sql = f"SELECT COUNT(*) FROM productos p{union} WHERE p.activo = 1{filtro}"
+                if limite:
+                    sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM productos p{union} WHERE p.activo = 1{filtro} LIMIT %s) t"
+                    params += (int(limite),)
+                cursor.execute(sql, params)
+                return cursor.fetchone()[0]
+        except Error as e:
+            print("Error al contar productos:", e)
+            return 0
+
+    def obtener_productos_pagina(self, desde: int, cantidad: int, termino="") -> list:
+        """
+        Una página de obtener_productos, ordenada por prodID (o por nombre si
+        se filtra por 'termino'), para la tabla virtualizada.
+        """
+        productos = []
+        try:
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                union, filtro, params, orden = self._filtro_nombre(cursor, termino)
+                cursor.execute(f"""
+                    SELECT p.prodID, p.nombre, p.precio, p.stock FROM productos p{union}
+                    WHERE p.activo = 1{filtro}
+                    ORDER BY {orden}
+                    LIMIT %s OFFSET %s
+                """, params + (int(cantidad), int(desde)))
+                productos = cursor.fetchall()
+            for prod in productos:
+                prod["indicador"] = self._calcular_indicador(prod["stock"])
+        except Error as e:
+            print("Error al obtener la página de productos:", e)
+        return productos
+
+    def obtener_productos_por_ids(self, prod_ids) -> list:
+        """
+        Filas de obtener_productos_pagina para los productos activos 'prod_ids',
+        para actualizar solo las filas afectadas por un cambio.
+        """
+        prod_ids = [int(i) for i in prod_ids]
+        if not prod_ids:
+            return []
+        marcadores = ", ".join(["%s"] * len(prod_ids))
+        productos = []
+        try:
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute(f"""
+                    SELECT prodID, nombre, precio, stock FROM productos
+                    WHERE activo = 1 AND prodID IN ({marcadores})
+                """, prod_ids)
+                productos = cursor.fetchall()
+            for prod in productos:
+                prod["indicador"] = self._calcular_indicador(prod["stock"])
+        except Error as e:
+            print("Error al obtener los productos:", e)
+        return productos
+
     def modificar_producto(self, parent, id_producto, producto_actualizado) -> bool:
         if not producto_actualizado.get("nombre") or producto_actualizado.get("precio") is None:
             messagebox.showerror("Error", "Los campos 'nombre' y 'precio' son obligatorios.", parent=parent)
             return False
+        sql = "UPDATE productos SET nombre=%s, precio=%s WHERE prodID=%s"
+        datos = (
+            producto_actualizado["nombre"],
+            producto_actualizado["precio"],
+            id_producto
+        )
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return False
-            cursor = conexion.cursor()
-            cursor.execute("USE farmanaccio_db")
-            sql = "UPDATE productos SET nombre=%s, precio=%s WHERE prodID=%s"
-            datos = (
-                producto_actualizado["nombre"],
-                producto_actualizado["precio"],
-                id_producto
-            )
-            cursor.execute(sql, datos)
-            conexion.commit()
-            cursor.close()
-            conexion.close()
-            return True
+            with ConexionBD.sesion(commit=True) as cursor:
+                cursor.execute(sql, datos)
         except Error as e:
-            messagebox.showerror("Error al modificar producto:", e, parent=parent)
+            # Se llama desde un hilo de carga: la ventana informa el fallo
+            print("Error al modificar producto:", e)
             return False
+        eventos.publicar(eventos.ProductoCambiado((int(id_producto),)))
+        return True
 
     def eliminar_producto(self, id_producto: int, razon_archivado: str) -> bool:
         """
@@ -334,37 +400,46 @@ class StockManager:
         Retorna True si el UPDATE de productos afectó filas.
         """
         try:
-            cnx = ConexionBD.obtener_conexion()
-            cur = cnx.cursor()
-            cur.execute("USE farmanaccio_db")
-
-            # 1) Actualizar productos y capturar cuántas filas cambian
-            cur.execute("""
-                UPDATE productos
-                   SET activo = 0,
-                       stock = 0,
-                       razonArchivado = %s
-                 WHERE prodID = %s
-            """, (razon_archivado, id_producto))
-            productos_afectados = cur.rowcount
-
-            # 2) Actualizar lotes (no nos interesa su rowcount)
-            cur.execute("""
-                UPDATE lotes_productos
-                   SET cantidad_disponible = 0
-                 WHERE prodID = %s
-            """, (id_producto,))
-
-            cnx.commit()
-            cur.close()
-            cnx.close()
-
-            # Devolvemos True si sí se modificó el registro en 'productos'
-            return productos_afectados > 0
+            with ConexionBD.sesion(commit=True) as cur:
+                # 1) Actualizar productos y capturar cuántas filas cambian
+                cur.execute("""
+                    UPDATE productos
+                       SET activo = 0,
+                           stock = 0,
+                           razonArchivado = %s
+                     WHERE prodID = %s
+                """, (razon_archivado, id_producto))
+                productos_afectados = cur.rowcount
+
+                # 2) Actualizar lotes (no nos interesa su rowcount)
+                cur.execute("""
+                    UPDATE lotes_productos
+                       SET cantidad_disponible = 0
+                     WHERE prodID = %s
+                """, (id_producto,))
 
         except Error as e:
-            messagebox.showerror("Error al archivar producto", str(e))
+            print("Error al archivar producto:", e)
             return False
+
+        # Devolvemos True si sí se modificó el registro en 'productos'
+        if productos_afectados > 0:
+            eventos.publicar(eventos.ProductoCambiado((int(id_producto),), eventos.BAJA))
+            return True
+        return False
+
+    def restaurar_producto(self, id_producto: int) -> bool:
+        """
+        Vuelve a activar un producto archivado.
+        """
+        try:
+            with ConexionBD.sesion(commit=True) as cursor:
+                cursor.execute("UPDATE productos SET activo = 1 WHERE prodID = %s", (id_producto,))
+        except Error as e:
+            print("Error al restaurar producto:", e)
+            return False
+        eventos.publicar(eventos.ProductoCambiado((int(id_producto),), eventos.RESTAURACION))
+        return True
     
     def obtener_productos_archivados(self) -> list:
         """
@@ -373,10 +448,7 @@ class StockManager:
         """
         productos = []
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if conexion:
-                cursor = conexion.cursor(dictionary=True)
-                cursor.execute("USE farmanaccio_db")
+            with ConexionBD.sesion(dictionary=True) as cursor:
                 cursor.execute("""
                     SELECT
                         prodID,
@@ -388,11 +460,10 @@ class StockManager:
                     WHERE activo = 0
                 """)
                 productos = cursor.fetchall()
-                cursor.close()
-                conexion.close()
             return productos
-        except Exception as e:
-            messagebox.showerror("Error al obtener productos archivados:", str(e))
+        except Error as e:
+            # Se llama desde un hilo de carga: no se puede abrir un diálogo
+            print("Error al obtener productos archivados:", e)
             return productos
 
 
@@ -4,6 +4,7 @@ from utils.security import hash_password, verify_password
 
 from datos.conexion_bd import ConexionBD
 from mysql.connector import Error
+from logica import eventos
 
 class UsuarioManager:
     """
@@ -20,18 +21,12 @@ class UsuarioManager:
 
     def validar_usuario(self, usuario: str, password: str):
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if conexion is None:
-                return None
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute(
-                "SELECT userID, usuario, password, role, activo FROM usuarios WHERE usuario = %s",
-                (usuario,)
-            )
-            resultado = cursor.fetchone()
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute(
+                    "SELECT userID, usuario, password, role, activo FROM usuarios WHERE usuario = %s",
+                    (usuario,)
+                )
+                resultado = cursor.fetchone()
             if resultado:
                 if verify_password(password, resultado["password"]):
                     if resultado.get("activo", 0) != 1:
@@ -44,24 +39,17 @@ class UsuarioManager:
 
     def crear_usuario(self, usuario: str, password: str, rol: str) -> bool:
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if conexion is None:
-                return False
-
             # 1) Generar hash de la contraseña
             hashed = hash_password(password)
 
             # 2) Insertar usuario con contraseña encriptada
-            cursor = conexion.cursor()
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute(
-                "INSERT INTO usuarios (usuario, password, role) VALUES (%s, %s, %s)",
-                (usuario, hashed, rol)
-            )
-            conexion.commit()
-
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(commit=True) as cursor:
+                cursor.execute(
+                    "INSERT INTO usuarios (usuario, password, role) VALUES (%s, %s, %s)",
+                    (usuario, hashed, rol)
+                )
+                usuario_id = cursor.lastrowid
+            eventos.publicar(eventos.UsuarioCambiado(usuario_id, eventos.ALTA))
             return True
 
         except Error as e:
@@ -71,28 +59,18 @@ class UsuarioManager:
 
     def obtener_usuarios(self) -> list:
         try:
-            conexion = ConexionBD.obtener_conexion()
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute("SELECT userID, usuario, password, role, activo FROM usuarios")
-            usuarios = cursor.fetchall()
-            cursor.close()
-            conexion.close()
-            return usuarios
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute("SELECT userID, usuario, password, role, activo FROM usuarios")
+                return cursor.fetchall()
         except Error as e:
             print("Error al obtener usuarios:", e)
             return []
 
     def obtener_usuarios_por_estado(self, activo: int) -> list:
         try:
-            conexion = ConexionBD.obtener_conexion()
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute("SELECT userID, usuario, password, role, activo FROM usuarios WHERE activo = %s", (activo,))
-            usuarios = cursor.fetchall()
-            cursor.close()
-            conexion.close()
-            return usuarios
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute("SELECT userID, usuario, password, role, activo FROM usuarios WHERE activo = %s", (activo,))
+                return cursor.fetchall()
         except Error as e:
             print("Error al obtener usuarios por estado:", e)
             return []
@@ -102,59 +80,48 @@ class UsuarioManager:
         Marca activo=0 y guarda razonArchivado.
         """
         try:
-            cnx = ConexionBD.obtener_conexion()
-            cur = cnx.cursor()
-            cur.execute("USE farmanaccio_db")
-            cur.execute("""
-                UPDATE usuarios
-                   SET activo = 0,
-                       razonArchivado = %s
-                 WHERE userID = %s
-            """, (razon_archivado, id_usuario))
-            cnx.commit()
-            ok = cur.rowcount > 0
-            cur.close()
-            cnx.close()
-            return ok
+            with ConexionBD.sesion(commit=True) as cur:
+                cur.execute("""
+                    UPDATE usuarios
+                       SET activo = 0,
+                           razonArchivado = %s
+                     WHERE userID = %s
+                """, (razon_archivado, id_usuario))
+                afectados = cur.rowcount
         except Error as e:
             print("Error al archivar usuario:", e)
             return False
+        if afectados > 0:
+            eventos.publicar(eventos.UsuarioCambiado(int(id_usuario), eventos.BAJA))
+        return afectados > 0
 
     def restaurar_usuario(self, id_usuario, nuevo_rol) -> bool:
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if conexion is None:
-                return False
-            cursor = conexion.cursor()
-            cursor.execute("USE farmanaccio_db")
-            # Actualizamos activo a 1 y asignamos el rol recibido
-            cursor.execute("UPDATE usuarios SET activo = 1, role = %s WHERE userID = %s", (nuevo_rol, id_usuario))
-            conexion.commit()
-            affected = cursor.rowcount
-            cursor.close()
-            conexion.close()
-            return affected > 0
+            with ConexionBD.sesion(commit=True) as cursor:
+                # Actualizamos activo a 1 y asignamos el rol recibido
+                cursor.execute("UPDATE usuarios SET activo = 1, role = %s WHERE userID = %s", (nuevo_rol, id_usuario))
+                afectados = cursor.rowcount
         except Error as e:
             print("Error al restaurar usuario:", e)
             return False
+        if afectados > 0:
+            eventos.publicar(eventos.UsuarioCambiado(int(id_usuario), eventos.RESTAURACION))
+        return afectados > 0
 
     def actualizar_usuario(self, id_usuario, usuario: str, password: str, rol: str) -> bool:
         try:
-            conexion = ConexionBD.obtener_conexion()
-            cursor = conexion.cursor()
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute(
-                "UPDATE usuarios SET usuario = %s, password = %s, role = %s WHERE userID = %s",
-                (usuario, password, rol, id_usuario)
-            )
-            conexion.commit()
-            affected = cursor.rowcount
-            cursor.close()
-            conexion.close()
-            return affected > 0
+            with ConexionBD.sesion(commit=True) as cursor:
+                cursor.execute(
+                    "UPDATE usuarios SET usuario = %s, password = %s, role = %s WHERE userID = %s",
+                    (usuario, password, rol, id_usuario)
+                )
+                afectados = cursor.rowcount
         except Error as e:
             print("Error al actualizar usuario:", e)
             return False
+        if afectados > 0:
+            eventos.publicar(eventos.UsuarioCambiado(int(id_usuario)))
+        return afectados > 0
 
 if __name__ == "__main__":
     um = UsuarioManager()
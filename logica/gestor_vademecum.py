@@ -1,56 +1,190 @@
 # src/logica/gestor_vademecum.py
 from datos.conexion_bd import ConexionBD
 from mysql.connector import Error
+from logica.indice_vademecum import obtener_indice, huella_actual
+from logica import busqueda_texto
 
 class VademecumManager:
+    COLUMNAS = """
+        vademecumID, nombreComercial, presentacion,
+        accionFarmacologica, principioActivo, laboratorio
+    """
+
     def obtener_vademecum(self):
         """
-        Retorna una lista de diccionarios con todos los registros de la tabla vademecum.
+        Retorna una lista de diccionarios con todos los registros vigentes de la tabla vademecum.
         Cada registro contiene: vademecumID, nombreComercial, presentacion,
         accionFarmacologica, principioActivo y laboratorio.
         """
         registros = []
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return registros
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            cursor.execute("""
-                SELECT vademecumID, nombreComercial, presentacion, 
-                       accionFarmacologica, principioActivo, laboratorio 
-                FROM vademecum
-            """)
-            registros = cursor.fetchall()
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT vademecumID, nombreComercial, presentacion, 
+                           accionFarmacologica, principioActivo, laboratorio 
+                    FROM vademecum
+                    WHERE vigente = 1
+                """)
+                registros = cursor.fetchall()
         except Error as e:
             print("Error al obtener registros del vademecum:", e)
         return registros
 
+    def contar_vademecum(self) -> int:
+        try:
+            with ConexionBD.sesion() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM vademecum WHERE vigente = 1")
+                return cursor.fetchone()[0]
+        except Error as e:
+            print("Error al contar registros del vademecum:", e)
+            return 0
+
+    def huella_vademecum(self):
+        """
+        Huella de la tabla (ver logica.indice_vademecum.huella_actual), o None
+        si no pudo leerse.
+        """
+        try:
+            return huella_actual()
+        except Error as e:
+            print("Error al leer la huella del vademecum:", e)
+            return None
+
+    def obtener_vademecum_pagina(self, desde: int, cantidad: int) -> list:
+        """
+        Una página de obtener_vademecum, ordenada por vademecumID (para la
+        tabla virtualizada).
+        """
+        try:
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                cursor.execute(f"""
+                    SELECT {self.COLUMNAS}
+                    FROM vademecum
+                    WHERE vigente = 1
+                    ORDER BY vademecumID
+                    LIMIT %s OFFSET %s
+                """, (int(cantidad), int(desde)))
+                return cursor.fetchall()
+        except Error as e:
+            print("Error al obtener la página del vademecum:", e)
+            return []
+
     def buscar_vademecum(self, termino):
         """
-        Retorna una lista de registros de la tabla vademecum en los que la columna
-        'nombreComercial' contenga el 'termino' (busqueda insensible a mayúsculas).
+        Retorna una lista de registros de la tabla vademecum cuyo 'nombreComercial'
+        coincida con el 'termino' (busqueda insensible a mayúsculas).
+
+        La búsqueda usa índices: primero los nombres que empiezan con el término
+        (B-tree sobre nombreComercialNorm) y luego los que contienen palabras que
+        empiezan con él (índice FULLTEXT). Solo si ninguna encuentra resultados
+        se recurre al LIKE '%termino%', que recorre toda la tabla.
+
+        Si el índice en memoria está disponible (config.vademecum_indice_memoria)
+        la búsqueda se resuelve allí, sin consultar la base, y tolera errores
+        de tipeo y acentos.
         """
+        indice = obtener_indice()
+        if indice is not None:
+            return indice.buscar(termino)
+
+        termino = (termino or "").strip().lower()
+        if not termino:
+            return self.obtener_vademecum()
+
         registros = []
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return registros
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
-            sql = """
-                SELECT vademecumID, nombreComercial, presentacion, 
-                       accionFarmacologica, principioActivo, laboratorio 
-                FROM vademecum
-                WHERE LOWER(nombreComercial) LIKE %s
-            """
-            parametro = "%" + termino.lower() + "%"
-            cursor.execute(sql, (parametro,))
-            registros = cursor.fetchall()
-            cursor.close()
-            conexion.close()
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                # 1) Prefijo sobre la columna normalizada (usa idx_vademecum_nombre_norm)
+                cursor.execute(f"""
+                    SELECT {self.COLUMNAS}
+                    FROM vademecum
+                    WHERE nombreComercialNorm LIKE %s AND vigente = 1
+                    ORDER BY nombreComercialNorm
+                """, (busqueda_texto.escapar_like(termino) + "%",))
+                registros = cursor.fetchall()
+                vistos = {r["vademecumID"] for r in registros}
+
+                # 2) Palabras con prefijo dentro del nombre (usa ft_vademecum_nombre)
+                consulta_ft = busqueda_texto.consulta_fulltext(termino)
+                if consulta_ft:
+                    try:
+                        cursor.execute(f"""
+                            SELECT {self.COLUMNAS}
+                            FROM vademecum
+                            WHERE MATCH(nombreComercial) AGAINST (%s IN BOOLEAN MODE)
+                              AND vigente = 1
+                        """, (consulta_ft,))
+                        registros.extend(r for r in cursor.fetchall() if r["vademecumID"] not in vistos)
+                    except Error as e:
+                        print("Búsqueda FULLTEXT no disponible en el vademecum:", e)
+
+                # 3) Respaldo: subcadena arbitraria (recorre toda la tabla)
+                if not registros:
+                    cursor.execute(f"""
+                        SELECT {self.COLUMNAS}
+                        FROM vademecum
+                        WHERE nombreComercialNorm LIKE %s AND vigente = 1
+                    """, ("%" + busqueda_texto.escapar_like(termino) + "%",))
+                    registros = cursor.fetchall()
         except Error as e:
             print("Error al buscar en el vademecum:", e)
         return registros
+
+    def buscar_vademecum_multicampo(self, termino, limite=200):
+        """
+        Busca sustitutos: registros cuyo principioActivo, laboratorio o
+        accionFarmacologica coincidan con el 'termino', ordenados por relevancia.
+
+        Combina dos consultas indexadas:
+          - FULLTEXT sobre (principioActivo, laboratorio, accionFarmacologica),
+            con la relevancia de MySQL más un plus si el principio activo
+            empieza con el término;
+          - prefijo sobre principioActivoNorm (B-tree), que cubre términos
+            cortos que el índice FULLTEXT no indexa.
+        Cada registro incluye la clave 'relevancia'.
+        """
+        termino = (termino or "").strip().lower()
+        if not termino:
+            return []
+
+        prefijo = busqueda_texto.escapar_like(termino) + "%"
+        por_id = {}
+        try:
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                consulta_ft = busqueda_texto.consulta_fulltext(termino)
+                if consulta_ft:
+                    try:
+                        cursor.execute(f"""
+                            SELECT {self.COLUMNAS},
+                                   MATCH(principioActivo, laboratorio, accionFarmacologica)
+                                     AGAINST (%s IN BOOLEAN MODE)
+                                   + (principioActivoNorm LIKE %s) * 2 AS relevancia
+                            FROM vademecum
+                            WHERE MATCH(principioActivo, laboratorio, accionFarmacologica)
+                                  AGAINST (%s IN BOOLEAN MODE)
+                              AND vigente = 1
+                            ORDER BY relevancia DESC, nombreComercial
+                            LIMIT %s
+                        """, (consulta_ft, prefijo, consulta_ft, int(limite)))
+                        for r in cursor.fetchall():
+                            por_id[r["vademecumID"]] = r
+                    except Error as e:
+                        print("Búsqueda FULLTEXT no disponible en el vademecum:", e)
+
+                cursor.execute(f"""
+                    SELECT {self.COLUMNAS}, 2 AS relevancia
+                    FROM vademecum
+                    WHERE principioActivoNorm LIKE %s AND vigente = 1
+                    ORDER BY principioActivoNorm, nombreComercial
+                    LIMIT %s
+                """, (prefijo, int(limite)))
+                for r in cursor.fetchall():
+                    por_id.setdefault(r["vademecumID"], r)
+        except Error as e:
+            print("Error al buscar en el vademecum por principio activo:", e)
+
+        registros = sorted(
+            por_id.values(),
+            key=lambda r: (-float(r["relevancia"]), r["nombreComercial"])
+        )
+        return registros[:limite]
@@ -1,10 +1,13 @@
+import os
 import customtkinter as ctk
-from datos.conexion_bd import ConexionBD
+from datos.conexion_bd import ConexionBD, SesionCancelada
 from mysql.connector import Error
 import tkinter.messagebox as messagebox
 from datetime import datetime
 import config  # Para manual_lote_selection
-from logica.generar_factura import FacturaGenerator
+from tkinter.filedialog import asksaveasfilename
+from logica.cola_documentos import obtener_cola
+from logica import eventos
 from gui.login import icono_logotipo
 
 class LoteSelectionDialog(ctk.CTkToplevel):
@@ -52,170 +55,341 @@ class LoteSelectionDialog(ctk.CTkToplevel):
         self.destroy()
 
 
+# Códigos de MySQL que justifican reintentar la transacción completa.
+ERRORES_REINTENTABLES = (1213, 1205)  # ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+
+
+class StockInsuficienteError(Exception):
+    """
+    Se lanza cuando, al aplicar los descuentos, algún lote ya no tiene la
+    cantidad que se le había asignado (otra terminal la consumió antes).
+    """
+
+
 class VentaManager:
     """
     Gestor de ventas. Confirma la venta dentro de una transacción,
     aplica descuentos, guarda clienteID y genera la factura.
+
+    El checkout trabaja por conjuntos: lee productos y lotes de todo el carrito
+    en una sola consulta cada uno, asigna los lotes en memoria y escribe los
+    descuentos, el stock y el detalle de la factura con sentencias agrupadas.
+
+    Con config.venta_bloqueo_filas las filas leídas se bloquean (FOR UPDATE,
+    siempre en orden de prodID para evitar deadlocks entre terminales) y los
+    descuentos se aplican como decrementos relativos condicionados. Si aun así
+    MySQL aborta la transacción por deadlock, se reintenta hasta
+    config.venta_reintentos_deadlock veces; 'reintentos' cuenta esos
+    reintentos (lo informa scripts/stress_ventas.py).
     """
-    def confirmar_venta(self, carrito, descuento=0.0, cliente=None, tipo_factura=None, parent=None):
+    reintentos = 0
+
+    def _agrupar_cantidades(self, carrito) -> dict:
+        """
+        Suma las cantidades pedidas por prodID (un mismo producto podría
+        aparecer más de una vez en el carrito).
+        """
+        cantidades = {}
+        for item in carrito:
+            pid = int(item["prodID"])
+            cantidades[pid] = cantidades.get(pid, 0) + int(item["cantidad"])
+        return cantidades
+
+    def _leer_productos_y_lotes(self, cursor, prod_ids, bloquear=False):
+        """
+        Recupera en dos consultas los productos del carrito y sus lotes con
+        stock, ordenados por vencimiento. Retorna (productos, lotes_por_producto).
+        Si 'bloquear' es True las filas quedan bloqueadas hasta el commit.
+        """
+        marcadores = ", ".join(["%s"] * len(prod_ids))
+        bloqueo = "FOR UPDATE" if bloquear else ""
+        cursor.execute(f"""
+            SELECT prodID, stock, precio
+            FROM productos
+            WHERE prodID IN ({marcadores})
+            ORDER BY prodID
+            {bloqueo}
+        """, tuple(prod_ids))
+        productos = {fila["prodID"]: fila for fila in cursor.fetchall()}
+
+        cursor.execute(f"""
+            SELECT loteID, prodID, cantidad_disponible, numeroLote
+            FROM lotes_productos
+            WHERE prodID IN ({marcadores}) AND cantidad_disponible>0
+            ORDER BY prodID, vencimiento ASC
+            {bloqueo}
+        """, tuple(prod_ids))
+        lotes_por_producto = {pid: [] for pid in prod_ids}
+        for lote in cursor.fetchall():
+            lotes_por_producto[lote["prodID"]].append(lote)
+        return productos, lotes_por_producto
+
+    def _seleccionar_lotes_manual(self, cantidades, parent=None):
+        """
+        Pide al usuario el lote de cada producto ANTES de abrir la transacción,
+        para no mantener bloqueos mientras el diálogo está abierto.
+        Retorna ({prodID: loteID}, error).
+        """
         try:
-            conexion = ConexionBD.obtener_conexion()
-            if not conexion:
-                return False, "No se pudo conectar a la base de datos."
+            with ConexionBD.sesion(dictionary=True) as cursor:
+                _, lotes_por_producto = self._leer_productos_y_lotes(cursor, list(cantidades))
+        except Error as e:
+            return None, f"No se pudo leer los lotes: {e}"
+
+        elegidos = {}
+        for prod_id, qty in cantidades.items():
+            lotes = lotes_por_producto.get(prod_id, [])
+            if sum(l["cantidad_disponible"] for l in lotes) < qty:
+                return None, f"No hay suficiente stock en lotes para ID {prod_id}."
+            dialogo = LoteSelectionDialog(parent, prod_id, lotes)
+            idx = dialogo.result
+            if idx is None:
+                return None, "Venta cancelada por el usuario."
+            lote = lotes[idx]
+            if lote["cantidad_disponible"] < qty:
+                messagebox.showerror(
+                    "Error",
+                    f"Lote {lote['numeroLote']} no suficiente.",
+                    parent=parent
+                )
+                return None, ""
+            elegidos[prod_id] = lote["loteID"]
+        return elegidos, None
+
+    def _asignar_lotes(self, cantidades, productos, lotes_por_producto, lotes_elegidos=None):
+        """
+        Decide, en memoria, cuánto se descuenta de cada lote.
+        Retorna (descuentos, error) donde descuentos es {loteID: cantidad_a_descontar}
+        y error es None o el mensaje a devolver al usuario.
+        """
+        descuentos = {}
+        for prod_id, qty in cantidades.items():
+            fila = productos.get(prod_id)
+            if not fila or fila["stock"] < qty:
+                return None, f"Stock insuficiente para producto ID {prod_id}."
 
-            conexion.autocommit = False
-            cursor = conexion.cursor(dictionary=True)
-            cursor.execute("USE farmanaccio_db")
+            lotes = lotes_por_producto.get(prod_id, [])
+            disponible = sum(l["cantidad_disponible"] for l in lotes)
+            if disponible < qty:
+                return None, f"No hay suficiente stock en lotes para ID {prod_id}."
 
-            total_bruto = 0.0
+            # Descontar por estrategia (manual o automático)...
+            restante = qty
+            if lotes_elegidos is not None:
+                lote = next((l for l in lotes if l["loteID"] == lotes_elegidos.get(prod_id)), None)
+                if lote is None or lote["cantidad_disponible"] < restante:
+                    return None, f"El lote elegido para ID {prod_id} ya no tiene stock suficiente."
+                descuentos[lote["loteID"]] = restante
+            else:
+                for lote in lotes:
+                    tomar = min(lote["cantidad_disponible"], restante)
+                    descuentos[lote["loteID"]] = tomar
+                    restante -= tomar
+                    if restante == 0:
+                        break
+                if restante > 0:
+                    return None, f"No se pudo descontar stock suficiente para ID {prod_id}."
+        return descuentos, None
 
-            # 1) Procesar cada ítem: verificar stock y descontar lotes...
-            for item in carrito:
-                prod_id = item["prodID"]
-                qty = item["cantidad"]
+    def _aplicar_descuentos(self, cursor, descuentos, prod_ids):
+        """
+        Escribe todos los descuentos de lotes en un único UPDATE con CASE y
+        recalcula el stock global de los productos afectados en otro UPDATE.
 
-                # Verificar stock global
-                cursor.execute(
-                    "SELECT stock, precio FROM productos WHERE prodID=%s",
-                    (prod_id,)
+        El descuento es relativo (cantidad_disponible - n) y solo se aplica si
+        el lote todavía tiene al menos n unidades; si alguna fila no se
+        actualiza se lanza StockInsuficienteError para deshacer la venta.
+        """
+        if descuentos:
+            casos = " ".join(["WHEN %s THEN %s"] * len(descuentos))
+            marcadores = ", ".join(["%s"] * len(descuentos))
+            params_casos = []
+            for lote_id, cantidad in descuentos.items():
+                params_casos.extend((lote_id, cantidad))
+            cursor.execute(f"""
+                UPDATE lotes_productos
+                SET cantidad_disponible = cantidad_disponible - (CASE loteID {casos} END)
+                WHERE loteID IN ({marcadores})
+                  AND cantidad_disponible >= (CASE loteID {casos} END)
+            """, tuple(params_casos) + tuple(descuentos.keys()) + tuple(params_casos))
+            if cursor.rowcount != len(descuentos):
+                raise StockInsuficienteError(
+                    "El stock de algún lote cambió durante la venta. Intente nuevamente."
                 )
-                fila = cursor.fetchone()
-                if not fila or fila["stock"] < qty:
-                    conexion.rollback()
-                    return False, f"Stock insuficiente para producto ID {prod_id}."
-                total_bruto += float(fila["precio"]) * qty
-
-                # Obtener lotes ordenados por vencimiento...
-                cursor.execute("""
-                    SELECT loteID, cantidad_disponible, numeroLote
-                    FROM lotes_productos
-                    WHERE prodID=%s AND cantidad_disponible>0
-                    ORDER BY vencimiento ASC
-                """, (prod_id,))
-                lotes = cursor.fetchall()
-                disponible = sum(l["cantidad_disponible"] for l in lotes)
-                if disponible < qty:
-                    conexion.rollback()
-                    return False, f"No hay suficiente stock en lotes para ID {prod_id}."
-
-                # Descontar por estrategia (manual o automático)...
-                restante = qty
-                if config.manual_lote_selection:
-                    dialogo = LoteSelectionDialog(parent, prod_id, lotes)
-                    idx = dialogo.result
-                    if idx is None:
-                        conexion.rollback()
-                        return False, "Venta cancelada por el usuario."
-                    lote = lotes[idx]
-                    if lote["cantidad_disponible"] < restante:
-                        conexion.rollback()
-                        messagebox.showerror(
-                            "Error",
-                            f"Lote {lote['numeroLote']} no suficiente.",
-                            parent=parent
-                        )
-                        return False, ""
-                    nuevo_disp = lote["cantidad_disponible"] - restante
-                    cursor.execute("""
-                        UPDATE lotes_productos
-                        SET cantidad_disponible=%s
-                        WHERE loteID=%s
-                    """, (nuevo_disp, lote["loteID"]))
-                else:
-                    for lote in lotes:
-                        disp = lote["cantidad_disponible"]
-                        if disp >= restante:
-                            cursor.execute("""
-                                UPDATE lotes_productos
-                                SET cantidad_disponible=%s
-                                WHERE loteID=%s
-                            """, (disp-restante, lote["loteID"]))
-                            restante = 0
-                            break
-                        else:
-                            cursor.execute("""
-                                UPDATE lotes_productos
-                                SET cantidad_disponible=0
-                                WHERE loteID=%s
-                            """, (lote["loteID"],))
-                            restante -= disp
-                    if restante > 0:
-                        conexion.rollback()
-                        return False, f"No se pudo descontar stock suficiente para ID {prod_id}."
-
-                # Actualizar stock global
-                cursor.execute("""
-                    UPDATE productos
-                    SET stock = (
-                        SELECT IFNULL(SUM(cantidad_disponible),0)
-                        FROM lotes_productos
-                        WHERE prodID=%s
+
+        marcadores = ", ".join(["%s"] * len(prod_ids))
+        cursor.execute(f"""
+            UPDATE productos p
+            JOIN (
+                SELECT prodID, IFNULL(SUM(cantidad_disponible),0) AS total
+                FROM lotes_productos
+                WHERE prodID IN ({marcadores})
+                GROUP BY prodID
+            ) l ON l.prodID = p.prodID
+            SET p.stock = l.total
+        """, tuple(prod_ids))
+
+    def _registrar_en_transaccion(self, cursor, carrito, descuento, cliente, tipo_factura, lotes_elegidos=None):
+        """
+        Ejecuta toda la parte de base de datos de una venta sobre una
+        transacción ya abierta. Retorna (factura_id, error).
+        """
+        # 1) Leer productos y lotes de todo el carrito y asignar lotes en memoria
+        cantidades = self._agrupar_cantidades(carrito)
+        prod_ids = sorted(cantidades)
+        productos, lotes_por_producto = self._leer_productos_y_lotes(
+            cursor, prod_ids, bloquear=config.venta_bloqueo_filas
+        )
+        descuentos, error = self._asignar_lotes(cantidades, productos, lotes_por_producto, lotes_elegidos)
+        if error is not None:
+            return None, error
+
+        # 2) Descontar lotes y actualizar stock global en bloque
+        self._aplicar_descuentos(cursor, descuentos, prod_ids)
+
+        # 3) Calcular totales con descuento real
+        total_bruto = sum(
+            float(productos[pid]["precio"]) * qty for pid, qty in cantidades.items()
+        )
+        dcto = float(descuento)
+        total_neto = total_bruto * (1 - dcto/100)
+
+        # 4) Obtener clienteID antes de insertar factura
+        cliente_id = None
+        if cliente and cliente.get("cuit"):
+            cursor.execute(
+                "SELECT clienteID FROM clientes WHERE `cuil-cuit` = %s",
+                (cliente["cuit"],)
+            )
+            row = cursor.fetchone()
+            cliente_id = row["clienteID"] if row else None
+
+        # ➡️ MOD: inyectamos el clienteID en el dict para que FacturaGenerator lo use
+        if cliente is not None:
+            cliente["clienteID"] = cliente_id
+
+        # 5) Insertar factura incluyendo clienteID
+        cursor.execute("""
+            INSERT INTO facturas
+              (clienteID, fechaEmision, horaEmision,
+               total_neto, total_bruto, descuento, tipoFactura)
+            VALUES (%s, CURRENT_DATE, CURRENT_TIME,
+                    %s, %s, %s, %s)
+        """, (cliente_id, total_neto, total_bruto, dcto, tipo_factura or "B"))
+        factura_id = cursor.lastrowid
+
+        # 6) Insertar detalle de factura (executemany lo envía como un INSERT multi-fila)
+        detalles = [
+            (factura_id, int(item["prodID"]), item["cantidad"],
+             productos[int(item["prodID"])]["precio"])
+            for item in carrito
+        ]
+        cursor.executemany("""
+            INSERT INTO factura_detalles
+              (facturaID, prodID, cantidad, precioUnitario)
+            VALUES (%s,%s,%s,%s)
+        """, detalles)
+        return factura_id, None
+
+    def _ejecutar_venta(self, carrito, descuento, cliente, tipo_factura, lotes_elegidos=None):
+        """
+        Abre la transacción, registra la venta y la confirma, reintentando
+        ante deadlocks. Retorna (ok, msg, factura_id).
+        """
+        intentos = max(1, int(config.venta_reintentos_deadlock) + 1)
+        for intento in range(1, intentos + 1):
+            try:
+                # La sesión confirma al salir y hace rollback ante cualquier excepción
+                with ConexionBD.sesion(dictionary=True, commit=True) as cursor:
+                    factura_id, error = self._registrar_en_transaccion(
+                        cursor, carrito, descuento, cliente, tipo_factura, lotes_elegidos
                     )
-                    WHERE prodID=%s
-                """, (prod_id, prod_id))
-
-            # 2) Calcular totales con descuento real
-            dcto = float(descuento)
-            total_neto = total_bruto * (1 - dcto/100)
-
-            # 3) Obtener clienteID antes de insertar factura
-            cliente_id = None
-            if cliente and cliente.get("cuit"):
-                cursor.execute(
-                    "SELECT clienteID FROM clientes WHERE `cuil-cuit` = %s",
-                    (cliente["cuit"],)
-                )
-                row = cursor.fetchone()
-                cliente_id = row["clienteID"] if row else None
-
-            # ➡️ MOD: inyectamos el clienteID en el dict para que FacturaGenerator lo use
-            if cliente is not None:
-                cliente["clienteID"] = cliente_id
-
-            # 4) Insertar factura incluyendo clienteID
-            cursor.execute("""
-                INSERT INTO facturas
-                  (clienteID, fechaEmision, horaEmision,
-                   total_neto, total_bruto, descuento, tipoFactura)
-                VALUES (%s, CURRENT_DATE, CURRENT_TIME,
-                        %s, %s, %s, %s)
-            """, (cliente_id, total_neto, total_bruto, dcto, tipo_factura or "B"))
-            factura_id = cursor.lastrowid
-
-            # 5) Insertar detalle de factura
-            for item in carrito:
-                pid = item["prodID"]
-                qty = item["cantidad"]
-                cursor.execute(
-                    "SELECT precio FROM productos WHERE prodID=%s",
-                    (pid,)
-                )
-                precio_unit = cursor.fetchone()["precio"]
-                cursor.execute("""
-                    INSERT INTO factura_detalles
-                      (facturaID, prodID, cantidad, precioUnitario)
-                    VALUES (%s,%s,%s,%s)
-                """, (factura_id, pid, qty, precio_unit))
-
-            # 6) Generar documento .docx/.pdf con cliente y descuento
-            fg = FacturaGenerator()
-            ok = fg.generar_factura_con_transaccion(
-                parent, conexion, factura_id, cliente=cliente
+                    if error is not None:
+                        raise SesionCancelada
+                if error is not None:
+                    return False, error, None
+                # Confirmada: las ventanas actualizan el stock de estos productos
+                eventos.publicar(eventos.ProductoCambiado(tuple(self._agrupar_cantidades(carrito))))
+                return True, "Venta registrada.", factura_id
+
+            except StockInsuficienteError as e:
+                return False, str(e), None
+            except Error as e:
+                if e.errno in ERRORES_REINTENTABLES and intento < intentos:
+                    self.reintentos += 1
+                    continue
+                return False, str(e), None
+
+    def registrar_venta(self, carrito, descuento=0.0, cliente=None, tipo_factura=None):
+        """
+        Registra la venta (lotes, stock, factura y detalle) sin generar el
+        documento. Pensado para procesos sin interfaz y para pruebas de carga.
+        Retorna (ok, msg, factura_id).
+        """
+        if not carrito:
+            return False, "El carrito está vacío.", None
+        return self._ejecutar_venta(carrito, descuento, cliente, tipo_factura)
+
+    def _notificar_factura(self, parent):
+        """
+        Construye el callback que informa (en el hilo de Tk) el resultado del
+        render de la factura y ofrece reintentarlo si falló.
+        """
+        def al_terminar(factura_id, ruta_pdf, error):
+            padre = parent if parent is not None and parent.winfo_exists() else None
+            if error is None:
+                messagebox.showinfo("Éxito", f"Factura guardada en {ruta_pdf}", parent=padre)
+                return
+            reintentar = messagebox.askretrycancel(
+                "Error Generando Factura",
+                f"No se pudo generar la factura N.º {factura_id}:\n{error}\n\n"
+                "La venta ya está registrada. ¿Reintentar la generación?",
+                parent=padre
             )
-            if not ok:
-                conexion.rollback()
-                return False, "Generación de factura cancelada; venta no registrada."
+            if reintentar:
+                obtener_cola().reintentar(factura_id, al_terminar)
+        return al_terminar
+
+    def confirmar_venta(self, carrito, descuento=0.0, cliente=None, tipo_factura=None, parent=None):
+        """
+        Confirma la venta (commit) y luego encola la generación del PDF de la
+        factura en segundo plano. El documento ya no forma parte de la
+        transacción: si el render falla, la venta sigue registrada y la factura
+        puede reintentarse desde su facturaID.
+        """
+        if not carrito:
+            return False, "El carrito está vacío."
 
-            # 7) Commit final
-            conexion.commit()
-            return True, "Venta confirmada y factura generada exitosamente."
+        lotes_elegidos = None
+        if config.manual_lote_selection:
+            lotes_elegidos, error = self._seleccionar_lotes_manual(
+                self._agrupar_cantidades(carrito), parent
+            )
+            if error is not None:
+                return False, error
 
-        except Error as e:
-            if conexion:
-                conexion.rollback()
-            return False, str(e)
-        finally:
-            try: cursor.close()
-            except: pass
-            try: conexion.close()
-            except: pass
+        ok, msg, factura_id = self._ejecutar_venta(
+            carrito, descuento, cliente, tipo_factura, lotes_elegidos=lotes_elegidos
+        )
+        if not ok:
+            return False, msg
+
+        # La transacción ya está cerrada: el diálogo no retiene bloqueos.
+        ruta = asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf")],
+            title="Guardar Factura",
+            initialfile=f"factura-{factura_id}.pdf"
+        )
+        if not ruta:
+            return True, (f"Venta confirmada (factura N.º {factura_id}). "
+                          "Guardado de la factura cancelado; puede reimprimirse más tarde.")
+
+        cola = obtener_cola()
+        if parent is not None:
+            cola.vincular(parent)
+        cola.encolar_factura(
+            factura_id, os.path.splitext(ruta)[0] + ".pdf",
+            cliente=cliente, al_terminar=self._notificar_factura(parent)
+        )
+        return True, f"Venta confirmada. La factura N.º {factura_id} se está generando en segundo plano."
@@ -0,0 +1,311 @@
+# src/logica/indice_vademecum.py
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+import config
+from datos.conexion_bd import ConexionBD
+from mysql.connector import Error
+
+RUTA_SNAPSHOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos", "cache", "indice_vademecum.pickle"
+)
+
+# Se incrementa si cambia la estructura guardada en el snapshot
+_VERSION_SNAPSHOT = 1
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto) -> str:
+    """
+    Minúsculas y sin acentos: "Ibuprofeno Ácido" -> "ibuprofeno acido".
+    """
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto) -> list:
+    return [t for t in _SEPARADORES.split(normalizar(texto)) if t]
+
+
+def _distancia_maxima(token: str) -> int:
+    # Palabras cortas toleran menos errores para no devolver ruido
+    return 1 if len(token) <= 5 else config.vademecum_distancia_maxima
+
+
+def _borrados(token: str, distancia: int) -> set:
+    """
+    Variantes de 'token' con hasta 'distancia' caracteres eliminados
+    (esquema SymSpell: dos palabras a distancia <= d comparten algún borrado).
+    """
+    resultado = {token}
+    frontera = {token}
+    for _ in range(distancia):
+        siguiente = set()
+        for palabra in frontera:
+            if len(palabra) <= 1:
+                continue
+            for i in range(len(palabra)):
+                siguiente.add(palabra[:i] + palabra[i + 1:])
+        siguiente -= resultado
+        resultado |= siguiente
+        frontera = siguiente
+    return resultado
+
+
+def _distancia_edicion(a: str, b: str, maximo: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein (transposiciones adyacentes incluidas).
+    Retorna maximo + 1 si se supera el máximo.
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = i
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+            minimo_fila = min(minimo_fila, actual[j])
+        if minimo_fila > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+class IndiceVademecum:
+    """
+    Índice en memoria sobre los nombres comerciales del vademécum.
+
+    El vademécum cambia una vez por mes (se importa del Excel), así que se
+    indexa una sola vez al iniciar y se reutiliza para todas las búsquedas:
+      - búsqueda por prefijo sobre palabras normalizadas (sin acentos ni
+        mayúsculas), con una lista ordenada de palabras y bisect;
+      - tolerancia a errores de tipeo ("ibuprofemo" -> "IBUPROFENO") mediante
+        un diccionario de borrados al estilo SymSpell, verificado con la
+        distancia de Damerau-Levenshtein.
+
+    El índice construido se guarda en RUTA_SNAPSHOT junto con la huella de la
+    tabla (filas vigentes, máximo vademecumID y última versión aplicada); si la
+    huella no cambió, el siguiente inicio carga el snapshot en lugar de
+    reconstruirlo. migrar_vademecum() y sincronizar_vademecum() llaman a
+    invalidar_indice() al cargar datos nuevos.
+    """
+    def __init__(self):
+        self.registros = []     # dicts tal como los devuelve la base
+        self._nombres = []      # nombreComercial normalizado, por posición
+        self._palabras = []     # palabras ordenadas (para prefijos)
+        self._postings = {}     # palabra -> tupla de posiciones en registros
+        self._borrados = {}     # borrado -> tupla de palabras
+        self.huella = None
+
+    # --- Construcción ---
+    def construir(self, registros, huella=None):
+        # Las posiciones siguen el orden alfabético del nombre normalizado,
+        # así el orden de los resultados se decide comparando enteros.
+        registros = sorted(registros, key=lambda r: normalizar(r["nombreComercial"]))
+        postings = {}
+        nombres = []
+        for pos, r in enumerate(registros):
+            nombres.append(normalizar(r["nombreComercial"]))
+            for token in set(tokenizar(r["nombreComercial"])):
+                postings.setdefault(token, []).append(pos)
+
+        borrados = {}
+        for token in postings:
+            for variante in _borrados(token, _distancia_maxima(token)):
+                borrados.setdefault(variante, []).append(token)
+
+        self.registros = registros
+        self._nombres = nombres
+        self._palabras = sorted(postings)
+        self._postings = {t: tuple(p) for t, p in postings.items()}
+        self._borrados = {b: tuple(t) for b, t in borrados.items()}
+        self.huella = huella
+        return self
+
+    # --- Snapshot ---
+    def guardar(self, ruta=RUTA_SNAPSHOT):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump((_VERSION_SNAPSHOT, self.huella, self.__dict__), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, huella, ruta=RUTA_SNAPSHOT):
+        """
+        Retorna el índice guardado en 'ruta' si corresponde a 'huella', o None.
+        """
+        try:
+            with open(ruta, "rb") as f:
+                version, huella_guardada, estado = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if version != _VERSION_SNAPSHOT or huella_guardada != huella:
+            return None
+        indice = cls()
+        indice.__dict__.update(estado)
+        return indice
+
+    # --- Búsqueda ---
+    def _por_prefijo(self, token):
+        palabras = self._palabras
+        i = bisect_left(palabras, token)
+        encontradas = []
+        while i < len(palabras) and palabras[i].startswith(token):
+            encontradas.append(palabras[i])
+            i += 1
+        return encontradas
+
+    def _aproximadas(self, token):
+        maximo = _distancia_maxima(token)
+        candidatas = set()
+        for variante in _borrados(token, maximo):
+            candidatas.update(self._borrados.get(variante, ()))
+        resultado = {}
+        for palabra in candidatas:
+            d = _distancia_edicion(token, palabra, maximo)
+            if d <= maximo:
+                resultado[palabra] = d
+        return resultado
+
+    def buscar(self, termino):
+        """
+        Retorna los registros cuyo nombre comercial contiene palabras que
+        empiezan con cada palabra del 'termino' (o que se le parecen, si
+        alguna palabra no tiene coincidencias exactas).
+
+        Orden: primero los nombres que empiezan con el término completo,
+        luego las coincidencias por prefijo y por último las aproximadas
+        (a menor distancia, antes); dentro de cada grupo, alfabético.
+        """
+        tokens = tokenizar(termino)
+        if not tokens:
+            return list(self.registros)
+
+        posiciones = None
+        distancia_total = {}
+        for token in tokens:
+            coincidencias = {}
+            for palabra in self._por_prefijo(token):
+                for pos in self._postings[palabra]:
+                    coincidencias[pos] = 0
+            if not coincidencias:
+                for palabra, d in self._aproximadas(token).items():
+                    for pos in self._postings[palabra]:
+                        if d < coincidencias.get(pos, d + 1):
+                            coincidencias[pos] = d
+            if posiciones is None:
+                posiciones = set(coincidencias)
+            else:
+                posiciones &= coincidencias.keys()
+            if not posiciones:
+                return []
+            for pos in posiciones:
+                distancia_total[pos] = distancia_total.get(pos, 0) + coincidencias[pos]
+
+        inicio = normalizar(termino).strip()
+        nombres = self._nombres
+
+        def orden(pos):
+            return (
+                0 if nombres[pos].startswith(inicio) else 1,
+                distancia_total[pos],
+                pos,
+            )
+        return [self.registros[pos] for pos in sorted(posiciones, key=orden)]
+
+
+# Cambia con cada migración o sincronización (ver datos/sincronizar_vademecum.py)
+_SQL_HUELLA = """
+    SELECT COUNT(*) AS filas, MAX(vademecumID) AS ultimo,
+           (SELECT MAX(versionID) FROM vademecum_versiones) AS version
+    FROM vademecum
+    WHERE vigente = 1
+"""
+
+
+def _leer_tabla():
+    """
+    Retorna (registros, huella) de la tabla vademecum.
+    """
+    with ConexionBD.sesion(dictionary=True) as cursor:
+        cursor.execute(_SQL_HUELLA)
+        huella = tuple(cursor.fetchone().values())
+        cursor.execute("""
+            SELECT vademecumID, nombreComercial, presentacion,
+                   accionFarmacologica, principioActivo, laboratorio
+            FROM vademecum
+            WHERE vigente = 1
+        """)
+        return cursor.fetchall(), huella
+
+
+def huella_actual():
+    """
+    (filas vigentes, máximo vademecumID, última versión aplicada): cambia
+    cada vez que se migra o sincroniza el vademécum.
+    """
+    with ConexionBD.sesion() as cursor:
+        cursor.execute(_SQL_HUELLA)
+        return tuple(cursor.fetchone())
+
+
+_indice = None
+_candado = threading.Lock()
+
+def obtener_indice():
+    """
+    Retorna el índice compartido por el proceso, construyéndolo (o cargándolo
+    del snapshot) en el primer uso. Retorna None si está desactivado en
+    config o si no pudo leerse la tabla; en ese caso se busca en MySQL.
+    """
+    global _indice
+    if not config.vademecum_indice_memoria:
+        return None
+    if _indice is not None:
+        return _indice
+    with _candado:
+        if _indice is None:
+            try:
+                indice = IndiceVademecum.cargar(huella_actual())
+                if indice is None:
+                    registros, huella = _leer_tabla()
+                    indice = IndiceVademecum().construir(registros, huella)
+                    try:
+                        indice.guardar()
+                    except OSError as e:
+                        print("No se pudo guardar el snapshot del vademecum:", e)
+                _indice = indice
+            except (Error, RuntimeError) as e:
+                print("No se pudo construir el índice del vademecum:", e)
+                return None
+    return _indice
+
+
+def invalidar_indice(borrar_snapshot=True):
+    """
+    Descarta el índice en memoria y, salvo que se indique lo contrario, su
+    snapshot. Se reconstruye (o recarga) en el siguiente obtener_indice().
+    """
+    global _indice
+    with _candado:
+        _indice = None
+        if not borrar_snapshot:
+            return
+        try:
+            os.remove(RUTA_SNAPSHOT)
+        except FileNotFoundError:
+            pass
@@ -1,40 +1,77 @@
 # src/principal.py
 
+import time
+_INICIO_PROCESO = time.perf_counter()
+
 import os
 import customtkinter as ctk
 from pathlib import Path
 
+import config
 from datos.crear_tablas import TablaCreator
 
-# ① Importar la función de migración
-from scripts.migrate_passwords import migrar_passwords
-
 # Configuración del tema y apariencia de CustomTkinter
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme(Path(__file__).parent / "farmanaccio-theme.json")
 
 def principal():
+    from datos.bootstrap import Cronometro, versiones_aplicadas, pendientes, registrar
+    crono = Cronometro(_INICIO_PROCESO)
+    crono.marcar("importación de módulos")
+
+    # 0. Ruta rápida: si todos los pasos de inicialización ya se ejecutaron en
+    #    su versión vigente (una consulta), se omiten los pasos 1 a 3.
+    faltan = pendientes(versiones_aplicadas())
+    crono.marcar("versiones de arranque")
+
     # 1. Crear la base de datos y las tablas correspondientes
-    creador = TablaCreator()
-    creador.crear_base_de_datos_y_tablas()
+    if "esquema" in faltan:
+        creador = TablaCreator()
+        if creador.crear_base_de_datos_y_tablas():
+            registrar("esquema")
+        crono.marcar("esquema y datos iniciales")
+
+    # 1b. Aplicar las migraciones de esquema pendientes (índices, columnas nuevas)
+    if "migraciones" in faltan:
+        from datos.migraciones import aplicar_migraciones
+        if aplicar_migraciones():
+            registrar("migraciones")
+        crono.marcar("migraciones de esquema")
 
     # 2. Migrar contraseñas (después de crear la tabla usuarios)
-    try:
-        from scripts.migrate_passwords import migrar_passwords
-        migrar_passwords()
-        print("Migración de contraseñas completada.")
-    except Exception as e:
-        print("Error al migrar contraseñas:", e)
+    if "esquema" in faltan or "passwords" in faltan:
+        try:
+            from scripts.migrate_passwords import migrar_passwords
+            migrar_passwords()
+            registrar("passwords")
+            print("Migración de contraseñas completada.")
+        except Exception as e:
+            print("Error al migrar contraseñas:", e)
+        crono.marcar("migración de contraseñas")
 
     # 3. Ejecutar la migración del vademécum
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    ruta_excel = os.path.join(current_dir, "datos", "vademecum-marzo2025.xlsx")
-    from datos.migrar_vademecum import migrar_vademecum
-    migrar_vademecum(ruta_excel)
+    if "vademecum" in faltan:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        ruta_excel = os.path.join(current_dir, "datos", "vademecum-marzo2025.xlsx")
+        from datos.migrar_vademecum import migrar_vademecum
+        if migrar_vademecum(ruta_excel):
+            registrar("vademecum")
+        crono.marcar("migración del vademécum")
+
+    # 4. Construir (o cargar del snapshot) el índice de búsqueda del vademécum
+    from logica.indice_vademecum import obtener_indice
+    obtener_indice()
+    crono.marcar("índice del vademécum")
 
-    # 4. Iniciar la pantalla de login
+    # 5. Iniciar la pantalla de login
     from gui.login import LoginWindow
     login = LoginWindow()
+    crono.marcar("ventana de login")
+
+    def _login_visible():
+        crono.marcar("primer dibujado del login")
+        print(crono.informe(config.arranque_objetivo_ms))
+    login.after_idle(_login_visible)
     login.mainloop()
 
 
@@ -0,0 +1,331 @@
+# scripts/generar_datos.py
+"""
+Genera datos sintéticos a escala sobre el esquema real para medir
+rendimiento contra un MySQL/MariaDB local.
+
+Llena productos, lotes_productos, clientes, facturas, factura_detalles,
+Remito y RemitoDetalle con distribuciones realistas:
+  - precios log-normales; popularidad de productos sesgada (pocos productos
+    concentran la mayoría de los lotes y de las ventas);
+  - ingresos de lotes repartidos en los últimos dos años y vencimientos a
+    1-3 años del ingreso, con una fracción vencida o por vencer;
+  - canastas de 1 a 15 renglones (la mayoría de 1 a 3) y cantidades bajas;
+  - descuentos, tipo de factura y condición de IVA con pesos fijos.
+
+Todo se deriva de --semilla y --hoy (fecha de referencia), por lo que dos
+corridas con los mismos parámetros sobre una base vacía generan los mismos
+datos. Los inserts se hacen en lotes de varias filas, confirmando cada lote,
+con las verificaciones de claves foráneas y unicidad desactivadas en la
+sesión; productos.stock se recalcula al final a partir de los lotes.
+
+No toca usuarios ni vademecum. Con --vaciar borra antes las tablas
+generadas: usar solo en una base de pruebas.
+
+Uso (desde la raíz del proyecto):
+    python -m scripts.generar_datos --escala chica
+    python -m scripts.generar_datos --escala grande --semilla 7 --hoy 2025-03-01 --vaciar
+    python -m scripts.generar_datos --productos 50000 --lotes 500000 \\
+        --lineas 2000000 --clientes 100000
+"""
+import argparse
+import datetime
+import random
+import sys
+import time
+
+from datos.conexion_bd import ConexionBD
+from mysql.connector import Error
+
+ESCALAS = {
+    #          productos  lotes     líneas     clientes  remitos
+    "chica":  (1_000,     10_000,   20_000,    2_000,    500),
+    "media":  (10_000,    100_000,  400_000,   20_000,   5_000),
+    "grande": (50_000,    500_000,  2_000_000, 100_000,  20_000),
+}
+
+# Tablas que genera el script, en orden de borrado (hijas primero)
+TABLAS = ["RemitoDetalle", "Remito", "factura_detalles", "facturas",
+          "lotes_productos", "clientes", "productos"]
+
+_BASES = ["Ibupirac", "Amoxidal", "Tafirol", "Buscapina", "Sertal", "Losacor",
+          "Atenolol", "Omeprazol", "Clonazepam", "Enalapril", "Levotiroxina",
+          "Metformina", "Diclofenac", "Loratadina", "Cetirizina", "Paracetamol",
+          "Ranitidina", "Simvastatina", "Salbutamol", "Prednisona"]
+_FORMAS = ["comp.", "caps.", "jarabe", "gotas", "crema", "amp.", "susp."]
+_DOSIS = [5, 10, 20, 25, 40, 50, 100, 200, 250, 400, 500, 600, 750, 1000]
+_NOMBRES = ["Carlos", "María", "Pedro", "Lucía", "José", "Ana", "Jorge", "Laura",
+            "Diego", "Sofía", "Martín", "Valeria", "Pablo", "Carolina", "Juan",
+            "Florencia", "Luis", "Paula", "Miguel", "Agustina"]
+_APELLIDOS = ["López", "González", "Fernández", "Martínez", "Ramírez", "Pérez",
+              "Gómez", "Díaz", "Sánchez", "Romero", "Sosa", "Álvarez", "Torres",
+              "Ruiz", "Benítez", "Acosta", "Medina", "Herrera", "Suárez", "Aguirre"]
+_CALLES = ["Alfa", "Beta", "Gamma", "Delta", "San Martín", "Belgrano", "Rivadavia",
+           "Mitre", "Sarmiento", "Moreno", "Urquiza", "Güemes"]
+_IVA = (["Cons. Final", "Monotributo", "Resp. Insc.", "Exento", "Eventual"],
+        [60, 20, 15, 4, 1])
+_TIPO_FACTURA = (["B", "A", "C"], [80, 15, 5])
+_DESCUENTO = ([0, 5, 10, 15, 20], [80, 8, 7, 3, 2])
+_RENGLONES = (list(range(1, 16)), [35, 25, 15, 8, 5, 4, 2, 2, 1, 1, 0.5, 0.5, 0.4, 0.3, 0.3])
+_CANTIDAD = ([1, 2, 3, 4, 5, 10], [70, 18, 6, 3, 2, 1])
+
+
+def _popular(rnd, n) -> int:
+    """
+    Índice en [0, n) sesgado hacia los primeros (≈ 20 % concentra el 60 %).
+    """
+    return min(int(n * rnd.random() ** 2.5), n - 1)
+
+
+def _siguiente_id(cursor, tabla, columna) -> int:
+    cursor.execute(f"SELECT IFNULL(MAX({columna}), 0) + 1 FROM {tabla}")
+    return int(cursor.fetchone()[0])
+
+
+def _insertar(conexion, cursor, tabla, sql, filas_iter, total, tamanio_lote):
+    """
+    Inserta las filas de 'filas_iter' en lotes de 'tamanio_lote', confirmando
+    cada lote, e informa el progreso.
+    """
+    inicio = time.perf_counter()
+    hechas = 0
+    lote = []
+
+    def volcar():
+        nonlocal hechas
+        cursor.executemany(sql, lote)
+        conexion.commit()
+        hechas += len(lote)
+        lote.clear()
+        velocidad = hechas / (time.perf_counter() - inicio)
+        print(f"  {tabla}: {hechas}/{total} filas ({velocidad:.0f} filas/s)", end="\r")
+
+    for fila in filas_iter:
+        lote.append(fila)
+        if len(lote) >= tamanio_lote:
+            volcar()
+    if lote:
+        volcar()
+    print(f"  {tabla}: {hechas} filas en {time.perf_counter() - inicio:.1f} s" + " " * 20)
+    return hechas
+
+
+def _productos(rnd, desde_id, n):
+    precios = []
+    def filas():
+        for i in range(n):
+            nombre = (f"{rnd.choice(_BASES)} {rnd.choice(_DOSIS)} mg "
+                      f"{rnd.choice(_FORMAS)} #{desde_id + i}")
+            precio = round(min(rnd.lognormvariate(8.0, 0.8), 9_999_999), 2)
+            precios.append(precio)
+            yield (desde_id + i, nombre, precio, 0, 1)
+    return precios, filas()
+
+
+def _lotes(rnd, prod_ids, n, hoy):
+    for i in range(n):
+        prod_id = prod_ids[_popular(rnd, len(prod_ids))]
+        ingreso = hoy - datetime.timedelta(days=rnd.randint(0, 730))
+        # Vida útil de 1 a 3 años; una parte ya vencida o por vencer según el ingreso
+        vencimiento = ingreso + datetime.timedelta(days=int(rnd.triangular(365, 1095, 540)))
+        ingresada = rnd.choice([10, 20, 24, 30, 50, 60, 100, 120, 200, 500])
+        # Los lotes más antiguos están más consumidos
+        consumido = min(1.0, (hoy - ingreso).days / 730 * rnd.uniform(0.5, 1.5))
+        disponible = max(0, int(ingresada * (1 - consumido)))
+        yield (prod_id, f"L{i:08d}", ingreso, vencimiento, ingresada, disponible)
+
+
+def _clientes(rnd, desde_id, n):
+    for i in range(n):
+        cid = desde_id + i
+        nombre, apellido = rnd.choice(_NOMBRES), rnd.choice(_APELLIDOS)
+        yield (cid, nombre, apellido, f"{rnd.choice([20, 23, 27, 30])}-{cid:08d}-{cid % 10}",
+               f"11-{rnd.randint(4000, 6999)}-{rnd.randint(0, 9999):04d}",
+               f"{nombre}.{apellido}{cid}@ejemplo.com".lower(),
+               f"Calle {rnd.choice(_CALLES)} {rnd.randint(1, 9999)}",
+               rnd.choices(*_IVA)[0])
+
+
+def _ventas(rnd, prod_ids, precios, cliente_ids, lineas, desde_factura, hoy, facturas, detalles):
+    """
+    Genera facturas hasta completar 'lineas' renglones. Las cabeceras se
+    agregan a 'facturas' y los renglones a 'detalles' (los consume _insertar).
+    """
+    factura_id = desde_factura
+    generadas = 0
+    while generadas < lineas:
+        renglones = min(rnd.choices(*_RENGLONES)[0], lineas - generadas)
+        bruto = 0.0
+        for _ in range(renglones):
+            k = _popular(rnd, len(prod_ids))
+            cantidad = rnd.choices(*_CANTIDAD)[0]
+            bruto += precios[k] * cantidad
+            detalles.append((factura_id, prod_ids[k], cantidad, precios[k]))
+        descuento = rnd.choices(*_DESCUENTO)[0]
+        cliente = rnd.choice(cliente_ids) if cliente_ids and rnd.random() < 0.4 else None
+        fecha = hoy - datetime.timedelta(days=rnd.randint(0, 365))
+        hora = datetime.time(rnd.randint(8, 20), rnd.randint(0, 59), rnd.randint(0, 59))
+        facturas.append((factura_id, cliente, fecha, hora,
+                         round(bruto * (1 - descuento / 100), 2), round(bruto, 2),
+                         descuento, rnd.choices(*_TIPO_FACTURA)[0]))
+        factura_id += 1
+        generadas += renglones
+        yield renglones
+
+
+def _remitos(rnd, cliente_rows, prod_ids, desde_id, n, hoy, detalles):
+    for i in range(n):
+        remito_id = desde_id + i
+        cid, cuit, iva, direccion = cliente_rows[_popular(rnd, len(cliente_rows))]
+        inicio = hoy - datetime.timedelta(days=rnd.randint(0, 365))
+        for _ in range(rnd.randint(1, 5)):
+            detalles.append((remito_id, prod_ids[_popular(rnd, len(prod_ids))], rnd.randint(1, 50)))
+        yield (remito_id, cid, cuit, iva, direccion, inicio, inicio + datetime.timedelta(days=30))
+
+
+def _vaciar(cursor):
+    for tabla in TABLAS:
+        cursor.execute(f"TRUNCATE TABLE {tabla}")
+
+
+def generar(productos, lotes, lineas, clientes, remitos, semilla=1, hoy=None,
+            tamanio_lote=5000, vaciar=False):
+    hoy = hoy or datetime.date.today()
+    rnd = random.Random(semilla)
+    conexion = ConexionBD.obtener_conexion()
+    if conexion is None:
+        raise RuntimeError("No se pudo conectar a la base de datos.")
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+        if vaciar:
+            _vaciar(cursor)
+        print(f"Semilla {semilla}, fecha de referencia {hoy.isoformat()}")
+
+        desde = _siguiente_id(cursor, "productos", "prodID")
+        precios, filas = _productos(rnd, desde, productos)
+        _insertar(conexion, cursor, "productos",
+                  "INSERT INTO productos (prodID, nombre, precio, stock, activo) VALUES (%s,%s,%s,%s,%s)",
+                  filas, productos, tamanio_lote)
+        prod_ids = list(range(desde, desde + productos))
+
+        _insertar(conexion, cursor, "lotes_productos", """
+            INSERT INTO lotes_productos
+              (prodID, numeroLote, fechaIngreso, vencimiento, cantidad_ingresada, cantidad_disponible)
+            VALUES (%s,%s,%s,%s,%s,%s)
+        """, _lotes(rnd, prod_ids, lotes, hoy), lotes, tamanio_lote)
+
+        desde = _siguiente_id(cursor, "clientes", "clienteID")
+        cliente_rows = []
+        def filas_clientes():
+            for fila in _clientes(rnd, desde, clientes):
+                cliente_rows.append((fila[0], fila[3], fila[7], fila[6]))
+                yield fila
+        _insertar(conexion, cursor, "clientes", """
+            INSERT INTO clientes (clienteID, nombre, apellido, `cuil-cuit`, telefono, email, direccion, iva)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        """, filas_clientes(), clientes, tamanio_lote)
+        cliente_ids = [c[0] for c in cliente_rows]
+
+        # Facturas y renglones se generan juntos y se vuelcan por lotes
+        facturas, detalles = [], []
+        sql_factura = """
+            INSERT INTO facturas
+              (facturaID, clienteID, fechaEmision, horaEmision, total_neto, total_bruto, descuento, tipoFactura)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        """
+        sql_detalle = """
+            INSERT INTO factura_detalles (facturaID, prodID, cantidad, precioUnitario)
+            VALUES (%s,%s,%s,%s)
+        """
+        inicio = time.perf_counter()
+        total_facturas = total_lineas = 0
+        for renglones in _ventas(rnd, prod_ids, precios, cliente_ids, lineas,
+                                 _siguiente_id(cursor, "facturas", "facturaID"), hoy, facturas, detalles):
+            total_lineas += renglones
+            if len(detalles) >= tamanio_lote:
+                cursor.executemany(sql_factura, facturas)
+                cursor.executemany(sql_detalle, detalles)
+                conexion.commit()
+                total_facturas += len(facturas)
+                facturas.clear()
+                detalles.clear()
+                print(f"  facturas: {total_facturas} facturas, {total_lineas}/{lineas} renglones", end="\r")
+        if facturas:
+            cursor.executemany(sql_factura, facturas)
+            cursor.executemany(sql_detalle, detalles)
+            conexion.commit()
+            total_facturas += len(facturas)
+        print(f"  facturas: {total_facturas} facturas, {total_lineas} renglones "
+              f"en {time.perf_counter() - inicio:.1f} s" + " " * 20)
+
+        if remitos and cliente_rows:
+            detalles_remito = []
+            _insertar(conexion, cursor, "Remito", """
+                INSERT INTO Remito
+                  (remitoID, clienteID, cuit_cuil, ivaEstado, direccionCliente, fechaInicio, vencimientoRemito)
+                VALUES (%s,%s,%s,%s,%s,%s,%s)
+            """, _remitos(rnd, cliente_rows, prod_ids, _siguiente_id(cursor, "Remito", "remitoID"),
+                          remitos, hoy, detalles_remito), remitos, tamanio_lote)
+            _insertar(conexion, cursor, "RemitoDetalle",
+                      "INSERT INTO RemitoDetalle (remitoID, prodID, cantidad) VALUES (%s,%s,%s)",
+                      detalles_remito, len(detalles_remito), tamanio_lote)
+
+        # El stock de cada producto es la suma de sus lotes (en una sola sentencia)
+        cursor.execute("""
+            UPDATE productos p
+            JOIN (SELECT prodID, SUM(cantidad_disponible) AS total
+                  FROM lotes_productos
+                  WHERE prodID >= %s
+                  GROUP BY prodID) l ON l.prodID = p.prodID
+            SET p.stock = l.total
+        """, (prod_ids[0] if prod_ids else 0,))
+        conexion.commit()
+        cursor.execute("ANALYZE TABLE " + ", ".join(TABLAS))
+        cursor.fetchall()
+    except Error:
+        conexion.rollback()
+        raise
+    finally:
+        try:
+            cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+        except Error:
+            pass
+        cursor.close()
+        conexion.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--escala", choices=sorted(ESCALAS), default="chica")
+    ap.add_argument("--productos", type=int)
+    ap.add_argument("--lotes", type=int)
+    ap.add_argument("--lineas", type=int, help="renglones de factura")
+    ap.add_argument("--clientes", type=int)
+    ap.add_argument("--remitos", type=int)
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--hoy", type=datetime.date.fromisoformat, default=None,
+                    help="fecha de referencia AAAA-MM-DD (por defecto hoy)")
+    ap.add_argument("--tamanio-lote", type=int, default=5000, help="filas por INSERT")
+    ap.add_argument("--vaciar", action="store_true", help="vaciar antes las tablas generadas")
+    args = ap.parse_args()
+
+    productos, lotes, lineas, clientes, remitos = ESCALAS[args.escala]
+    inicio = time.perf_counter()
+    try:
+        generar(
+            productos=args.productos if args.productos is not None else productos,
+            lotes=args.lotes if args.lotes is not None else lotes,
+            lineas=args.lineas if args.lineas is not None else lineas,
+            clientes=args.clientes if args.clientes is not None else clientes,
+            remitos=args.remitos if args.remitos is not None else remitos,
+            semilla=args.semilla, hoy=args.hoy,
+            tamanio_lote=args.tamanio_lote, vaciar=args.vaciar,
+        )
+    except (Error, RuntimeError) as e:
+        print("Error al generar datos:", e)
+        sys.exit(1)
+    print(f"Datos generados en {time.perf_counter() - inicio:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
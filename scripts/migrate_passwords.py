@@ -3,20 +3,13 @@ from datos.conexion_bd import ConexionBD
 from utils.security import hash_password, is_hashed
 
 def migrar_passwords():
-    cnx = ConexionBD.obtener_conexion()
-    cur = cnx.cursor()
-    cur.execute("USE farmanaccio_db")
+    with ConexionBD.sesion() as cur:
+        cur.execute("SELECT userID, password FROM usuarios")
+        usuarios = cur.fetchall()
 
-    cur.execute("SELECT userID, password FROM usuarios")
-    for userID, pwd in cur.fetchall():
-        # solo hash si NO es ya un hash válido
-        if not is_hashed(pwd):
-            nuevo = hash_password(pwd)
-            cur.execute(
-                "UPDATE usuarios SET password=%s WHERE userID=%s",
-                (nuevo, userID)
-            )
-
-    cnx.commit()
-    cur.close()
-    cnx.close()
+    # solo hash si NO es ya un hash válido
+    cambios = [(hash_password(pwd), userID) for userID, pwd in usuarios if not is_hashed(pwd)]
+    if not cambios:
+        return
+    with ConexionBD.sesion(commit=True) as cur:
+        cur.executemany("UPDATE usuarios SET password=%s WHERE userID=%s", cambios)
@@ -0,0 +1,135 @@
+# scripts/reimprimir_facturas.py
+"""
+Reimpresión / exportación masiva de facturas, sin interfaz gráfica.
+
+Lee las facturas de un rango de fechas con dos consultas (cabeceras con
+cliente y detalle) y genera los PDF en paralelo con un pool de procesos,
+usando el backend de documentos configurado o el indicado por parámetro.
+Con el backend libreoffice el servidor se inicia una sola vez en el proceso
+principal y los procesos del pool solo se conectan a él.
+
+Uso (desde la raíz del proyecto):
+    python -m scripts.reimprimir_facturas --desde 2025-03-01 --hasta 2025-03-31 --salida facturas_marzo
+    python -m scripts.reimprimir_facturas --desde 2025-03-01 --hasta 2025-03-31 \\
+        --salida facturas_marzo --unir marzo.pdf --backend reportlab --procesos 4
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+from datos.conexion_bd import ConexionBD
+from logica.backends_documentos import BackendLibreOffice, obtener_backend
+from logica.generar_factura import FacturaGenerator
+
+_backend = None     # backend de cada proceso del pool
+
+
+def _inicializar_proceso(backend, servidor=None):
+    """
+    'servidor': (host, puerto) del LibreOffice iniciado por el proceso
+    principal, o None para los demás backends.
+    """
+    global _backend
+    if servidor is not None:
+        _backend = BackendLibreOffice(*servidor, lanzar=False)
+    else:
+        _backend = obtener_backend(backend)
+    # docx2pdf usa COM (Microsoft Word) en Windows
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+
+
+def _renderizar(factura, detalles, cliente, ruta_pdf):
+    """
+    Trabajo de cada proceso: arma el contexto y genera el PDF.
+    """
+    fg = FacturaGenerator()
+    ctx = fg.construir_contexto(factura, cliente)
+    _backend.generar_factura(fg, ctx, detalles, ruta_pdf)
+    return factura["facturaID"], ruta_pdf
+
+
+def leer_facturas(desde, hasta):
+    with ConexionBD.sesion(dictionary=True) as cur:
+        return FacturaGenerator().obtener_facturas_por_rango(cur, desde, hasta)
+
+
+def unir_pdfs(rutas, destino):
+    from pypdf import PdfWriter
+    escritor = PdfWriter()
+    for ruta in rutas:
+        escritor.append(ruta)
+    with open(destino, "wb") as f:
+        escritor.write(f)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--desde", required=True, type=datetime.date.fromisoformat)
+    ap.add_argument("--hasta", required=True, type=datetime.date.fromisoformat)
+    ap.add_argument("--salida", required=True, help="directorio donde se escriben los PDF")
+    ap.add_argument("--unir", help="además, unir todas las facturas en este PDF (requiere pypdf)")
+    ap.add_argument("--backend", default=config.backend_documentos)
+    ap.add_argument("--procesos", type=int, default=None,
+                    help="procesos en paralelo (por defecto 1 con docx2pdf, o la cantidad de CPUs)")
+    args = ap.parse_args()
+
+    procesos = args.procesos or (1 if args.backend == "docx2pdf" else os.cpu_count())
+    os.makedirs(args.salida, exist_ok=True)
+
+    inicio = time.perf_counter()
+    facturas = leer_facturas(args.desde, args.hasta)
+    lectura = time.perf_counter() - inicio
+    total = len(facturas)
+    print(f"{total} facturas entre {args.desde} y {args.hasta} (lectura: {lectura:.2f} s)")
+    if not total:
+        return
+
+    servidor = None
+    if args.backend == BackendLibreOffice.nombre:
+        # Un único LibreOffice para todo el pool; se cierra al salir (atexit)
+        libreoffice = obtener_backend(args.backend)
+        libreoffice.asegurar_servidor()
+        servidor = (libreoffice.host, libreoffice.puerto)
+
+    generadas, errores = {}, 0
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso,
+                             initargs=(args.backend, servidor)) as pool:
+        futuros = {
+            pool.submit(
+                _renderizar, factura, detalles, cliente,
+                os.path.abspath(os.path.join(args.salida, f"factura-{factura['facturaID']}.pdf"))
+            ): factura["facturaID"]
+            for factura, detalles, cliente in facturas
+        }
+        for hechas, futuro in enumerate(as_completed(futuros), start=1):
+            factura_id = futuros[futuro]
+            try:
+                _, ruta = futuro.result()
+                generadas[factura_id] = ruta
+            except Exception as ex:
+                errores += 1
+                print(f"  Error en factura {factura_id}: {ex}", file=sys.stderr)
+            transcurrido = time.perf_counter() - inicio
+            print(f"\r[{hechas}/{total}] {hechas / transcurrido:.1f} facturas/s", end="", flush=True)
+    duracion = time.perf_counter() - inicio
+    print(f"\n{len(generadas)} PDF generados en {duracion:.2f} s "
+          f"({len(generadas) / duracion:.1f} facturas/s, {procesos} procesos, backend {args.backend}); "
+          f"{errores} errores")
+
+    if args.unir and generadas:
+        unir_pdfs([generadas[fid] for fid in sorted(generadas)], args.unir)
+        print(f"PDF unificado: {args.unir}")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
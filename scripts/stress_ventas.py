@@ -0,0 +1,147 @@
+# scripts/stress_ventas.py
+"""
+Prueba de carga de ventas concurrentes contra un MySQL/MariaDB local.
+
+Crea varios productos de prueba con varios lotes cada uno y lanza N hilos
+que venden en paralelo con VentaManager.registrar_venta (sin generar
+documentos). Cada carrito lleva al menos dos de esos productos en orden
+aleatorio, de modo que las transacciones compiten por las mismas filas en
+distinto orden: es lo que ejercita el bloqueo en orden de prodID y el
+reintento ante deadlock (1213) o espera agotada (1205). Al final verifica
+que no se perdió ni se duplicó stock:
+
+  - ningún lote quedó con cantidad negativa,
+  - por producto y en total: stock inicial == stock restante + unidades facturadas,
+  - productos.stock coincide con la suma de sus lotes,
+
+e informa cuántas transacciones se reintentaron.
+
+Uso (desde la raíz del proyecto):
+    python -m scripts.stress_ventas --hilos 4 --ventas 50 --productos 5 --lotes 5 --stock-lote 40
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+
+from datos.conexion_bd import ConexionBD
+from logica.gestor_ventas import VentaManager
+
+
+def preparar_productos(cantidad: int, lotes: int, stock_lote: int) -> list:
+    marca = int(time.time())
+    total = lotes * stock_lote
+    prod_ids = []
+    with ConexionBD.sesion(commit=True) as cur:
+        for n in range(cantidad):
+            cur.execute(
+                "INSERT INTO productos(nombre,precio,stock,activo) VALUES(%s,%s,%s,1)",
+                (f"STRESS {marca}-{n}", 100.0, total)
+            )
+            prod_id = cur.lastrowid
+            cur.executemany("""
+                INSERT INTO lotes_productos
+                  (prodID, numeroLote, fechaIngreso, vencimiento, cantidad_ingresada, cantidad_disponible)
+                VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL %s DAY), %s, %s)
+            """, [(prod_id, f"ST{i}", 30 + i, stock_lote, stock_lote) for i in range(lotes)])
+            prod_ids.append(prod_id)
+    return prod_ids
+
+
+def verificar(prod_ids: list, stock_inicial: int) -> bool:
+    """
+    'stock_inicial': unidades iniciales de cada producto.
+    """
+    marcadores = ", ".join(["%s"] * len(prod_ids))
+    with ConexionBD.sesion() as cur:
+        cur.execute(f"""
+            SELECT prodID, IFNULL(SUM(cantidad_disponible),0), IFNULL(MIN(cantidad_disponible),0)
+            FROM lotes_productos WHERE prodID IN ({marcadores})
+            GROUP BY prodID
+        """, tuple(prod_ids))
+        lotes = {pid: (int(restante), int(minimo)) for pid, restante, minimo in cur.fetchall()}
+        cur.execute(f"""
+            SELECT prodID, IFNULL(SUM(cantidad),0) FROM factura_detalles
+            WHERE prodID IN ({marcadores}) GROUP BY prodID
+        """, tuple(prod_ids))
+        vendidos = {pid: int(v) for pid, v in cur.fetchall()}
+        cur.execute(f"SELECT prodID, stock FROM productos WHERE prodID IN ({marcadores})", tuple(prod_ids))
+        stocks = {pid: int(s) for pid, s in cur.fetchall()}
+
+    ok = True
+    for pid in prod_ids:
+        restante, minimo = lotes.get(pid, (0, 0))
+        vendido = vendidos.get(pid, 0)
+        print(f"  producto {pid}: vendido {vendido}, restante {restante}, "
+              f"productos.stock {stocks.get(pid)}, mínimo por lote {minimo}")
+        if minimo < 0:
+            print(f"ERROR: el producto {pid} tiene lotes con cantidad negativa.")
+            ok = False
+        if restante + vendido != stock_inicial:
+            print(f"ERROR: se perdió o duplicó stock del producto {pid}.")
+            ok = False
+        if stocks.get(pid) != restante:
+            print(f"ERROR: productos.stock de {pid} no coincide con la suma de sus lotes.")
+            ok = False
+
+    total_inicial = stock_inicial * len(prod_ids)
+    total_restante = sum(r for r, _ in lotes.values())
+    total_vendido = sum(vendidos.values())
+    print(f"Total: inicial {total_inicial}, vendido {total_vendido}, restante {total_restante}")
+    if total_restante + total_vendido != total_inicial:
+        print("ERROR: el stock total no cuadra.")
+        ok = False
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--hilos", type=int, default=4)
+    ap.add_argument("--ventas", type=int, default=50, help="ventas por hilo")
+    ap.add_argument("--productos", type=int, default=5, help="productos compartidos por todos los hilos")
+    ap.add_argument("--max-por-carrito", type=int, default=4, help="productos por carrito (mínimo 2)")
+    ap.add_argument("--lotes", type=int, default=5)
+    ap.add_argument("--stock-lote", type=int, default=40)
+    ap.add_argument("--max-cantidad", type=int, default=3)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args()
+    if args.productos < 2:
+        ap.error("--productos debe ser al menos 2")
+
+    prod_ids = preparar_productos(args.productos, args.lotes, args.stock_lote)
+    stock_inicial = args.lotes * args.stock_lote
+    max_por_carrito = max(2, min(args.max_por_carrito, len(prod_ids)))
+    resultados = {"ok": 0, "rechazadas": 0, "reintentos": 0}
+    candado = threading.Lock()
+
+    def vendedor(n):
+        rnd = random.Random(args.semilla + n)
+        vm = VentaManager()
+        for _ in range(args.ventas):
+            # sample() devuelve los productos en orden aleatorio
+            elegidos = rnd.sample(prod_ids, rnd.randint(2, max_por_carrito))
+            carrito = [{"prodID": pid, "cantidad": rnd.randint(1, args.max_cantidad)} for pid in elegidos]
+            ok, _, _ = vm.registrar_venta(carrito)
+            with candado:
+                resultados["ok" if ok else "rechazadas"] += 1
+        with candado:
+            resultados["reintentos"] += vm.reintentos
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=vendedor, args=(i,)) for i in range(args.hilos)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    total = resultados["ok"] + resultados["rechazadas"]
+    print(f"{total} intentos en {duracion:.2f} s ({total / duracion:.1f} ventas/s): "
+          f"{resultados['ok']} confirmadas, {resultados['rechazadas']} rechazadas, "
+          f"{resultados['reintentos']} reintentos por deadlock o espera agotada")
+    sys.exit(0 if verificar(prod_ids, stock_inicial) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# scripts/verificar_explain.py
+"""
+Verifica con EXPLAIN que las consultas frecuentes de los gestores de logica/
+usen índices. El SQL no se copia a mano: se ejecutan los métodos de los
+gestores con datos de ejemplo, se graban las sentencias que emiten
+(datos.instrumentacion.grabar) y se analiza cada SELECT grabado. Falla
+(código de salida 1) si alguna recorre completa una tabla que debería
+resolverse por índice (type = ALL).
+
+Solo se ejecutan métodos de lectura: el script no modifica la base.
+
+Conviene ejecutarlo sobre una base con datos de volumen realista: con tablas
+casi vacías el optimizador puede preferir un recorrido completo aunque el
+índice exista.
+
+Uso:
+    python -m scripts.verificar_explain
+"""
+import sys
+
+import config
+from datos import instrumentacion
+from datos.conexion_bd import ConexionBD
+from mysql.connector import Error
+from logica.gestor_clientes import ClienteManager
+from logica.gestor_inventario import GestorInventario
+from logica.gestor_stock import StockManager
+from logica.gestor_vademecum import VademecumManager
+from logica.gestor_ventas import VentaManager
+from logica.generar_factura import FacturaGenerator
+
+PRODUCTOS = (1, 2)
+TERMINO = "ibu"
+PAGINA = 200    # TablaVirtual.TAMANIO_PAGINA
+
+
+def _con_cursor(funcion):
+    """
+    Para los métodos que reciben el cursor de la transacción del llamador.
+    """
+    def llamar():
+        with ConexionBD.sesion(dictionary=True) as cursor:
+            funcion(cursor)
+    return llamar
+
+
+# (método, llamada con datos de ejemplo, tablas que no deben recorrerse completas)
+# Se ejecutan los métodos reales y se analiza el SQL que emiten.
+CONSULTAS = [
+    ("VentaManager._leer_productos_y_lotes",
+     _con_cursor(lambda cur: VentaManager()._leer_productos_y_lotes(cur, PRODUCTOS)),
+     {"productos", "lotes_productos"}),
+    ("GestorInventario.obtener_detalle_lotes",
+     lambda: GestorInventario().obtener_detalle_lotes(PRODUCTOS[0]), {"lotes_productos"}),
+    ("GestorInventario.obtener_inventario_agrupado",
+     lambda: GestorInventario().obtener_inventario_agrupado(), {"lotes_productos"}),
+    ("GestorInventario.obtener_detalles_generales_producto",
+     lambda: GestorInventario().obtener_detalles_generales_producto("ibuprofeno"), {"vademecum"}),
+    ("VademecumManager.buscar_vademecum",
+     lambda: VademecumManager().buscar_vademecum(TERMINO), {"vademecum"}),
+    ("VademecumManager.buscar_vademecum_multicampo",
+     lambda: VademecumManager().buscar_vademecum_multicampo(TERMINO), {"vademecum"}),
+    # Tablas virtualizadas: total y página, sin filtro y con búsqueda por nombre
+    ("StockManager.contar_productos",
+     lambda: StockManager().contar_productos(TERMINO, config.busqueda_limite), {"productos"}),
+    ("StockManager.obtener_productos_pagina",
+     lambda: StockManager().obtener_productos_pagina(0, PAGINA), {"productos"}),
+    ("StockManager.obtener_productos_pagina (búsqueda)",
+     lambda: StockManager().obtener_productos_pagina(0, PAGINA, TERMINO), {"productos"}),
+    ("GestorInventario.contar_inventario",
+     lambda: GestorInventario().contar_inventario(TERMINO, config.busqueda_limite),
+     {"productos", "lotes_productos"}),
+    ("GestorInventario.obtener_inventario_pagina",
+     lambda: GestorInventario().obtener_inventario_pagina(0, PAGINA), {"lotes_productos"}),
+    ("GestorInventario.obtener_inventario_pagina (búsqueda)",
+     lambda: GestorInventario().obtener_inventario_pagina(0, PAGINA, TERMINO),
+     {"productos", "lotes_productos"}),
+    ("VademecumManager.obtener_vademecum_pagina",
+     lambda: VademecumManager().obtener_vademecum_pagina(0, PAGINA), {"vademecum"}),
+    ("ClienteManager.buscar_clientes",
+     lambda: ClienteManager().buscar_clientes("gar", config.busqueda_limite), {"clientes"}),
+    ("FacturaGenerator.obtener_facturas_por_rango",
+     _con_cursor(lambda cur: FacturaGenerator().obtener_facturas_por_rango(cur, "2025-01-01", "2025-01-31")),
+     {"facturas"}),
+    ("FacturaGenerator.obtener_factura_y_detalles",
+     _con_cursor(lambda cur: FacturaGenerator().obtener_factura_y_detalles(cur, 1)),
+     {"factura_detalles", "productos"}),
+]
+
+# EXPLAIN informa el alias usado en la consulta
+_ALIAS = {"p": "productos", "l": "lotes_productos", "f": "facturas", "fd": "factura_detalles"}
+
+
+def grabar_consultas():
+    """
+    Ejecuta cada método de CONSULTAS y retorna [(nombre, sql, params, tablas)]
+    con los SELECT que emitió, tal como llegaron al conector.
+    """
+    # Sin el índice en memoria, buscar_vademecum consulta MySQL
+    indice_memoria, config.vademecum_indice_memoria = config.vademecum_indice_memoria, False
+    grabadas = []
+    try:
+        for nombre, llamada, tablas in CONSULTAS:
+            with instrumentacion.grabar() as sentencias:
+                llamada()
+            if not sentencias:
+                print(f"  --  {nombre}: no ejecutó ninguna consulta")
+            for sql, params, _ in sentencias:
+                # Las uniones empiezan con "(SELECT"
+                if sql.lstrip("( \n").upper().startswith("SELECT"):
+                    grabadas.append((nombre, sql, params, tablas))
+    finally:
+        config.vademecum_indice_memoria = indice_memoria
+    return grabadas
+
+
+def verificar():
+    """
+    Retorna la lista de problemas encontrados (vacía si todo usa índices).
+    """
+    problemas = []
+    try:
+        grabadas = grabar_consultas()
+        with ConexionBD.sesion(dictionary=True) as cursor:
+            for nombre, sql, params, tablas in grabadas:
+                cursor.execute("EXPLAIN " + sql, params)
+                for fila in cursor.fetchall():
+                    tabla = _ALIAS.get(fila.get("table"), fila.get("table"))
+                    if tabla in tablas and fila.get("type") == "ALL":
+                        problemas.append(f"{nombre}: recorrido completo de '{tabla}' "
+                                         f"(claves posibles: {fila.get('possible_keys')})")
+                    else:
+                        print(f"  ok  {nombre}: {tabla} -> {fila.get('type')} / {fila.get('key')}")
+    except Error as e:
+        problemas.append(f"No se pudo consultar la base de datos: {e}")
+    return problemas
+
+
+def main():
+    problemas = verificar()
+    for p in problemas:
+        print("FALLA", p)
+    print("Sin recorridos completos." if not problemas else f"{len(problemas)} consulta(s) sin índice.")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# utils/anchos_columnas.py
+"""
+Ancho de las columnas de un Treeview calculado a partir de los datos en
+Python, sin recorrer los ítems ni medir cada celda con Tk.
+
+  - El ancho de un texto es la suma del ancho de sus caracteres, que se mide
+    con Tk una sola vez por fuente y carácter.
+  - De cada columna solo se miden los textos más largos (en caracteres); con
+    conjuntos muy grandes se toma antes una muestra pareja de filas.
+  - Con 'clave' el resultado se memoriza: volver a mostrar el mismo conjunto
+    de datos no recalcula nada.
+"""
+import heapq
+import tkinter.font as tkFont
+from collections import OrderedDict
+
+MARGEN = 10
+MUESTRA = 5000      # filas a considerar como máximo
+CANDIDATOS = 5      # textos más largos que se miden por columna
+
+_anchos_caracter = {}   # configuración de la fuente -> {carácter: px}
+_memo = OrderedDict()   # (clave, columnas, fuente) -> {columna: px}
+_MEMO_MAX = 32
+
+
+def _fuente(fuente):
+    """
+    Retorna (font, tabla de anchos por carácter). La tabla se indexa por la
+    configuración real de la fuente, así que un cambio de tamaño no reutiliza
+    medidas viejas.
+    """
+    font = tkFont.nametofont(fuente) if isinstance(fuente, str) else fuente
+    descriptor = tuple(sorted(font.actual().items()))
+    return font, descriptor, _anchos_caracter.setdefault(descriptor, {})
+
+
+def _ancho(texto, font, tabla) -> int:
+    total = 0
+    for c in texto:
+        ancho = tabla.get(c)
+        if ancho is None:
+            ancho = tabla[c] = font.measure(c)
+        total += ancho
+    return total
+
+
+def ancho_texto(texto, fuente="TkDefaultFont") -> int:
+    font, _, tabla = _fuente(fuente)
+    return _ancho(str(texto), font, tabla)
+
+
+def calcular(columnas, filas, fuente="TkDefaultFont", margen=MARGEN, clave=None) -> dict:
+    """
+    {columna: ancho en px} para mostrar 'filas' (secuencias de celdas en el
+    orden de 'columnas'). Cada columna es al menos tan ancha como su título.
+    """
+    columnas = tuple(columnas)
+    font, descriptor, tabla = _fuente(fuente)
+    if clave is not None:
+        memo_clave = (clave, columnas, descriptor)
+        if memo_clave in _memo:
+            _memo.move_to_end(memo_clave)
+            return dict(_memo[memo_clave])
+
+    if len(filas) > MUESTRA:
+        paso = len(filas) / MUESTRA
+        filas = [filas[int(i * paso)] for i in range(MUESTRA)]
+
+    anchos = {}
+    for i, col in enumerate(columnas):
+        textos = {str(fila[i]) for fila in filas if i < len(fila)}
+        textos.add(str(col))
+        # En fuentes proporcionales el más largo no siempre es el más ancho
+        anchos[col] = max(_ancho(t, font, tabla)
+                          for t in heapq.nlargest(CANDIDATOS, textos, key=len)) + margen
+
+    if clave is not None:
+        _memo[memo_clave] = dict(anchos)
+        if len(_memo) > _MEMO_MAX:
+            _memo.popitem(last=False)
+    return anchos
+
+
+def aplicar(tree, filas, fuente="TkDefaultFont", clave=None):
+    """
+    Ajusta las columnas de 'tree' a 'filas'.
+    """
+    for col, ancho in calcular(tree["columns"], filas, fuente, clave=clave).items():
+        tree.column(col, width=ancho)
+
+
+def olvidar():
+    _memo.clear()